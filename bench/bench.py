@@ -0,0 +1,298 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+"""Latency benchmarks for the linguistic services.
+
+Runs the UNO services of the extension against the deterministic libdivvun
+and com.sun.star stand-ins in bench/stubs, so no LibreOffice or language
+data is needed. The paragraphs of the given documents are replayed the
+way Writer calls us: doProofreading once per sentence, and the spell
+checker and hyphenator once per word. Example:
+
+	python3 bench/bench.py --passes 20 --output new.json --compare old.json
+
+Results are written as JSON; --compare prints the change against an
+earlier result file.
+"""
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+STUBS_DIR = os.path.join(BENCH_DIR, "stubs")
+sys.path[:0] = [STUBS_DIR, os.path.join(ROOT_DIR, "oxt", "pythonpath")]
+# Checker worker processes (pool/outOfProcess=true) import the stubs too
+os.environ["PYTHONPATH"] = os.pathsep.join(
+	[STUBS_DIR] + [path for path in [os.environ.get("PYTHONPATH")] if path])
+
+# Keep the language manifest of the stubs out of the real user cache
+os.environ["XDG_CACHE_HOME"] = tempfile.mkdtemp(prefix="divvun-bench-")
+atexit.register(shutil.rmtree, os.environ["XDG_CACHE_HOME"], True)
+
+import unostubs  # noqa: E402
+unostubs.install(os.path.join(ROOT_DIR, "oxt", "config.xcu"))
+
+import libdivvun  # noqa: E402
+from com.sun.star.beans import PropertyValue  # noqa: E402
+from com.sun.star.lang import Locale  # noqa: E402
+from LODivvun.BatchProofreader import readParagraphs  # noqa: E402
+from LODivvun.DivvunHandlePool import DivvunHandlePool  # noqa: E402
+from LODivvun.GrammarChecker import GrammarChecker  # noqa: E402
+from LODivvun.Hyphenator import Hyphenator  # noqa: E402
+from LODivvun.ParagraphTracker import sentenceStarts  # noqa: E402
+from LODivvun.SpellChecker import SpellChecker  # noqa: E402
+
+try:
+	from typing import Any, Callable, Dict, List, Optional, Tuple     # flake8: noqa
+except ImportError:
+	pass
+
+SERVICES = ("doProofreading", "isValid", "spell", "hyphenate", "createPossibleHyphens")
+
+
+def percentile(sortedValues, fraction):  # type: (List[float], float) -> float
+	"""Nearest-rank percentile"""
+	if len(sortedValues) == 0:
+		return 0.0
+	index = max(0, min(len(sortedValues) - 1, int(round(fraction * len(sortedValues) + 0.5)) - 1))
+	return sortedValues[index]
+
+
+def summarize(latencies, wallTime):  # type: (List[float], float) -> Dict[str, Any]
+	values = sorted(latencies)
+	total = sum(values)
+	return {
+		"calls": len(values),
+		"total_s": round(total, 6),
+		"throughput_per_s": round(len(values) / wallTime, 1) if wallTime > 0 else None,
+		"mean_ms": round(1000 * total / len(values), 4) if len(values) > 0 else 0.0,
+		"p50_ms": round(1000 * percentile(values, 0.50), 4),
+		"p95_ms": round(1000 * percentile(values, 0.95), 4),
+		"p99_ms": round(1000 * percentile(values, 0.99), 4),
+		"max_ms": round(1000 * values[-1], 4) if len(values) > 0 else 0.0,
+	}
+
+
+def wordsOf(text):  # type: (str) -> List[str]
+	return libdivvun.WORD.findall(text)
+
+
+def linguProperties():  # type: () -> Tuple[Any, ...]
+	"""The properties Writer passes with each spelling and hyphenation request"""
+	return tuple(
+		PropertyValue(name, 0, value, 0)
+		for name, value in sorted(unostubs.LINGU_PROPERTIES.items()))
+
+
+class Replay:
+	"""Calls one service with the whole input stream and records the latency of every call"""
+
+	def __init__(self, paragraphs, locale, properties):  # type: (List[str], Any, Tuple) -> None
+		self.paragraphs = paragraphs
+		self.words = [word for text in paragraphs for word in wordsOf(text)]
+		self.locale = locale
+		self.properties = properties
+		self.grammarChecker = GrammarChecker(unostubs.componentContext)
+		self.spellChecker = SpellChecker(unostubs.componentContext)
+		self.hyphenator = Hyphenator(unostubs.componentContext)
+
+	def run(self, service, documentId, latencies):  # type: (str, str, List[float]) -> None
+		clock = time.perf_counter
+		if service == "doProofreading":
+			for text in self.paragraphs:
+				starts = sentenceStarts(text) + [len(text)]
+				start = 0
+				for end in starts[1:]:
+					if end <= start:
+						continue
+					t = clock()
+					result = self.grammarChecker.doProofreading(documentId, text, self.locale, start, end, ())
+					latencies.append(clock() - t)
+					start = max(result.nStartOfNextSentencePosition, end)
+			return
+		if service == "isValid":
+			call = lambda word: self.spellChecker.isValid(word, self.locale, self.properties)
+		elif service == "spell":
+			call = lambda word: self.spellChecker.spell(word, self.locale, self.properties)
+		elif service == "hyphenate":
+			call = lambda word: self.hyphenator.hyphenate(
+				word, self.locale, max(len(word) - 2, 0), self.properties)
+		else:
+			call = lambda word: self.hyphenator.createPossibleHyphens(word, self.locale, self.properties)
+		for word in self.words:
+			t = clock()
+			call(word)
+			latencies.append(clock() - t)
+
+
+def runService(replay, service, passes, threads):  # type: (Replay, str, int, int) -> Dict[str, Any]
+	firstPass = []  # type: List[float]
+	allPasses = []  # type: List[float]
+	libdivvun.resetCalls()
+	wallStart = time.perf_counter()
+	for passNumber in range(passes):
+		perThread = [[] for i in range(threads)]  # type: List[List[float]]
+		workers = [
+			threading.Thread(
+				target=replay.run,
+				args=(service, "bench-document-{}".format(i), perThread[i]))
+			for i in range(threads)]
+		for worker in workers:
+			worker.start()
+		for worker in workers:
+			worker.join()
+		for latencies in perThread:
+			allPasses.extend(latencies)
+			if passNumber == 0:
+				firstPass.extend(latencies)
+	wallTime = time.perf_counter() - wallStart
+	summary = summarize(allPasses, wallTime)
+	summary["native_calls"] = libdivvun.calls
+	firstSummary = summarize(firstPass, 0)
+	summary["first_pass"] = {key: firstSummary[key] for key in ("calls", "p50_ms", "p95_ms", "p99_ms")}
+	return summary
+
+
+def setConfiguration(assignments):  # type: (List[str]) -> None
+	"""Applies group/key=value overrides to the stub registry"""
+	for assignment in assignments:
+		path, value = assignment.split("=", 1)
+		group, key = path.rsplit("/", 1)
+		values = unostubs.registry.setdefault(unostubs.CONFIG_ROOT + group, {})
+		current = values.get(key)
+		if isinstance(current, bool):
+			values[key] = value.lower() in ("1", "true", "yes")
+		elif isinstance(current, int):
+			values[key] = int(value)
+		else:
+			values[key] = value
+
+
+def gitRevision():  # type: () -> Optional[str]
+	try:
+		return subprocess.check_output(
+			["git", "describe", "--always", "--dirty"], cwd=ROOT_DIR,
+			stderr=subprocess.DEVNULL).decode("utf-8").strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def printSummary(result, previous, out):
+	# type: (Dict[str, Any], Optional[Dict[str, Any]], Any) -> None
+	out.write("{:<22} {:>8} {:>10} {:>10} {:>10} {:>12}\n".format(
+		"service", "calls", "p50 ms", "p95 ms", "p99 ms", "calls/s"))
+	for service, summary in result["services"].items():
+		out.write("{:<22} {:>8} {:>10.4f} {:>10.4f} {:>10.4f} {:>12.1f}\n".format(
+			service, summary["calls"], summary["p50_ms"], summary["p95_ms"], summary["p99_ms"],
+			summary["throughput_per_s"] or 0.0))
+		old = (previous or {}).get("services", {}).get(service)
+		if old is not None:
+			ratios = []
+			for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_per_s"):
+				if old.get(key):
+					ratios.append("{:+.1f}%".format(100.0 * (summary[key] - old[key]) / old[key]))
+				else:
+					ratios.append("n/a")
+			out.write("{:<22} {:>8} {:>10} {:>10} {:>10} {:>12}\n".format(
+				"  vs " + str(previous.get("revision")), "", *ratios))
+
+
+def main(argv=None):  # type: (Optional[List[str]]) -> int
+	parser = argparse.ArgumentParser(
+		description="Benchmark the linguistic services with stub libdivvun and UNO.")
+	parser.add_argument(
+		"documents", nargs="*", default=[os.path.join(ROOT_DIR, "sme.odt")],
+		help="plain text, ODT or JSONL files to replay (default: sme.odt)")
+	parser.add_argument("--lang", default="se", help="language of the replayed text")
+	parser.add_argument(
+		"--service", action="append", choices=SERVICES,
+		help="service to measure (default: all)")
+	parser.add_argument(
+		"--passes", type=int, default=10, help="number of times the input is replayed")
+	parser.add_argument(
+		"--threads", type=int, default=1, help="threads replaying the input concurrently")
+	parser.add_argument(
+		"--call-latency-us", type=float, default=libdivvun.CALL_LATENCY * 1e6,
+		help="time spent in each call of the stub libdivvun")
+	parser.add_argument(
+		"--char-latency-us", type=float, default=libdivvun.CHAR_LATENCY * 1e6,
+		help="additional time per input character")
+	parser.add_argument(
+		"--error-density", type=float, default=libdivvun.ERROR_DENSITY,
+		help="fraction of words reported as errors")
+	parser.add_argument(
+		"--no-properties", action="store_true",
+		help="pass no properties with spelling and hyphenation requests")
+	parser.add_argument(
+		"--config", action="append", default=[], metavar="GROUP/KEY=VALUE",
+		help="override an extension setting, e.g. pool/maxHandlesPerLanguage=4")
+	parser.add_argument(
+		"--output", help="file to write the JSON results to (default: standard output)")
+	parser.add_argument("--compare", help="earlier JSON results to compare against")
+	args = parser.parse_args(argv)
+
+	libdivvun.configure(args.call_latency_us / 1e6, args.char_latency_us / 1e6, args.error_density)
+	setConfiguration(args.config)
+	paragraphs = [
+		text for path in args.documents
+		for _, _, text in readParagraphs(path, "auto") if text.strip() != ""]
+	properties = () if args.no_properties else linguProperties()
+	replay = Replay(paragraphs, Locale(args.lang, "", ""), properties)
+
+	result = {
+		"revision": gitRevision(),
+		"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"settings": {
+			"documents": [os.path.basename(path) for path in args.documents],
+			"lang": args.lang,
+			"passes": args.passes,
+			"threads": args.threads,
+			"call_latency_us": args.call_latency_us,
+			"char_latency_us": args.char_latency_us,
+			"error_density": args.error_density,
+			"properties": not args.no_properties,
+			"config": args.config,
+		},
+		"input": {"paragraphs": len(paragraphs), "words": len(replay.words)},
+		"services": {},
+	}  # type: Dict[str, Any]
+	for service in args.service or SERVICES:
+		result["services"][service] = runService(replay, service, args.passes, args.threads)
+	DivvunHandlePool.getInstance().closeAllHandles()
+
+	previous = None
+	if args.compare is not None:
+		with open(args.compare, encoding="utf-8") as f:
+			previous = json.load(f)
+	printSummary(result, previous, sys.stderr)
+	text = json.dumps(result, indent=2, sort_keys=True)
+	if args.output is None:
+		print(text)
+	else:
+		with open(args.output, "w", encoding="utf-8") as f:
+			f.write(text + "\n")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
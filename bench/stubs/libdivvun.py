@@ -0,0 +1,162 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+"""Deterministic stand-in for the libdivvun Python module, for benchmarks.
+
+Whether a word is an error only depends on the word itself, so that runs
+can be compared. Every call into the "native" library burns CALL_LATENCY
+seconds plus CHAR_LATENCY seconds per character of input. The time is
+spent busy waiting with the GIL held, like the SWIG wrappers of the real
+library do. Use configure() to change the settings.
+"""
+
+import re
+import time
+import zlib
+
+try:
+	from typing import Dict, List, Tuple     # flake8: noqa
+except ImportError:
+	pass
+
+CALL_LATENCY = 50e-6
+CHAR_LATENCY = 0.5e-6
+# Fraction of words that are reported as errors
+ERROR_DENSITY = 0.05
+
+LANGUAGES = ("se", "sma", "smj", "smn", "sms", "nb")
+RULES = ("typo", "msyn-agr-subj-verb", "punct-space", "real-dilemma")
+
+WORD = re.compile(r"\w+")
+
+# Number of calls into the fake native library since the last reset
+calls = 0
+
+
+def configure(callLatency=None, charLatency=None, errorDensity=None):
+	global CALL_LATENCY, CHAR_LATENCY, ERROR_DENSITY
+	if callLatency is not None:
+		CALL_LATENCY = callLatency
+	if charLatency is not None:
+		CHAR_LATENCY = charLatency
+	if errorDensity is not None:
+		ERROR_DENSITY = errorDensity
+
+
+def resetCalls():
+	global calls
+	calls = 0
+
+
+def burn(characters):  # type: (int) -> None
+	global calls
+	calls = calls + 1
+	deadline = time.perf_counter() + CALL_LATENCY + CHAR_LATENCY * characters
+	while time.perf_counter() < deadline:
+		pass
+
+
+def wordHash(word):  # type: (str) -> int
+	return zlib.crc32(word.encode("utf-8"))
+
+
+def isError(word):  # type: (str) -> bool
+	return wordHash(word) % 10000 < ERROR_DENSITY * 10000
+
+
+class DivvunError:
+
+	def __init__(self, form, beg, end, err, dsc, rep):
+		self.form = form
+		self.beg = beg
+		self.end = end
+		self.err = err
+		self.dsc = dsc
+		self.rep = rep
+
+
+class Checker:
+
+	def __init__(self, language, pipe):
+		self.language = language
+		self.pipe = pipe
+		self.booleanOptions = {}  # type: Dict[int, bool]
+		self.integerOptions = {}  # type: Dict[int, int]
+
+	def spell(self, word):  # type: (str) -> bool
+		burn(len(word))
+		return not isError(word)
+
+	def suggest(self, word):  # type: (str) -> List[str]
+		burn(len(word) * 10)
+		return [word[:-1], word + "a", word[1:]]
+
+	def getHyphenationPattern(self, word):  # type: (str) -> str
+		burn(len(word))
+		# A break before every third letter that follows a vowel
+		return "".join("-" if i > 0 and i % 3 == 0 and word[i - 1] in "aeiouyáæøå" else " "
+			       for i in range(len(word)))
+
+	def setBooleanOption(self, option, value):
+		self.booleanOptions[option] = value
+
+	def setIntegerOption(self, option, value):
+		self.integerOptions[option] = value
+
+	def terminate(self):
+		pass
+
+
+class ArCheckerSpec:
+
+	def __init__(self, path):
+		self.__language = path.split("/")[-1].split(".")[0]
+
+	def defaultPipe(self):
+		return self.__language + "gram"
+
+	def pipeNames(self):
+		return (self.__language + "gram", self.__language + "spell", self.__language + "hyph")
+
+	def hasPipe(self, pipe):
+		return pipe in self.pipeNames()
+
+	def getChecker(self, pipe, verbose):
+		burn(0)
+		return Checker(self.__language, pipe)
+
+
+def listLangs(extraPath=""):  # type: (str) -> Dict[str, List[str]]
+	return {language: ["/bench/" + language + ".zcheck"] for language in LANGUAGES}
+
+
+def searchPaths():  # type: () -> List[str]
+	return ["/bench"]
+
+
+def utf16Offsets(text):  # type: (str) -> List[int]
+	offsets = [0]
+	for c in text:
+		offsets.append(offsets[-1] + (2 if ord(c) > 0xFFFF else 1))
+	return offsets
+
+
+def proc_errs_bytes(checker, text):  # type: (Checker, str) -> List[DivvunError]
+	burn(len(text))
+	offsets = utf16Offsets(text)
+	errors = []
+	for m in WORD.finditer(text):
+		word = m.group(0)
+		if isError(word):
+			rule = RULES[wordHash(word) % len(RULES)]
+			errors.append(DivvunError(word, offsets[m.start()], offsets[m.end()], rule,
+						  "Bench error " + rule, [word[:-1], word + "a"]))
+	return errors
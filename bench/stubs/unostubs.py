@@ -0,0 +1,228 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+"""Minimal stand-ins for the uno, unohelper and com.sun.star modules.
+
+Only what the linguistic services use is provided. The configuration
+registry is filled from oxt/config.xcu, so the benchmarks run with the
+same defaults as a fresh installation. Call install() before importing
+anything from LODivvun.
+"""
+
+import sys
+import types
+import xml.etree.ElementTree as ET
+
+try:
+	from typing import Any, Dict, List     # flake8: noqa
+except ImportError:
+	pass
+
+OOR_NS = "{http://openoffice.org/2001/registry}"
+CONFIG_ROOT = "/no.divvun.gramcheck.Config/"
+
+# Global linguistic settings, as in Tools > Options > Language Settings
+LINGU_PROPERTIES = {
+	"IsSpellWithDigits": False,
+	"IsSpellUpperCase": False,
+	"HyphMinLeading": 2,
+	"HyphMinTrailing": 2,
+	"HyphMinWordLength": 5,
+}
+
+# Registry contents by node path, filled by install()
+registry = {
+	"org.openoffice.Office.Linguistic/General": {"UILocale": ""},
+}  # type: Dict[str, Dict[str, Any]]
+
+
+class Struct:
+	"""UNO structs are plain records with default values"""
+	FIELDS = {}  # type: Dict[str, Any]
+
+	def __init__(self, *args, **kwargs):
+		for (name, default), value in zip(self.FIELDS.items(), args + (None,) * len(self.FIELDS)):
+			setattr(self, name, default if value is None else value)
+		for name, value in kwargs.items():
+			setattr(self, name, value)
+
+	def __eq__(self, other):
+		return type(self) is type(other) and self.__dict__ == other.__dict__
+
+	def __hash__(self):
+		return hash(tuple(sorted(self.__dict__.items())))
+
+	def __repr__(self):
+		return "%s(%s)" % (type(self).__name__, ", ".join("%s=%r" % i for i in self.__dict__.items()))
+
+
+def struct(name, **fields):
+	return type(name, (Struct,), {"FIELDS": fields})
+
+
+class UnknownPropertyException(Exception):
+	pass
+
+
+class ConfigurationAccess:
+
+	def __init__(self, nodePath):
+		self.__nodePath = nodePath
+		self.__listeners = []  # type: List[Any]
+
+	def getHierarchicalPropertyValue(self, key):
+		try:
+			return registry[self.__nodePath][key]
+		except KeyError:
+			raise UnknownPropertyException(self.__nodePath + "/" + key)
+
+	def setHierarchicalPropertyValue(self, key, value):
+		registry.setdefault(self.__nodePath, {})[key] = value
+
+	def commitChanges(self):
+		for listener in self.__listeners:
+			listener.changesOccurred(None)
+
+	def addChangesListener(self, listener):
+		self.__listeners.append(listener)
+
+	def removeChangesListener(self, listener):
+		self.__listeners.remove(listener)
+
+
+class ConfigurationProvider:
+
+	def createInstanceWithArguments(self, serviceName, arguments):
+		for argument in arguments:
+			if argument.Name == "nodepath":
+				return ConfigurationAccess(argument.Value)
+		return None
+
+
+class LinguProperties:
+
+	def getPropertyValue(self, name):
+		return LINGU_PROPERTIES[name]
+
+	def addPropertyChangeListener(self, name, listener):
+		pass
+
+
+class ServiceManager:
+
+	def createInstanceWithContext(self, serviceName, context):
+		if serviceName == "com.sun.star.linguistic2.LinguProperties":
+			return LinguProperties()
+		if serviceName == "com.sun.star.configuration.ConfigurationProvider":
+			return ConfigurationProvider()
+		raise Exception("No stand-in for service " + serviceName)
+
+
+class ComponentContext:
+
+	def __init__(self):
+		self.ServiceManager = ServiceManager()
+
+	def getValueByName(self, name):
+		if name == "/singletons/com.sun.star.configuration.theDefaultProvider":
+			return ConfigurationProvider()
+		return None
+
+
+componentContext = ComponentContext()
+
+
+def interface(name):
+	return type(name, (object,), {})
+
+
+MODULES = {
+	"com.sun.star.awt": {
+		"XActionListener": interface("XActionListener"),
+		"XContainerWindowEventHandler": interface("XContainerWindowEventHandler"),
+	},
+	"com.sun.star.awt.MessageBoxButtons": {"BUTTONS_OK": 1},
+	"com.sun.star.awt.MessageBoxType": {"ERRORBOX": 3},
+	"com.sun.star.beans": {
+		"PropertyValue": struct("PropertyValue", Name="", Handle=0, Value=None, State=0),
+		"UnknownPropertyException": UnknownPropertyException,
+		"XPropertyChangeListener": interface("XPropertyChangeListener"),
+	},
+	"com.sun.star.lang": {
+		"Locale": struct("Locale", Language="", Country="", Variant=""),
+		"XInitialization": interface("XInitialization"),
+		"XServiceDisplayName": interface("XServiceDisplayName"),
+		"XServiceInfo": interface("XServiceInfo"),
+	},
+	"com.sun.star.linguistic2": {
+		"LinguServiceEvent": struct("LinguServiceEvent", Source=None, nEvent=0),
+		"ProofreadingResult": struct("ProofreadingResult", aDocumentIdentifier="", xFlatParagraph=None,
+					     aText="", aLocale=None, nStartOfSentencePosition=0,
+					     nBehindEndOfSentencePosition=0, nStartOfNextSentencePosition=0,
+					     aErrors=(), aProperties=(), xProofreader=None),
+		"SingleProofreadingError": struct("SingleProofreadingError", nErrorStart=0, nErrorLength=0,
+						  nErrorType=0, aRuleIdentifier="", aShortComment="",
+						  aFullComment="", aSuggestions=(), aProperties=()),
+		"XHyphenatedWord": interface("XHyphenatedWord"),
+		"XHyphenator": interface("XHyphenator"),
+		"XLinguServiceEventBroadcaster": interface("XLinguServiceEventBroadcaster"),
+		"XPossibleHyphens": interface("XPossibleHyphens"),
+		"XProofreader": interface("XProofreader"),
+		"XSpellAlternatives": interface("XSpellAlternatives"),
+		"XSpellChecker": interface("XSpellChecker"),
+	},
+	"com.sun.star.linguistic2.LinguServiceEventFlags": {
+		"SPELL_CORRECT_WORDS_AGAIN": 1,
+		"SPELL_WRONG_WORDS_AGAIN": 2,
+		"HYPHENATE_AGAIN": 4,
+		"PROOFREAD_AGAIN": 8,
+	},
+	"com.sun.star.linguistic2.SpellFailure": {"SPELLING_ERROR": 4},
+	"com.sun.star.text.TextMarkupType": {"PROOFREADING": 7},
+	"com.sun.star.util": {"XChangesListener": interface("XChangesListener")},
+}
+
+
+def loadConfiguration(path):  # type: (str) -> None
+	"""Reads the default values of our registry settings from config.xcu"""
+	for node in ET.parse(path).getroot().findall("node"):
+		values = registry.setdefault(CONFIG_ROOT + node.get(OOR_NS + "name"), {})
+		for prop in node.findall("prop"):
+			valueType = prop.get(OOR_NS + "type")
+			value = prop.findtext("value") or ""  # type: Any
+			if valueType == "xs:boolean":
+				value = value == "true"
+			elif valueType == "xs:int":
+				value = int(value)
+			values[prop.get(OOR_NS + "name")] = value
+
+
+def install(configPath):  # type: (str) -> None
+	loadConfiguration(configPath)
+
+	uno = types.ModuleType("uno")
+	uno.getComponentContext = lambda: componentContext
+	sys.modules["uno"] = uno
+	unohelper = types.ModuleType("unohelper")
+	unohelper.Base = type("Base", (object,), {})
+	sys.modules["unohelper"] = unohelper
+
+	for name, members in sorted(MODULES.items()):
+		parts = name.split(".")
+		for i in range(1, len(parts) + 1):
+			packageName = ".".join(parts[:i])
+			if packageName not in sys.modules:
+				package = types.ModuleType(packageName)
+				package.__path__ = []
+				sys.modules[packageName] = package
+				if i > 1:
+					setattr(sys.modules[".".join(parts[:i - 1])], parts[i - 1], package)
+		sys.modules[name].__dict__.update(members)
@@ -0,0 +1,79 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+import logging
+import time
+from queue import LifoQueue
+from threading import Lock, Thread
+
+try:
+	from typing import Any, Callable, Hashable, Set     # flake8: noqa
+except ImportError:
+	pass
+
+# Minimum number of seconds between two "check again" notifications while
+# the queue is still being worked on
+NOTIFY_INTERVAL = 1.0
+
+
+class BackgroundProofreader:
+	"""Runs paragraph checks on background threads.
+
+	Jobs return True if they found errors. Since the caller has already
+	shown the paragraph without errors, only those results need to be
+	shown to the user: notify() is called when such results have landed,
+	at most once per NOTIFY_INTERVAL and always when the queue drains.
+	"""
+
+	def __init__(self, threads, notify):  # type: (int, Callable[[], None]) -> None
+		self.__notify = notify
+		# Last in, first out: the paragraph the user is looking at was
+		# most likely requested last
+		self.__queue = LifoQueue()  # type: LifoQueue
+		self.__pending = set()  # type: Set[Hashable]
+		self.__lock = Lock()
+		self.__notifyDue = False
+		self.__lastNotify = 0.0
+		for i in range(max(1, threads)):
+			worker = Thread(target=self.__work, name="DivvunProofreader-{}".format(i))
+			worker.daemon = True
+			worker.start()
+
+	def submit(self, key, job):  # type: (Hashable, Callable[[], bool]) -> None
+		"""Queues job unless a job with the same key is already waiting or running"""
+		with self.__lock:
+			if key in self.__pending:
+				return
+			self.__pending.add(key)
+		self.__queue.put((key, job))
+
+	def __work(self):
+		while True:
+			key, job = self.__queue.get()
+			foundErrors = False
+			try:
+				foundErrors = job()
+			except Exception:
+				logging.exception("BackgroundProofreader: check failed")
+			with self.__lock:
+				self.__pending.discard(key)
+				self.__notifyDue = self.__notifyDue or foundErrors
+				now = time.monotonic()
+				notify = self.__notifyDue and \
+					 (len(self.__pending) == 0 or now - self.__lastNotify >= NOTIFY_INTERVAL)
+				if notify:
+					self.__notifyDue = False
+					self.__lastNotify = now
+			if notify:
+				try:
+					self.__notify()
+				except Exception:
+					logging.exception("BackgroundProofreader: notification failed")
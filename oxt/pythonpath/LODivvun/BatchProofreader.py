@@ -0,0 +1,209 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+"""Proofread documents without LibreOffice.
+
+Uses the same checker loading and error filtering as the extension and
+writes one JSON record per error to standard output. Example:
+
+  PYTHONPATH=oxt/pythonpath python3 -m LODivvun.BatchProofreader --lang se sme.odt
+
+Input files may be plain text (one paragraph per line), ODT documents or
+JSONL with one {"text": ..., "id": ..., "lang": ...} object per line
+("id" and "lang" are optional). Paragraphs are checked by a pool of
+worker processes with one checker per language in each process.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import xml.etree.ElementTree as ET
+import zipfile
+
+from LODivvun.CheckerEngine import (getCachedParagraphErrors, getParagraphContext, parseErrors,
+				    sentenceErrors, storeParagraphErrors)
+from LODivvun.CheckerWorkers import WorkerError
+from LODivvun.DivvunHandlePool import DivvunHandlePool, Locale
+from LODivvun.ParagraphStore import DEFAULT_MAX_PARAGRAPHS
+from LODivvun.ParagraphTracker import utf16Length
+
+try:
+	from typing import Any, Dict, Iterator, List, Optional, Tuple     # flake8: noqa
+	Task = Tuple[str, int, Optional[str], str, str]
+except ImportError:
+	pass
+
+ODF_TEXT_NS = "urn:oasis:names:tc:opendocument:xmlns:text:1.0"
+ODF_OFFICE_NS = "urn:oasis:names:tc:opendocument:xmlns:office:1.0"
+ODF_PARAGRAPHS = ("{%s}p" % ODF_TEXT_NS, "{%s}h" % ODF_TEXT_NS)
+# Their paragraphs are read separately, not as part of the surrounding one
+ODF_SKIPPED = ("{%s}note" % ODF_TEXT_NS, "{%s}annotation" % ODF_OFFICE_NS) + ODF_PARAGRAPHS
+
+# Rules given with --ignore, set in each worker process
+ignoredRules = frozenset()  # type: frozenset
+
+def defaultInstallationPath():  # type: () -> str
+	# The directory that contains pythonpath/LODivvun, like in the extension
+	return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def odfInlineText(element):  # type: (ET.Element) -> str
+	if element.tag == "{%s}s" % ODF_TEXT_NS:
+		return " " * int(element.get("{%s}c" % ODF_TEXT_NS, "1"))
+	if element.tag == "{%s}tab" % ODF_TEXT_NS:
+		return "\t"
+	if element.tag == "{%s}line-break" % ODF_TEXT_NS:
+		return "\n"
+	if element.tag in ODF_SKIPPED:
+		return ""
+	return odfParagraphText(element)
+
+def odfParagraphText(element):  # type: (ET.Element) -> str
+	return (element.text or "") + "".join(
+		odfInlineText(child) + (child.tail or "") for child in element)
+
+def readOdt(path):  # type: (str) -> Iterator[Tuple[Optional[str], Optional[str], str]]
+	with zipfile.ZipFile(path) as odt:
+		with odt.open("content.xml") as content:
+			root = ET.parse(content).getroot()
+	for element in root.iter():
+		if element.tag in ODF_PARAGRAPHS:
+			yield None, None, odfParagraphText(element)
+
+def readText(path):  # type: (str) -> Iterator[Tuple[Optional[str], Optional[str], str]]
+	with open(path, encoding="utf-8") as f:
+		for line in f:
+			yield None, None, line.rstrip("\n")
+
+def readJsonl(path):  # type: (str) -> Iterator[Tuple[Optional[str], Optional[str], str]]
+	with open(path, encoding="utf-8") as f:
+		for line in f:
+			if line.strip() == "":
+				continue
+			record = json.loads(line)
+			yield record.get("id"), record.get("lang"), record["text"]
+
+def readParagraphs(path, inputFormat):
+	# type: (str, str) -> Iterator[Tuple[Optional[str], Optional[str], str]]
+	if inputFormat == "auto":
+		extension = os.path.splitext(path)[1].lower()
+		inputFormat = {".odt": "odt", ".jsonl": "jsonl"}.get(extension, "text")
+	if inputFormat == "odt":
+		return readOdt(path)
+	if inputFormat == "jsonl":
+		return readJsonl(path)
+	return readText(path)
+
+def initWorker(installationPath, variant, rules, verbose, cache):
+	# type: (str, str, List[str], bool, bool) -> None
+	logging.getLogger().setLevel(logging.DEBUG if verbose else logging.WARNING)
+	pool = DivvunHandlePool.getInstance()
+	pool.setInstallationPath(installationPath)
+	pool.setPreferredGlobalVariant(variant)
+	pool.setParagraphStoreSettings(cache, DEFAULT_MAX_PARAGRAPHS)
+	# Tasks are processed one at a time in each process
+	pool.setMaxHandlesPerLanguage(1)
+	global ignoredRules
+	ignoredRules = frozenset(rules)
+
+def checkText(pool, text, locale):
+	# type: (DivvunHandlePool, str, Locale) -> Optional[Tuple[Any, ...]]
+	"""Returns all errors of the paragraph, or None if there is no checker for locale.
+
+	Unlike checkParagraph, this always analyses the whole paragraph: the
+	paragraphs of a batch are not edits of each other, so the paragraph
+	tracker is not used.
+	"""
+	errors = getCachedParagraphErrors(pool, locale, text)
+	if errors is not None:
+		return errors
+	divvun = pool.acquireHandle(locale)
+	if divvun is None:
+		return None
+	try:
+		errors = parseErrors(divvun, text)
+	except WorkerError as e:
+		logging.warning("BatchProofreader: checking failed for locale %s: %s", locale, e)
+		return None
+	finally:
+		pool.releaseHandle(divvun)
+	pool.getParagraphCache().put(getParagraphContext(pool, locale) + (text,), errors)
+	storeParagraphErrors(pool, locale, text, errors)
+	return errors
+
+def checkTask(task):  # type: (Task) -> List[Dict[str, Any]]
+	source, index, paragraphId, language, text = task
+	pool = DivvunHandlePool.getInstance()
+	errors = checkText(pool, text, Locale(language, "", ""))
+	if errors is None:
+		return [{"source": source, "paragraph": index, "id": paragraphId, "lang": language,
+			 "failure": pool.getInitializationStatus()}]
+	# Error offsets are in UTF-16 code units
+	found, _ = sentenceErrors(errors, 0, utf16Length(text), ignoredRules)
+	return [{"source": source, "paragraph": index, "id": paragraphId, "lang": language,
+		 "beg": e.beg, "end": e.end, "form": e.form, "err": e.err, "dsc": e.dsc,
+		 "rep": list(e.rep)} for e in found]
+
+def tasks(paths, inputFormat, defaultLanguage):  # type: (List[str], str, str) -> Iterator[Task]
+	for path in paths:
+		for index, (paragraphId, language, text) in enumerate(readParagraphs(path, inputFormat)):
+			if text.strip() != "":
+				yield path, index, paragraphId, language or defaultLanguage, text
+
+def main(argv=None):  # type: (Optional[List[str]]) -> int
+	parser = argparse.ArgumentParser(
+		description="Proofread documents with libdivvun, one JSON record per error.")
+	parser.add_argument("files", nargs="+", help="plain text, ODT or JSONL files")
+	parser.add_argument("--lang", required=True,
+			    help="language of paragraphs that don't specify one, e.g. se")
+	parser.add_argument("--variant", default="", help="preferred dictionary variant")
+	parser.add_argument("--format", choices=["auto", "text", "odt", "jsonl"], default="auto",
+			    help="input format, guessed from the file extension by default")
+	parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+			    help="number of checker processes (default: number of cores)")
+	parser.add_argument("--chunksize", type=int, default=16,
+			    help="paragraphs sent to a worker at a time")
+	parser.add_argument("--ignore", action="append", default=[], metavar="RULE",
+			    help="rule identifier to ignore")
+	parser.add_argument("--installation-path", default=defaultInstallationPath(),
+			    help="extension directory, its divvun/ subdirectory is searched for "
+			    "language archives")
+	parser.add_argument("--cache", action="store_true",
+			    help="reuse the errors of paragraphs checked before, also by LibreOffice, "
+			    "and store the new ones")
+	parser.add_argument("--verbose", action="store_true")
+	args = parser.parse_args(argv)
+
+	logging.basicConfig(format="%(asctime)s %(levelname)-8s [%(processName)s] %(message)s",
+			    level=logging.DEBUG if args.verbose else logging.WARNING)
+	initArgs = (args.installation_path, args.variant, args.ignore, args.verbose, args.cache)
+	checked = 0
+	paragraphs = tasks(args.files, args.format, args.lang)
+	if args.workers <= 1:
+		initWorker(*initArgs)
+		results = map(checkTask, paragraphs)  # type: Iterator[List[Dict[str, Any]]]
+		for records in results:
+			for record in records:
+				print(json.dumps(record, ensure_ascii=False))
+			checked = checked + 1
+	else:
+		with multiprocessing.Pool(args.workers, initWorker, initArgs) as workers:
+			for records in workers.imap(checkTask, paragraphs, args.chunksize):
+				for record in records:
+					print(json.dumps(record, ensure_ascii=False))
+				checked = checked + 1
+	logging.info("Checked %d paragraphs", checked)
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
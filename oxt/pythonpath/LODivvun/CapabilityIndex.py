@@ -0,0 +1,146 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+import logging
+import os
+from collections import namedtuple
+from threading import Lock
+
+import libdivvun
+from LODivvun import UserCache
+from LODivvun.CheckerEngine import GRAMMAR_SERVICE, HYPHENATION_SERVICE, SPELLING_SERVICE
+
+try:
+	from typing import Any, AbstractSet, Callable, Dict, Optional, Tuple     # flake8: noqa
+except ImportError:
+	pass
+
+INDEX_NAME = "capabilities.json"
+INDEX_VERSION = 1
+
+# Pipe names end in the service they are for, e.g. smegram, smespell and
+# smehyph. Services without a pipe of their own use the grammar pipe.
+GRAMMAR_PIPE_SUFFIX = "gram"
+SERVICE_PIPE_SUFFIXES = {
+	SPELLING_SERVICE: "spell",
+	HYPHENATION_SERVICE: "hyph",
+}
+
+# The pipes of one archive
+Capabilities = namedtuple("Capabilities", ["defaultPipe", "pipes"])
+
+try:
+	# The (modification time, size) and the capabilities of each archive
+	ArchiveIndex = Dict[str, Tuple[Tuple[Optional[int], Optional[int]], Capabilities]]
+except NameError:
+	pass
+
+def findServicePipe(pipes, grammarPipe, language, service):
+	# type: (AbstractSet[str], str, str, str) -> Optional[str]
+	"""Returns the pipe for service, or None if there is only the grammar checking pipe"""
+	suffix = SERVICE_PIPE_SUFFIXES[service]
+	if grammarPipe.endswith(GRAMMAR_PIPE_SUFFIX):
+		grammarPipe = grammarPipe[:-len(GRAMMAR_PIPE_SUFFIX)]
+	for pipename in (grammarPipe + suffix, language + suffix):
+		if pipename in pipes:
+			return pipename
+	return None
+
+def hasService(capabilities, language, service):  # type: (Capabilities, str, str) -> bool
+	"""Returns True if the archive has a pipe that is meant for service"""
+	if service == GRAMMAR_SERVICE:
+		return capabilities.defaultPipe != ""
+	return findServicePipe(capabilities.pipes, capabilities.defaultPipe, language, service) is not None
+
+def archiveStamp(path):  # type: (str) -> Tuple[Optional[int], Optional[int]]
+	try:
+		stat = os.stat(path)
+		return (stat.st_mtime_ns, stat.st_size)
+	except OSError:
+		return (None, None)
+
+def readCapabilities(specpath):  # type: (str) -> Capabilities
+	"""Opens the archive to list its pipes, this doesn't load any of them"""
+	spec = libdivvun.ArCheckerSpec(specpath)
+	defaultPipe = spec.defaultPipe()
+	try:
+		pipes = frozenset(spec.pipeNames())
+	except (AttributeError, TypeError):
+		# Older bindings can only be asked about a given pipe, so
+		# only the service pipes are looked for
+		language = os.path.splitext(os.path.basename(specpath))[0]
+		base = defaultPipe
+		if base.endswith(GRAMMAR_PIPE_SUFFIX):
+			base = base[:-len(GRAMMAR_PIPE_SUFFIX)]
+		candidates = [prefix + suffix for prefix in (base, language)
+			      for suffix in SERVICE_PIPE_SUFFIXES.values()]
+		pipes = frozenset([defaultPipe] + [name for name in candidates if spec.hasPipe(name)])
+	return Capabilities(defaultPipe, pipes)
+
+class CapabilityIndex:
+	"""Records which pipes each language archive has.
+
+	Listing the pipes means opening the archive, so the result is kept in
+	the user cache directory next to the language catalogue, and an
+	archive is only opened again when its modification time or size
+	changes. Supported locales can then be listed without opening any
+	archive or loading any checker.
+	"""
+
+	def __init__(self, readArchive=None, indexName=INDEX_NAME):
+		# type: (Optional[Callable[[str], Capabilities]], Optional[str]) -> None
+		self.__readArchive = readArchive or readCapabilities
+		self.__indexName = indexName
+		self.__lock = Lock()
+		self.__archives = None  # type: Optional[ArchiveIndex]
+
+	def getCapabilities(self, specpath):  # type: (str) -> Capabilities
+		"""Returns the pipes of the archive, raises if it can't be opened"""
+		stamp = archiveStamp(specpath)
+		with self.__lock:
+			if self.__archives is None:
+				self.__archives = self.__readIndex()
+			known = self.__archives.get(specpath)
+			if known is not None and known[0] == stamp:
+				return known[1]
+		logging.info("CapabilityIndex: listing the pipes of {}".format(specpath))
+		capabilities = self.__readArchive(specpath)
+		with self.__lock:
+			self.__archives[specpath] = (stamp, capabilities)
+			archives = dict(self.__archives)
+		self.__writeIndex(archives)
+		return capabilities
+
+	def __readIndex(self):  # type: () -> ArchiveIndex
+		"""Call with lock held"""
+		if self.__indexName is None:
+			return {}
+		index = UserCache.readJson(self.__indexName)
+		if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+			return {}
+		try:
+			return {path: ((entry["mtime"], entry["size"]),
+				       Capabilities(entry["defaultPipe"], frozenset(entry["pipes"])))
+				for path, entry in index["archives"].items()}
+		except (KeyError, TypeError, ValueError, AttributeError):
+			logging.warning("CapabilityIndex: ignoring malformed index")
+			return {}
+
+	def __writeIndex(self, archives):  # type: (ArchiveIndex) -> None
+		if self.__indexName is None:
+			return
+		UserCache.writeJson(self.__indexName, {
+			"version": INDEX_VERSION,
+			"archives": {path: {"mtime": stamp[0], "size": stamp[1],
+					    "defaultPipe": capabilities.defaultPipe,
+					    "pipes": sorted(capabilities.pipes)}
+				     for path, (stamp, capabilities) in archives.items()},
+		})
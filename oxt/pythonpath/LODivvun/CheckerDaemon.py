@@ -0,0 +1,354 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+"""A checker daemon shared by several LibreOffice processes.
+
+Each office process normally loads its own copy of every checker. On a
+machine that runs many headless office processes, the daemon loads each
+checker once and answers the requests of all of them over a local
+Unix socket, with the protocol of the worker processes (see
+CheckerWorkers). Start it with
+
+  PYTHONPATH=oxt/pythonpath python3 -m LODivvun.CheckerDaemon \
+    --socket /run/user/1000/divvun-checker.sock
+
+and set pool/daemonAddress to the same path. Only the user that started
+the daemon can connect to the socket.
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+from collections import deque
+from threading import Event, Lock
+
+from LODivvun.CheckerWorkers import (BYTE, OP_BATCH, STATUS_OK, UINT, Channel, CheckerProxy,
+				     CheckerRegistry, CheckerServer, Unpacker, WorkerError, WorkerTimeout,
+				     loadBundledLibraries, packBytes, requestTimeout, serve)
+
+try:
+	from typing import Any, Deque, List, Optional, Tuple     # flake8: noqa
+except ImportError:
+	pass
+
+DEFAULT_DAEMON_CONNECTIONS = 4
+
+# Requests sent in one frame at most, when all connections are busy
+MAX_BATCH_REQUESTS = 64
+
+# Seconds to wait for the daemon to accept a connection
+CONNECT_TIMEOUT = 5
+
+# Mode of the daemon's socket, only its user may connect
+SOCKET_MODE = 0o600
+
+def connectSocket(path):  # type: (str) -> socket.socket
+	if not hasattr(socket, "AF_UNIX"):
+		raise OSError("Unix sockets are not supported here")
+	sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	try:
+		sock.settimeout(CONNECT_TIMEOUT)
+		sock.connect(path)
+	except OSError:
+		sock.close()
+		raise
+	sock.settimeout(None)
+	return sock
+
+class DaemonConnection:
+	"""A socket to the daemon"""
+
+	def __init__(self, address):  # type: (str) -> None
+		"""Raises WorkerError if the daemon can't be reached"""
+		try:
+			self.__socket = connectSocket(address)
+		except OSError as e:
+			raise WorkerError("could not connect to the checker daemon at {}: {}".format(address, e))
+		self.__reader = self.__socket.makefile("rb")
+		self.__channel = Channel(self.__reader, self.__socket.sendall, "DivvunDaemonReader")
+
+	def request(self, op, payload, timeout):  # type: (int, bytes, float) -> Tuple[int, Unpacker]
+		return self.__channel.request(op, payload, timeout)
+
+	def close(self):
+		try:
+			self.__socket.shutdown(socket.SHUT_RDWR)
+		except OSError:
+			pass
+		self.__socket.close()
+		self.__reader.close()
+
+class PendingRequest:
+	"""A request of a DaemonChecker, until its reply arrives"""
+
+	def __init__(self, op, payload):  # type: (int, bytes) -> None
+		self.op = op
+		self.payload = payload
+		self.done = Event()
+		self.reply = None  # type: Optional[Tuple[int, Unpacker]]
+		self.error = None  # type: Optional[WorkerError]
+
+	def finish(self, reply, error):
+		# type: (Optional[Tuple[int, Unpacker]], Optional[WorkerError]) -> None
+		self.reply = reply
+		self.error = error
+		self.done.set()
+
+class DaemonClient:
+	"""The connections of the pool to the daemon, shared by all of its checkers.
+
+	A request takes an idle connection, or opens another one up to the
+	limit. When all of them are busy, the request waits in a queue, and
+	the next connection that becomes free sends everything in the queue
+	in one frame.
+	"""
+
+	def __init__(self, address, connections, timeout):  # type: (str, int, float) -> None
+		"""address is the path of the daemon's socket"""
+		self.__address = address
+		self.__maxConnections = max(1, connections)
+		self.__timeout = timeout
+		self.__lock = Lock()
+		self.__idle = []  # type: List[DaemonConnection]
+		# Connections that are open or being opened
+		self.__connections = 0
+		self.__queue = deque()  # type: Deque[PendingRequest]
+		self.__closed = False
+
+	def getAddress(self):  # type: () -> str
+		return self.__address
+
+	def getMaxConnections(self):  # type: () -> int
+		return self.__maxConnections
+
+	def getTimeout(self):  # type: () -> float
+		return self.__timeout
+
+	def exchange(self, op, payload):  # type: (int, bytes) -> Tuple[int, Unpacker]
+		pending = PendingRequest(op, payload)
+		with self.__lock:
+			if self.__closed:
+				raise WorkerError("the connections to the checker daemon were closed")
+			self.__queue.append(pending)
+			connection = self.__idle.pop() if len(self.__idle) > 0 else None
+			connect = connection is None and self.__connections < self.__maxConnections
+			if connect:
+				self.__connections += 1
+		if connect:
+			try:
+				connection = DaemonConnection(self.__address)
+			except WorkerError as e:
+				self.__connectionLost(e)
+		if connection is not None:
+			self.__sendQueued(connection, connect)
+		timeout = requestTimeout(op, self.__timeout)
+		if not pending.done.wait(timeout if timeout > 0 else None):
+			with self.__lock:
+				if pending in self.__queue:
+					self.__queue.remove(pending)
+					raise WorkerTimeout("no connection to the checker daemon in {} s".format(timeout))
+			# It was sent meanwhile, the reply gets a deadline of its own
+			if not pending.done.wait(timeout):
+				raise WorkerTimeout("no answer from the checker daemon in {} s".format(timeout))
+		if pending.error is not None:
+			raise pending.error
+		return pending.reply
+
+	def __sendQueued(self, connection, fresh):  # type: (DaemonConnection, bool) -> None
+		"""Sends the queued requests until the queue is empty, then puts the connection back"""
+		while True:
+			with self.__lock:
+				if len(self.__queue) == 0 or self.__closed:
+					if self.__closed:
+						self.__connections -= 1
+					else:
+						self.__idle.append(connection)
+						connection = None
+					batch = []  # type: List[PendingRequest]
+				else:
+					size = min(MAX_BATCH_REQUESTS, len(self.__queue))
+					batch = [self.__queue.popleft() for _ in range(size)]
+			if len(batch) == 0:
+				if connection is not None:
+					connection.close()
+				return
+			try:
+				connection, replies = self.__sendAgainIfStale(connection, fresh, batch)
+			except WorkerError as e:
+				if isinstance(e, WorkerTimeout):
+					logging.warning("DaemonClient: no answer from {}: {}".format(self.__address, e))
+				for pending in batch:
+					pending.finish(None, e)
+				self.__connectionLost(e)
+				return
+			fresh = False
+			for pending, reply in zip(batch, replies):
+				pending.finish(reply, None)
+
+	def __sendAgainIfStale(self, connection, fresh, batch):
+		# type: (DaemonConnection, bool, List[PendingRequest]) -> Tuple[DaemonConnection, List[Any]]
+		"""Returns the connection that was used and the replies. Raises WorkerError
+		after closing the connection."""
+		while True:
+			try:
+				return connection, self.__send(connection, batch)
+			except WorkerError as e:
+				connection.close()
+				if fresh or isinstance(e, WorkerTimeout):
+					raise
+			# The daemon was restarted since the connection was last used. All
+			# requests can be repeated.
+			connection = DaemonConnection(self.__address)
+			fresh = True
+
+	def __send(self, connection, batch):
+		# type: (DaemonConnection, List[PendingRequest]) -> List[Tuple[int, Unpacker]]
+		# The requests of a batch are answered together, so the batch
+		# fails as a whole when its slowest request is overdue
+		timeout = max(requestTimeout(pending.op, self.__timeout) for pending in batch)
+		if len(batch) == 1:
+			return [connection.request(batch[0].op, batch[0].payload, timeout)]
+		payload = UINT.pack(len(batch)) + b"".join(
+			BYTE.pack(pending.op) + packBytes(pending.payload) for pending in batch)
+		status, reply = connection.request(OP_BATCH, payload, timeout)
+		try:
+			if status != STATUS_OK or reply.uint() != len(batch):
+				raise ValueError("unexpected reply")
+			return [(reply.byte(), Unpacker(reply.bytes())) for _ in batch]
+		except ValueError as e:
+			raise WorkerError("malformed batch reply from the checker daemon: {}".format(e))
+
+	def __connectionLost(self, error):  # type: (WorkerError) -> None
+		"""Fails the queued requests if no connection is left to send them"""
+		with self.__lock:
+			self.__connections -= 1
+			if self.__connections > 0:
+				return
+			queued = list(self.__queue)
+			self.__queue.clear()
+		for pending in queued:
+			pending.finish(None, error)
+
+	def close(self):
+		"""Closes the idle connections, busy ones are closed when their requests are done"""
+		with self.__lock:
+			self.__closed = True
+			idle = self.__idle
+			self.__idle = []
+			self.__connections -= len(idle)
+			queued = list(self.__queue)
+			self.__queue.clear()
+		for connection in idle:
+			connection.close()
+		error = WorkerError("the connections to the checker daemon were closed")
+		for pending in queued:
+			pending.finish(None, error)
+
+class DaemonChecker(CheckerProxy):
+	"""A checker of the daemon. Terminating it closes its view there."""
+
+	def __init__(self, client, specpath, pipename):  # type: (DaemonClient, str, str) -> None
+		CheckerProxy.__init__(self, specpath, pipename)
+		self.__client = client
+
+	def start(self):
+		"""Makes the daemon load the checker, raises WorkerError if that fails"""
+		self.open()
+
+	def _exchange(self, op, payload):  # type: (int, bytes) -> Tuple[int, Unpacker]
+		return self.__client.exchange(op, payload)
+
+	def terminate(self):
+		try:
+			self._closeViews()
+		except WorkerError as e:
+			# The daemon or our connections to it are gone, and the views with them
+			logging.debug("DaemonChecker: could not close the views of {}: {}".format(
+				self.getPipeName(), e))
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+	"""Answers the requests of one connection"""
+
+	def handle(self):
+		try:
+			serve(self.server.checkerServer, self.rfile, self.wfile)
+		except OSError as e:
+			logging.debug("CheckerDaemon: connection closed: {}".format(e))
+
+if hasattr(socketserver, "UnixStreamServer"):
+	class UnixDaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+		daemon_threads = True
+
+def createServer(path):  # type: (str) -> socketserver.BaseServer
+	if not hasattr(socketserver, "UnixStreamServer"):
+		raise OSError("Unix sockets are not supported here")
+	if os.path.lexists(path):
+		if not stat.S_ISSOCK(os.lstat(path).st_mode):
+			raise OSError("{} exists and is not a socket".format(path))
+		try:
+			connectSocket(path).close()
+		except OSError:
+			# Left behind by a daemon that didn't exit cleanly
+			os.unlink(path)
+		else:
+			raise OSError("a daemon is already listening on {}".format(path))
+	# The socket never exists with a wider mode
+	umask = os.umask(0o077)
+	try:
+		server = UnixDaemonServer(path, DaemonRequestHandler)
+	finally:
+		os.umask(umask)
+	try:
+		os.chmod(path, SOCKET_MODE)
+	except OSError:
+		server.server_close()
+		raise
+	return server
+
+def main(argv=None):  # type: (Optional[List[str]]) -> int
+	parser = argparse.ArgumentParser(
+		description="Serve the divvun checkers to several LibreOffice processes.")
+	parser.add_argument("--socket", required=True, help="path of the Unix socket to listen on")
+	parser.add_argument("--verbose", action="store_true")
+	args = parser.parse_args(argv)
+
+	logging.basicConfig(format="%(asctime)s %(levelname)-8s [daemon %(process)d] %(message)s",
+			    level=logging.DEBUG if args.verbose else logging.WARNING)
+	loadBundledLibraries()
+	# Imported only now, after its C libraries are loaded
+	import libdivvun
+	try:
+		server = createServer(args.socket)
+	except OSError as e:
+		logging.error("Could not listen: %s", e)
+		return 1
+	server.checkerServer = CheckerServer(libdivvun, CheckerRegistry(libdivvun))
+	signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+	logging.info("Listening on %s", args.socket)
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+		try:
+			os.unlink(args.socket)
+		except OSError:
+			pass
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,399 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+"""Checking logic that works on plain data.
+
+Nothing here may import com.sun.star, so that this module can be used
+without a running LibreOffice, e.g. by BatchProofreader. Locales are
+passed around as plain (language, country, variant) tuples, see
+localeTuple.
+"""
+
+import logging
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+import libdivvun
+from LODivvun.CheckerWorkers import CheckerProxy, WorkerError
+
+try:
+	from typing import AbstractSet, Any, Dict, Iterable, List, Optional, Sequence     # flake8: noqa
+	from typing import Tuple     # flake8: noqa
+except ImportError:
+	pass
+
+# Longer words are not spell checked or hyphenated at all
+MAX_WORD_LENGTH = 10000
+
+# libdivvun checker options that change hyphenation patterns
+DIVVUN_OPT_NO_UGLY_HYPHENATION = 4
+DIVVUN_MIN_HYPHENATED_WORD_LENGTH = 9
+DIVVUN_OPT_HYPHENATE_UNKNOWN_WORDS = 15
+HYPHENATION_OPTIONS = (DIVVUN_OPT_NO_UGLY_HYPHENATION, DIVVUN_MIN_HYPHENATED_WORD_LENGTH,
+		       DIVVUN_OPT_HYPHENATE_UNKNOWN_WORDS)
+
+# The linguistic services a checker instance can be acquired for
+GRAMMAR_SERVICE = "grammar"
+SPELLING_SERVICE = "spelling"
+HYPHENATION_SERVICE = "hyphenation"
+
+# The settings a single spelling or hyphenation request is handled with.
+# The overrides are (option, value) pairs of checker options that differ
+# from the options set on all checker instances.
+CheckerOptions = namedtuple("CheckerOptions", ["spellWithDigits", "spellUpperCase",
+					       "hyphMinLeading", "hyphMinTrailing", "hyphMinWordLength",
+					       "booleanOverrides", "integerOverrides"])
+
+# Hyphenation pattern of a word: breaks are the positions where a line may
+# be broken ('-' or '=' in the pattern), hyphens those of the '-' only
+HyphenationPattern = namedtuple("HyphenationPattern", ["breaks", "hyphens"])
+
+# Plain copy of a libdivvun error, so that it can outlive the checker call
+DivvunError = namedtuple("DivvunError", ["form", "beg", "end", "err", "dsc", "rep"])
+
+def parseErrors(divvun, text):
+	if isinstance(divvun, CheckerProxy):
+		return tuple(DivvunError(*fields) for fields in divvun.checkErrors(text))
+	return tuple(DivvunError(dError.form, dError.beg, dError.end, dError.err, dError.dsc,
+				 tuple(dError.rep))
+		     for dError in libdivvun.proc_errs_bytes(divvun, text))
+
+def getParagraphContext(instance, locale):
+	return (instance.getCheckerIdentity(locale), instance.getPreferredGlobalVariant())
+
+def getStoredParagraphErrors(instance, locale, text):
+	"""Returns the errors of the paragraph found in an earlier session, or None"""
+	store = instance.getParagraphStore()
+	if store is None:
+		return None
+	fingerprint = instance.getCheckerFingerprint(locale)
+	if fingerprint is None:
+		return None
+	return store.get(fingerprint, text)
+
+def storeParagraphErrors(instance, locale, text, errors):
+	store = instance.getParagraphStore()
+	if store is None:
+		return
+	fingerprint = instance.getCheckerFingerprint(locale)
+	if fingerprint is not None:
+		store.put(fingerprint, text, errors)
+
+def getCachedParagraphErrors(instance, locale, text):
+	"""Returns the errors of the paragraph if it has been checked already, otherwise None"""
+	cache = instance.getParagraphCache()
+	key = getParagraphContext(instance, locale) + (text,)
+	errors = cache.get(key)
+	if errors is None:
+		errors = getStoredParagraphErrors(instance, locale, text)
+		if errors is not None:
+			cache.put(key, errors)
+	return errors
+
+def getParagraphErrors(instance, divvun, documentId, text, locale):
+	"""Returns all errors of the paragraph, analysing it only if it is not in the cache.
+
+	LibreOffice passes the whole paragraph once for every sentence in it,
+	so the same text is typically checked several times in a row. When
+	the paragraph was edited, only the sentences around the edit are
+	analysed again.
+	"""
+	cache = instance.getParagraphCache()
+	context = getParagraphContext(instance, locale)
+	key = context + (text,)
+	errors = cache.get(key)
+	if errors is None:
+		errors, complete = instance.getParagraphTracker().check(documentId, context, text,
+									lambda fragment: parseErrors(divvun, fragment))
+		cache.put(key, errors)
+		if complete:
+			# Errors shifted from an earlier text are not kept between sessions
+			storeParagraphErrors(instance, locale, text, errors)
+	else:
+		logging.debug("CheckerEngine: paragraph cache hit")
+		instance.getParagraphTracker().remember(documentId, context, text, errors)
+	return errors
+
+def checkParagraph(instance, documentId, text, locale):
+	"""Returns all errors of the paragraph, or None if there is no checker for locale.
+
+	Paragraphs checked already, also in earlier sessions (see
+	ParagraphStore), don't need a checker instance, so their errors are
+	shown without waiting for the checker to load.
+	"""
+	errors = getCachedParagraphErrors(instance, locale, text)
+	if errors is not None:
+		instance.getParagraphTracker().remember(documentId, getParagraphContext(instance, locale),
+							text, errors)
+		return errors
+	divvun = instance.acquireHandle(locale)
+	if divvun is None:
+		logging.error("checkParagraph couldn't get an instance for locale %s"%(locale,))
+		logging.error("DivvunHandlePool.initializationErrors = %s"%(instance.getInitializationStatus(),))
+		return None
+	try:
+		return getParagraphErrors(instance, divvun, documentId, text, locale)
+	except WorkerError as e:
+		# Not cached, so the paragraph is checked again next time
+		logging.warning("checkParagraph failed for locale %s: %s"%(locale, e))
+		return None
+	finally:
+		instance.releaseHandle(divvun)
+
+def sentenceErrors(errors, startOfSentence, behindEndOfSentence, ignoredRules):
+	# type: (Iterable[DivvunError], int, int, AbstractSet[str]) -> Tuple[List[DivvunError], int]
+	"""Returns the errors of the sentence and the (possibly extended) end of the sentence.
+
+	errors must be sorted by start position. An error that starts within
+	the sentence but continues after it extends the sentence.
+	"""
+	result = []
+	for dError in errors:
+		logging.info("dError on form=%s at (%d,%d) replacements: %s",
+				dError.form, dError.beg, dError.end, dError.rep)
+		if dError.beg < startOfSentence:
+			logging.info("beg %d < startOfSentence %d, continue",
+					dError.beg, startOfSentence)
+			continue
+		if dError.beg >= behindEndOfSentence:
+			logging.info("beg %d >= behindEndOfSentence %d, break",
+					dError.beg, behindEndOfSentence)
+			break
+		if dError.end > behindEndOfSentence:
+			logging.info("dError.end %d > behindEndOfSentence %d, incf",
+					dError.end, behindEndOfSentence)
+			behindEndOfSentence = dError.end
+		if dError.err in ignoredRules:
+			logging.debug("Ignored error with rule " + dError.err)
+			continue
+		result.append(dError)
+	return result, behindEndOfSentence
+
+def checkerToggleIds(divvun):  # type: (Any) -> Dict[str, Dict[str, Tuple[str, str]]]
+	"""Returns {language: {error id: (message, description)}} from the preferences of a checker"""
+	if isinstance(divvun, CheckerProxy):
+		return divvun.getToggleIds()
+	return {language: {err: (msg, dsc) for err, (msg, dsc) in pref.toggleIds.asdict().items()}
+		for language, pref in libdivvun.prefs_bytes(divvun).asdict().items()}
+
+def localeTuple(locale):  # type: (Any) -> Tuple[str, str, str]
+	"""Returns a UNO Locale (or anything with the same fields) as a plain tuple"""
+	return (locale.Language, locale.Country, locale.Variant)
+
+class LocaleIndex:
+	"""The locales supported by a service, hashed for hasLocale.
+
+	LibreOffice asks about locales all the time, so the lookup is done
+	with set membership tests instead of scanning the locale list.
+	"""
+
+	def __init__(self, locales):  # type: (Iterable[Any]) -> None
+		self.__locales = tuple(locales)
+		tuples = [localeTuple(locale) for locale in self.__locales]
+		self.__languagesAndCountries = frozenset((language, country)
+							 for language, country, variant in tuples)
+		# BCP 47 tags that don't fit in a legacy locale are passed as
+		# ("qlt", "", tag)
+		self.__qltTags = frozenset(variant for language, country, variant in tuples if language == "qlt")
+
+	def __len__(self):
+		return len(self.__locales)
+
+	def getLocales(self):  # type: () -> Tuple[Any, ...]
+		return self.__locales
+
+	def contains(self, locale):  # type: (Any) -> bool
+		"""Returns True if a checker for one of the locales can be used for locale"""
+		language, country, variant = localeTuple(locale)
+		while True:
+			if (language, country) in self.__languagesAndCountries or language in self.__qltTags:
+				return True
+			if language != "qlt":
+				return False
+			if variant in self.__qltTags:
+				return True
+			# Try again with a trimmed tag: some tags may contain extra
+			# components that can be skipped while matching such as country in crk-Cans-CN
+			if len(variant) <= 9 or variant[-3] != "-":
+				return False
+			country = ""
+			variant = variant[:-3]
+
+def serviceTag(language, service):  # type: (str, str) -> str
+	"""Returns e.g. "se" for grammar checking and "se/spelling" for other services"""
+	if service == GRAMMAR_SERVICE:
+		return language
+	return language + "/" + service
+
+def splitServiceTag(tag):  # type: (str) -> Tuple[str, str]
+	language, _, service = tag.partition("/")
+	return language, service or GRAMMAR_SERVICE
+
+def acquireHandle(instance, locale, options, service):
+	# type: (Any, Any, CheckerOptions, str) -> Any
+	return instance.acquireHandle(locale, options.booleanOverrides, options.integerOverrides,
+				      service)
+
+def isWordValid(instance, locale, word, options):
+	# type: (Any, Any, str, CheckerOptions) -> Optional[bool]
+	"""Returns whether word is spelled correctly, or None if there is no checker for locale.
+
+	Verdicts are cached, as the same words are checked again on every
+	repaint and in every open document.
+	"""
+	cache = instance.getSpellCache(locale)
+	key = (word, options.spellWithDigits, options.spellUpperCase, instance.getPreferredGlobalVariant())
+	valid = cache.get(key)
+	if valid is None:
+		divvun = acquireHandle(instance, locale, options, SPELLING_SERVICE)
+		if divvun is None:
+			return None
+		try:
+			valid = bool(divvun.spell(word))
+		except WorkerError as e:
+			logging.warning("isWordValid failed: {}".format(e))
+			return None
+		finally:
+			instance.releaseHandle(divvun)
+		cache.put(key, valid)
+	return valid
+
+def suggestWords(instance, locale, word, options):
+	# type: (Any, Any, str, CheckerOptions) -> Optional[Tuple[str, ...]]
+	"""Returns the suggestions for a misspelled word, or None if there is no checker for locale"""
+	cache = instance.getSuggestionCache(locale)
+	key = (word, instance.getPreferredGlobalVariant())
+	suggestions = cache.get(key)
+	if suggestions is None:
+		divvun = acquireHandle(instance, locale, options, SPELLING_SERVICE)
+		if divvun is None:
+			return None
+		try:
+			suggestions = tuple(divvun.suggest(word))
+		except WorkerError as e:
+			logging.warning("suggestWords failed: {}".format(e))
+			return None
+		finally:
+			instance.releaseHandle(divvun)
+		cache.put(key, suggestions)
+	return suggestions
+
+def prefetchSuggestions(instance, locale, word):  # type: (Any, Any, str) -> bool
+	"""Puts the suggestions for word in the cache if a checker instance can be spared.
+
+	Returns False if the suggestions are not there and could not be
+	computed without taking the last idle instance or waiting for one,
+	see DivvunHandlePool.tryAcquireHandle.
+	"""
+	cache = instance.getSuggestionCache(locale)
+	key = (word, instance.getPreferredGlobalVariant())
+	if cache.get(key) is not None:
+		return True
+	divvun = instance.tryAcquireHandle(locale, SPELLING_SERVICE)
+	if divvun is None:
+		return False
+	try:
+		suggestions = tuple(divvun.suggest(word))
+	except WorkerError as e:
+		logging.warning("prefetchSuggestions failed: {}".format(e))
+		return False
+	finally:
+		instance.releaseHandle(divvun)
+	cache.put(key, suggestions)
+	return True
+
+def hyphenationOptions(hyphWordParts, hyphMinWordLength, hyphUnknownWords):
+	# type: (bool, int, bool) -> Tuple[Tuple[Tuple[int, bool], ...], Tuple[Tuple[int, int], ...]]
+	"""Returns the global boolean and integer checker options for the hyphenator settings"""
+	minWordLength = hyphMinWordLength if hyphWordParts else 2
+	return (((DIVVUN_OPT_NO_UGLY_HYPHENATION, True),
+		 (DIVVUN_OPT_HYPHENATE_UNKNOWN_WORDS, hyphUnknownWords)),
+		((DIVVUN_MIN_HYPHENATED_WORD_LENGTH, minWordLength),))
+
+def canHyphenate(word, options):  # type: (str, CheckerOptions) -> bool
+	wlen = len(word)
+	return wlen <= MAX_WORD_LENGTH and wlen >= options.hyphMinWordLength and \
+	       wlen >= options.hyphMinLeading + options.hyphMinTrailing
+
+def makeHyphenationPattern(word, pattern):  # type: (str, Sequence[str]) -> HyphenationPattern
+	"""Precomputes the break positions of the pattern from libdivvun, which has
+	'-' or '=' at the positions where the word may be broken"""
+	breaks = tuple(i for i in range(min(len(word), len(pattern)))
+		       if pattern[i] in "-=" and word[i] != "'")
+	hyphens = tuple(i for i in range(len(pattern)) if pattern[i] == "-")
+	return HyphenationPattern(breaks, hyphens)
+
+def getHyphenationPattern(instance, locale, word, options):
+	# type: (Any, Any, str, CheckerOptions) -> Optional[HyphenationPattern]
+	"""Returns the hyphenation pattern of word, or None if it is not to be hyphenated.
+
+	Patterns are cached, as LibreOffice asks for the same words in
+	hyphenate and createPossibleHyphens, and again on every relayout.
+	Patterns computed with the global options are also kept on disk, so
+	that they need not be computed again in the next session.
+	"""
+	if not canHyphenate(word, options):
+		return None
+	cache = instance.getHyphenationCache(locale)
+	key = (word, options.integerOverrides, instance.getPreferredGlobalVariant())
+	hyphenation = cache.get(key)
+	if hyphenation is None:
+		store = None
+		if len(options.booleanOverrides) == 0 and len(options.integerOverrides) == 0:
+			store = instance.getHyphenationStore(locale)
+		pattern = store.get(word) if store is not None else None
+		if pattern is None:
+			divvun = acquireHandle(instance, locale, options, HYPHENATION_SERVICE)
+			if divvun is None:
+				return None
+			try:
+				pattern = divvun.getHyphenationPattern(word)
+			except WorkerError as e:
+				logging.warning("getHyphenationPattern failed: {}".format(e))
+				return None
+			finally:
+				instance.releaseHandle(divvun)
+			if pattern is None:
+				# No pattern for this word, which is not cached either
+				return None
+			if store is not None:
+				store.put(word, pattern)
+		hyphenation = makeHyphenationPattern(word, pattern)
+		cache.put(key, hyphenation)
+	return hyphenation
+
+def findHyphenPos(word, hyphenation, maxLeading, minLeading, minTrailing):
+	# type: (str, HyphenationPattern, int, int, int) -> int
+	"""Returns the last allowed hyphenation point at or before maxLeading, or -1"""
+	# The last allowed point on this line, or the last generally allowed one
+	last = min(len(word) - minTrailing, maxLeading)
+	i = bisect_right(hyphenation.breaks, last) - 1
+	if i >= 0 and hyphenation.breaks[i] >= minLeading:
+		return hyphenation.breaks[i]
+	return -1
+
+def possibleHyphens(word, hyphenation, minLeading, minTrailing):
+	# type: (str, HyphenationPattern, int, int) -> Tuple[str, Tuple[int, ...]]
+	"""Returns word with '=' at every allowed hyphenation point, and the positions
+	of the characters that are followed by one"""
+	wlen = len(word)
+	hyphens = hyphenation.hyphens
+	first = bisect_left(hyphens, max(minLeading, 1))
+	end = bisect_right(hyphens, min(wlen, wlen - minTrailing))
+	hyphenSeq = tuple(i - 1 for i in hyphens[first:end])
+	hyphenatedWord = []
+	start = 0
+	for i in hyphenSeq:
+		hyphenatedWord.append(word[start:i + 1])
+		hyphenatedWord.append("=")
+		start = i + 1
+	hyphenatedWord.append(word[start:])
+	return "".join(hyphenatedWord), hyphenSeq
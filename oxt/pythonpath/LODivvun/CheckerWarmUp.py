@@ -0,0 +1,121 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+import logging
+import re
+from threading import Lock, Thread
+
+from LODivvun import UserCache
+from LODivvun.CheckerEngine import splitServiceTag
+
+try:
+	from typing import Any, Iterable, List, Optional     # flake8: noqa
+except ImportError:
+	pass
+
+RECENT_LANGUAGES_NAME = "recent-languages.json"
+RECENT_LANGUAGES_VERSION = 1
+
+# Number of recently checked languages that are loaded at startup
+MAX_RECENT_LANGUAGES = 4
+
+
+def parseLanguageList(text):  # type: (Optional[str]) -> List[str]
+	"""Splits a setting like "se, sma smj/spelling" into service tags, see serviceTag"""
+	return [language for language in re.split(r"[\s,;]+", text or "") if language != ""]
+
+
+class RecentLanguages:
+	"""The languages checked most recently, kept between sessions in the user cache.
+
+	Languages are stored as service tags, so that only the services that
+	were used are loaded again.
+	"""
+
+	def __init__(self, name=RECENT_LANGUAGES_NAME, size=MAX_RECENT_LANGUAGES):
+		# type: (Optional[str], int) -> None
+		self.__name = name
+		self.__size = size
+		self.__lock = Lock()
+		self.__languages = None  # type: Optional[List[str]]
+
+	def getLanguages(self):  # type: () -> List[str]
+		"""Returns the recent languages, the latest first"""
+		with self.__lock:
+			return list(self.__read())
+
+	def add(self, language):  # type: (str) -> None
+		with self.__lock:
+			languages = self.__read()
+			if len(languages) > 0 and languages[0] == language:
+				return
+			others = [other for other in languages if other != language]
+			self.__languages = ([language] + others)[:self.__size]
+			languages = list(self.__languages)
+		if self.__name is not None:
+			UserCache.writeJson(self.__name, {"version": RECENT_LANGUAGES_VERSION, "languages": languages})
+
+	def __read(self):  # type: () -> List[str]
+		"""Call with lock held"""
+		if self.__languages is None:
+			self.__languages = []
+			data = UserCache.readJson(self.__name) if self.__name is not None else None
+			if isinstance(data, dict) and data.get("version") == RECENT_LANGUAGES_VERSION:
+				languages = data.get("languages")
+				if isinstance(languages, list):
+					self.__languages = [language for language in languages
+							    if isinstance(language, str)][:self.__size]
+		return self.__languages
+
+
+class CheckerWarmUp:
+	"""Loads checker instances on a background thread before they are needed.
+
+	Loading the grammar and the transducers of a language may take
+	seconds, which the user would otherwise see as a frozen first
+	paragraph. The pool loads without holding its lock, and a request
+	that arrives while its language is being loaded here waits for that
+	instance instead of loading another one.
+	"""
+
+	def __init__(self, instance):  # type: (Any) -> None
+		self.__instance = instance
+		self.__thread = None  # type: Optional[Thread]
+
+	def start(self, tags, limit=0):  # type: (Iterable[str], int) -> None
+		"""Starts loading the service tags in the given order, duplicates are loaded once.
+
+		At most limit languages are loaded if it is not 0, so that the
+		pool doesn't unload them again right away.
+		"""
+		unique = []  # type: List[str]
+		languages = set()
+		for tag in tags:
+			language, service = splitServiceTag(tag)
+			if tag in unique or (limit > 0 and language not in languages and len(languages) == limit):
+				continue
+			languages.add(language)
+			unique.append(tag)
+		if len(unique) == 0 or self.__thread is not None:
+			return
+		logging.info("CheckerWarmUp: loading {}".format(", ".join(unique)))
+		self.__thread = Thread(target=self.__work, args=(unique,), name="DivvunWarmUp")
+		self.__thread.daemon = True
+		self.__thread.start()
+
+	def __work(self, tags):  # type: (List[str]) -> None
+		for tag in tags:
+			language, service = splitServiceTag(tag)
+			try:
+				if not self.__instance.preloadLanguage(language, service):
+					logging.info("CheckerWarmUp: could not load {}".format(tag))
+			except Exception:
+				logging.exception("CheckerWarmUp: loading {} failed".format(tag))
@@ -0,0 +1,715 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+"""Checkers running in other processes.
+
+With the pool/outOfProcess setting, each checker instance of the pool is
+a RemoteChecker: a separate Python process that loads the checker and
+answers requests over its standard input and output. Grammar checking
+then runs on other cores than LibreOffice, its memory is not in the
+office process, and a crash or a hang only takes down the worker. A
+request that takes longer than its deadline kills the worker, and the
+next request starts a new one. The checker daemon (see CheckerDaemon)
+speaks the same protocol over sockets.
+
+Every message is a frame: a header with the length of the payload, the
+request id and the operation (in requests) or status (in replies),
+followed by the payload. Strings are UTF-8 with a uint32 length, all
+integers are little endian.
+
+A client opens a view of a checker: the archive, the pipe and the
+options. The other side loads each checker once and sets the options of
+the view before each request on it, so views with different options can
+share a checker. All other requests start with the id of a view. A
+client closes the views it no longer uses, and a checker is unloaded
+when no view of it is left.
+"""
+
+import logging
+import os
+import platform
+import queue
+import random
+import re
+import struct
+import subprocess
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from ctypes import CDLL
+from threading import Lock, Thread
+
+try:
+	from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple     # flake8: noqa
+except ImportError:
+	pass
+
+HEADER = struct.Struct("<IIB")
+UINT = struct.Struct("<I")
+INT = struct.Struct("<i")
+BYTE = struct.Struct("<B")
+
+OP_OPEN = 1
+OP_CHECK = 2
+OP_SPELL = 3
+OP_SUGGEST = 4
+OP_HYPHENATE = 5
+OP_TOGGLE_IDS = 8
+OP_BATCH = 9
+OP_CLOSE = 10
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+# The view isn't known (any more), the client opens it again
+STATUS_UNKNOWN_VIEW = 2
+
+# The first view id of a worker or daemon is random below this
+VIEW_ID_RANGE = 1 << 31
+
+# Seconds a worker may take to start and load its checker, at least
+WORKER_LOAD_TIMEOUT = 60
+
+# Seconds a worker gets to exit when it is no longer needed
+WORKER_EXIT_TIMEOUT = 1
+
+# python: the interpreter that runs the workers. timeout: seconds a
+# request may take before the worker is restarted, 0 for no limit.
+WorkerSettings = namedtuple("WorkerSettings", ["python", "timeout"])
+
+class WorkerError(Exception):
+	"""A request could not be answered by the worker"""
+
+class WorkerTimeout(WorkerError):
+	"""The worker didn't answer in time and was stopped"""
+
+class UnknownView(Exception):
+	"""A request named a view that wasn't opened"""
+
+def pythonPathDirectory():  # type: () -> str
+	# The directory that contains LODivvun, and libdivvun in the extension
+	return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def defaultPython():  # type: () -> str
+	"""Returns the interpreter that runs us, or the one installed with LibreOffice.
+
+	In LibreOffice, sys.executable may be the office program itself.
+	"""
+	if os.path.basename(sys.executable).lower().startswith("python"):
+		return sys.executable
+	for name in ("python.exe", "python", "python3"):
+		candidate = os.path.join(os.path.dirname(sys.executable), name)
+		if os.path.isfile(candidate):
+			return candidate
+	return "python3"
+
+def requestTimeout(op, timeout):  # type: (int, float) -> float
+	"""Returns the deadline of a request in seconds, 0 for none. Opening
+	a view may need to load the checker first."""
+	if op == OP_OPEN and timeout > 0:
+		return max(timeout, WORKER_LOAD_TIMEOUT)
+	return timeout
+
+def packBytes(data):  # type: (bytes) -> bytes
+	return UINT.pack(len(data)) + data
+
+def packString(text):  # type: (str) -> bytes
+	return packBytes(text.encode("utf-8"))
+
+def packStrings(texts):  # type: (List[str]) -> bytes
+	return UINT.pack(len(texts)) + b"".join(packString(text) for text in texts)
+
+def packOptions(booleanOptions, integerOptions):
+	# type: (Dict[int, bool], Dict[int, int]) -> bytes
+	return b"".join(
+		[UINT.pack(len(booleanOptions))] +
+		[UINT.pack(option) + BYTE.pack(value) for option, value in sorted(booleanOptions.items())] +
+		[UINT.pack(len(integerOptions))] +
+		[UINT.pack(option) + INT.pack(value) for option, value in sorted(integerOptions.items())])
+
+class Unpacker:
+	"""Reads the fields of a payload in order"""
+
+	def __init__(self, data):  # type: (bytes) -> None
+		self.__data = data
+		self.__offset = 0
+
+	def __unpack(self, field):  # type: (struct.Struct) -> Any
+		value = field.unpack_from(self.__data, self.__offset)[0]
+		self.__offset = self.__offset + field.size
+		return value
+
+	def uint(self):  # type: () -> int
+		return self.__unpack(UINT)
+
+	def int(self):  # type: () -> int
+		return self.__unpack(INT)
+
+	def byte(self):  # type: () -> int
+		return self.__unpack(BYTE)
+
+	def bytes(self):  # type: () -> bytes
+		length = self.uint()
+		end = self.__offset + length
+		if end > len(self.__data):
+			raise ValueError("truncated field")
+		data = self.__data[self.__offset:end]
+		self.__offset = end
+		return data
+
+	def string(self):  # type: () -> str
+		return self.bytes().decode("utf-8")
+
+	def strings(self):  # type: () -> List[str]
+		return [self.string() for _ in range(self.uint())]
+
+	def options(self):
+		# type: () -> Tuple[Tuple[Tuple[int, bool], ...], Tuple[Tuple[int, int], ...]]
+		"""Reads what packOptions wrote, as sorted tuples"""
+		booleanOptions = tuple((self.uint(), self.byte() != 0) for _ in range(self.uint()))
+		integerOptions = tuple((self.uint(), self.int()) for _ in range(self.uint()))
+		return booleanOptions, integerOptions
+
+def readExactly(stream, size):  # type: (BinaryIO, int) -> Optional[bytes]
+	"""Returns size bytes, or None at the end of the stream"""
+	data = stream.read(size)
+	if data is None or len(data) < size:
+		return None
+	return data
+
+def readFrames(stream, frames):  # type: (BinaryIO, queue.Queue) -> None
+	"""Puts (request id, status, payload) of every frame in frames, and None at the end"""
+	try:
+		while True:
+			header = readExactly(stream, HEADER.size)
+			if header is None:
+				break
+			length, requestId, status = HEADER.unpack(header)
+			payload = readExactly(stream, length)
+			if payload is None:
+				break
+			frames.put((requestId, status, payload))
+	except (OSError, ValueError) as e:
+		logging.debug("CheckerWorkers.readFrames: {}".format(e))
+	frames.put(None)
+
+class Channel:
+	"""Sends requests over a byte stream, one at a time, and waits for the replies.
+
+	After a timeout or when the other side went away, the channel can't
+	be used any more; its owner closes the stream.
+	"""
+
+	def __init__(self, reader, write, name):
+		# type: (BinaryIO, Callable[[bytes], None], str) -> None
+		self.__write = write
+		self.__replies = queue.Queue()  # type: queue.Queue
+		self.__lastRequestId = 0
+		self.__broken = False
+		thread = Thread(target=readFrames, args=(reader, self.__replies), name=name)
+		thread.daemon = True
+		thread.start()
+
+	def request(self, op, payload, timeout):  # type: (int, bytes, float) -> Tuple[int, Unpacker]
+		"""Returns the status and the payload of the reply. Raises WorkerTimeout
+		if there is none after timeout seconds (0 for no limit)."""
+		if self.__broken:
+			raise WorkerError("the connection is closed")
+		self.__lastRequestId = (self.__lastRequestId + 1) & 0xffffffff
+		requestId = self.__lastRequestId
+		try:
+			self.__write(HEADER.pack(len(payload), requestId, op) + payload)
+		except (OSError, ValueError) as e:
+			self.__broken = True
+			raise WorkerError("the other side went away: {}".format(e))
+		deadline = time.monotonic() + timeout if timeout > 0 else None
+		while True:
+			remaining = max(0, deadline - time.monotonic()) if deadline is not None else None
+			try:
+				reply = self.__replies.get(timeout=remaining)
+			except queue.Empty:
+				self.__broken = True
+				raise WorkerTimeout("no answer in {} s".format(timeout))
+			if reply is None:
+				self.__broken = True
+				raise WorkerError("the other side went away")
+			replyId, status, data = reply
+			if replyId == requestId:
+				return status, Unpacker(data)
+
+class CheckerProxy(ABC):
+	"""Stands in for a libdivvun checker that runs in another process.
+
+	Subclasses send the requests, see RemoteChecker and
+	CheckerDaemon.DaemonChecker. Setting an option makes the next
+	request open a new view, the checker itself is not loaded again.
+	The view of the old options is closed then.
+	"""
+
+	def __init__(self, specpath, pipename):  # type: (str, str) -> None
+		self.__specpath = specpath
+		self.__pipename = pipename
+		self.__booleanOptions = {}  # type: Dict[int, bool]
+		self.__integerOptions = {}  # type: Dict[int, int]
+		self.__view = None  # type: Optional[int]
+		# Views of old options, closed before the next one is opened
+		self.__staleViews = []  # type: List[int]
+
+	def getPipeName(self):  # type: () -> str
+		return self.__pipename
+
+	@abstractmethod
+	def _exchange(self, op, payload):  # type: (int, bytes) -> Tuple[int, Unpacker]
+		"""Sends a request and returns the status and the payload of its reply,
+		raises WorkerError if there is none"""
+
+	def _forgetView(self):
+		"""Call when the other side was restarted and has lost its views"""
+		self.__view = None
+		self.__staleViews = []
+
+	def _closeViews(self):
+		"""Closes the views on the other side, raises WorkerError if it can't be reached"""
+		if self.__view is not None:
+			self.__staleViews.append(self.__view)
+			self.__view = None
+		while len(self.__staleViews) > 0:
+			# Closed at most once, a second close would drop the reference
+			# of another client. A view the other side doesn't know is
+			# closed already.
+			view = self.__staleViews.pop()
+			self._exchange(OP_CLOSE, UINT.pack(view))
+
+	def open(self):  # type: () -> int
+		"""Returns the view with the current options, raises WorkerError if the
+		checker can't be loaded"""
+		view = self.__view
+		if view is None:
+			self._closeViews()
+			status, reply = self._exchange(OP_OPEN, packString(self.__specpath) +
+						      packString(self.__pipename) +
+						      packOptions(self.__booleanOptions, self.__integerOptions))
+			if status != STATUS_OK:
+				raise WorkerError(reply.string())
+			view = self.__view = reply.uint()
+		return view
+
+	def __request(self, op, payload):  # type: (int, bytes) -> Unpacker
+		status, reply = self._exchange(op, UINT.pack(self.open()) + payload)
+		if status == STATUS_UNKNOWN_VIEW:
+			# The other side was restarted since the view was opened
+			self._forgetView()
+			status, reply = self._exchange(op, UINT.pack(self.open()) + payload)
+		if status != STATUS_OK:
+			raise WorkerError(reply.string())
+		return reply
+
+	def checkErrors(self, text):
+		# type: (str) -> List[Tuple[str, int, int, str, str, Tuple[str, ...]]]
+		"""Returns the fields of the errors libdivvun.proc_errs_bytes finds in text"""
+		reply = self.__request(OP_CHECK, packString(text))
+		return [(reply.string(), reply.int(), reply.int(), reply.string(), reply.string(),
+			 tuple(reply.strings())) for _ in range(reply.uint())]
+
+	def getToggleIds(self):  # type: () -> Dict[str, Dict[str, Tuple[str, str]]]
+		"""Returns {language: {error id: (message, description)}} of the checker's preferences"""
+		reply = self.__request(OP_TOGGLE_IDS, b"")
+		toggleIds = {}  # type: Dict[str, Dict[str, Tuple[str, str]]]
+		for _ in range(reply.uint()):
+			language = reply.string()
+			toggleIds[language] = {reply.string(): (reply.string(), reply.string())
+					       for _ in range(reply.uint())}
+		return toggleIds
+
+	def spell(self, word):  # type: (str) -> bool
+		return self.__request(OP_SPELL, packString(word)).byte() != 0
+
+	def suggest(self, word):  # type: (str) -> List[str]
+		return self.__request(OP_SUGGEST, packString(word)).strings()
+
+	def getHyphenationPattern(self, word):  # type: (str) -> Optional[str]
+		reply = self.__request(OP_HYPHENATE, packString(word))
+		# The flag is 0 if there is no pattern for word
+		if reply.byte() == 0:
+			return None
+		return reply.string()
+
+	def setBooleanOption(self, option, value):  # type: (int, bool) -> None
+		if self.__booleanOptions.get(option) != value:
+			self.__booleanOptions[option] = value
+			self.__retireView()
+
+	def setIntegerOption(self, option, value):  # type: (int, int) -> None
+		if self.__integerOptions.get(option) != value:
+			self.__integerOptions[option] = value
+			self.__retireView()
+
+	def __retireView(self):
+		if self.__view is not None:
+			self.__staleViews.append(self.__view)
+			self.__view = None
+
+	def terminate(self):
+		pass
+
+class RemoteChecker(CheckerProxy):
+	"""Runs a libdivvun checker in a worker process of its own.
+
+	The pool checks an instance out to one thread at a time, so there is
+	at most one request in flight. The worker is started again after it
+	crashed or was stopped, and the view is opened again with the same
+	options.
+	"""
+
+	def __init__(self, specpath, pipename, settings):  # type: (str, str, WorkerSettings) -> None
+		CheckerProxy.__init__(self, specpath, pipename)
+		self.__specpath = specpath
+		self.__settings = settings
+		# Serialises requests and restarts
+		self.__lock = Lock()
+		self.__process = None  # type: Optional[subprocess.Popen]
+		self.__channel = None  # type: Optional[Channel]
+		self.__terminated = False
+
+	def start(self):
+		"""Starts the worker and loads the checker, raises WorkerError if that fails"""
+		self.open()
+
+	def __ensureStarted(self):
+		"""Call with lock held"""
+		if self.__process is not None and self.__process.poll() is not None:
+			logging.warning("RemoteChecker: the worker for {} exited with {}".format(
+				self.getPipeName(), self.__process.returncode))
+			self.__stop()
+		if self.__process is not None:
+			return
+		if self.__terminated:
+			raise WorkerError("the checker was terminated")
+		env = dict(os.environ)
+		env["PYTHONPATH"] = os.pathsep.join(
+			[pythonPathDirectory()] + [path for path in [env.get("PYTHONPATH")] if path])
+		logging.info("RemoteChecker: starting a worker for {} in {}".format(
+			self.getPipeName(), self.__specpath))
+		try:
+			process = subprocess.Popen([self.__settings.python, "-m", "LODivvun.CheckerWorkers"],
+						   stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+		except OSError as e:
+			raise WorkerError("could not start {}: {}".format(self.__settings.python, e))
+
+		def write(data):  # type: (bytes) -> None
+			process.stdin.write(data)
+			process.stdin.flush()
+
+		self.__process = process
+		self.__channel = Channel(process.stdout, write, "DivvunWorkerReader")
+		self._forgetView()
+
+	def _exchange(self, op, payload):  # type: (int, bytes) -> Tuple[int, Unpacker]
+		with self.__lock:
+			self.__ensureStarted()
+			timeout = requestTimeout(op, self.__settings.timeout)
+			try:
+				return self.__channel.request(op, payload, timeout)
+			except WorkerTimeout:
+				logging.warning("RemoteChecker: no answer from {} in {} s, stopping the worker".format(
+					self.getPipeName(), timeout))
+				self.__stop()
+				raise
+			except WorkerError:
+				self.__stop()
+				raise
+
+	def __stop(self):
+		"""Call with lock held"""
+		process = self.__process
+		self.__process = None
+		self.__channel = None
+		if process is None:
+			return
+		process.kill()
+		process.wait()
+		process.stdin.close()
+		process.stdout.close()
+
+	def terminate(self):
+		with self.__lock:
+			self.__terminated = True
+			process = self.__process
+			self.__process = None
+			self.__channel = None
+		if process is None:
+			return
+		# The worker exits at the end of its input
+		try:
+			process.stdin.close()
+			process.wait(WORKER_EXIT_TIMEOUT)
+		except (OSError, subprocess.TimeoutExpired):
+			process.kill()
+			process.wait()
+		process.stdout.close()
+
+# Like LibLoad.loadLibs, which needs UNO, libdivvun.so last since it
+# depends on the others
+BUNDLED_LIBRARIES = ["cg3", "archive", "hfst", "hfstospell", "divvun"]
+
+def loadBundledLibraries():
+	"""Loads the C libraries bundled with the extension, if there are any"""
+	extensionDirectory = os.path.dirname(pythonPathDirectory())
+	searchPath = os.path.join(extensionDirectory, "divvun",
+				  platform.system() + "-" + "-".join(platform.architecture()))
+	if not os.path.exists(searchPath):
+		return
+	suffix = "dll" if os.name == "nt" else "dylib" if sys.platform == "darwin" else "so"
+	for libname in BUNDLED_LIBRARIES:
+		pattern = r"^lib{}([.][0-9]+)?[.]{}".format(libname, suffix)
+		matches = [f for f in os.listdir(searchPath) if re.match(pattern, f)]
+		if len(matches) > 0:
+			CDLL(os.path.join(searchPath, sorted(matches, key=len)[0]))
+
+class SharedChecker:
+	"""A loaded checker and the options that are set on it. Use with lock held."""
+
+	def __init__(self, key):  # type: (Tuple[str, str]) -> None
+		self.key = key
+		self.lock = Lock()
+		self.checker = None  # type: Any
+		self.booleanOptions = {}  # type: Dict[int, bool]
+		self.integerOptions = {}  # type: Dict[int, int]
+		# Open views and opens in progress, with the lock of the registry held
+		self.references = 0
+
+# A checker with the options of a client, as sorted tuples of (option, value)
+CheckerView = namedtuple("CheckerView", ["shared", "booleanOptions", "integerOptions"])
+
+class CheckerRegistry:
+	"""The checkers of a worker or of the daemon, each loaded once.
+
+	A view only sets the options it names. The pool gives every checker
+	all global options, so views of the same checker set the same ones.
+	"""
+
+	def __init__(self, libdivvun):  # type: (Any) -> None
+		self.__libdivvun = libdivvun
+		self.__lock = Lock()
+		self.__checkers = {}  # type: Dict[Tuple[str, str], SharedChecker]
+		self.__views = {}  # type: Dict[int, CheckerView]
+		self.__viewIds = {}  # type: Dict[Tuple[Any, ...], int]
+		# Clients that opened each view and haven't closed it
+		self.__viewReferences = {}  # type: Dict[int, int]
+		# View ids of a restarted worker or daemon don't match those of
+		# the one before, which clients may still use
+		self.__nextView = random.randrange(VIEW_ID_RANGE)
+
+	def open(self, specpath, pipename, booleanOptions, integerOptions):
+		# type: (str, str, Tuple[Tuple[int, bool], ...], Tuple[Tuple[int, int], ...]) -> int
+		"""Loads the checker if needed and returns the id of the view. Each
+		open must be followed by a close of the view."""
+		key = (specpath, pipename)
+		with self.__lock:
+			shared = self.__checkers.get(key)
+			if shared is None:
+				shared = self.__checkers[key] = SharedChecker(key)
+			shared.references += 1
+		try:
+			# Requests for other checkers go on while this one loads
+			with shared.lock:
+				if shared.checker is None:
+					logging.info("CheckerRegistry: loading {} from {}".format(pipename, specpath))
+					verbose = True
+					spec = self.__libdivvun.ArCheckerSpec(specpath)
+					shared.checker = spec.getChecker(pipename, verbose)
+		except Exception:
+			self.__release(shared)
+			raise
+		with self.__lock:
+			viewKey = (key, booleanOptions, integerOptions)
+			view = self.__viewIds.get(viewKey)
+			if view is None:
+				view = self.__viewIds[viewKey] = self.__nextView
+				self.__nextView = (self.__nextView + 1) & 0xffffffff
+				self.__views[view] = CheckerView(shared, booleanOptions, integerOptions)
+				self.__viewReferences[view] = 0
+			self.__viewReferences[view] += 1
+			return view
+
+	def close(self, view):  # type: (int) -> None
+		"""Closes a view that was opened, and unloads its checker if it has no other views"""
+		with self.__lock:
+			checkerView = self.__views.get(view)
+			if checkerView is None:
+				raise UnknownView("unknown view {}".format(view))
+			self.__viewReferences[view] -= 1
+			if self.__viewReferences[view] == 0:
+				shared, booleanOptions, integerOptions = checkerView
+				del self.__viewIds[(shared.key, booleanOptions, integerOptions)]
+				del self.__views[view]
+				del self.__viewReferences[view]
+		self.__release(checkerView.shared)
+
+	def __release(self, shared):  # type: (SharedChecker) -> None
+		"""Drops a reference to a checker, and unloads it after the last one"""
+		with self.__lock:
+			shared.references -= 1
+			if shared.references > 0:
+				return
+			del self.__checkers[shared.key]
+		# A view that was looked up before it was closed may still run
+		with shared.lock:
+			logging.info("CheckerRegistry: unloading {} from {}".format(shared.key[1], shared.key[0]))
+			shared.checker = None
+
+	def run(self, view, function):  # type: (int, Callable[[Any], Any]) -> Any
+		"""Returns function(checker) with the options of the view set"""
+		with self.__lock:
+			checkerView = self.__views.get(view)
+			if checkerView is None:
+				raise UnknownView("unknown view {}".format(view))
+			shared, booleanOptions, integerOptions = checkerView
+		with shared.lock:
+			if shared.checker is None:
+				# The view was closed and its checker unloaded meanwhile
+				raise UnknownView("unknown view {}".format(view))
+			for option, value in booleanOptions:
+				if shared.booleanOptions.get(option) != value:
+					shared.checker.setBooleanOption(option, value)
+					shared.booleanOptions[option] = value
+			for option, value in integerOptions:
+				if shared.integerOptions.get(option) != value:
+					shared.checker.setIntegerOption(option, value)
+					shared.integerOptions[option] = value
+			return function(shared.checker)
+
+	def getLoadedCheckers(self):  # type: () -> List[Tuple[str, str]]
+		with self.__lock:
+			return [key for key, shared in self.__checkers.items() if shared.checker is not None]
+
+class CheckerServer:
+	"""Answers the requests of one client: a RemoteChecker, or a connection to the daemon"""
+
+	def __init__(self, libdivvun, registry):  # type: (Any, CheckerRegistry) -> None
+		self.__libdivvun = libdivvun
+		self.__registry = registry
+		self.__operations = {
+			OP_OPEN: self.__open,
+			OP_CHECK: self.__check,
+			OP_SPELL: self.__spell,
+			OP_SUGGEST: self.__suggest,
+			OP_HYPHENATE: self.__hyphenate,
+			OP_TOGGLE_IDS: self.__toggleIds,
+			OP_BATCH: self.__batch,
+			OP_CLOSE: self.__close,
+		}
+
+	def __open(self, request):  # type: (Unpacker) -> bytes
+		specpath = request.string()
+		pipename = request.string()
+		booleanOptions, integerOptions = request.options()
+		return UINT.pack(self.__registry.open(specpath, pipename, booleanOptions, integerOptions))
+
+	def __close(self, request):  # type: (Unpacker) -> bytes
+		self.__registry.close(request.uint())
+		return b""
+
+	def __check(self, request):  # type: (Unpacker) -> bytes
+		view = request.uint()
+		text = request.string()
+		errors = self.__registry.run(
+			view, lambda checker: list(self.__libdivvun.proc_errs_bytes(checker, text)))
+		return UINT.pack(len(errors)) + b"".join(
+			packString(e.form) + INT.pack(e.beg) + INT.pack(e.end) + packString(e.err) +
+			packString(e.dsc) + packStrings(list(e.rep)) for e in errors)
+
+	def __spell(self, request):  # type: (Unpacker) -> bytes
+		view = request.uint()
+		word = request.string()
+		return BYTE.pack(bool(self.__registry.run(view, lambda checker: checker.spell(word))))
+
+	def __suggest(self, request):  # type: (Unpacker) -> bytes
+		view = request.uint()
+		word = request.string()
+		return packStrings(self.__registry.run(view, lambda checker: list(checker.suggest(word))))
+
+	def __hyphenate(self, request):  # type: (Unpacker) -> bytes
+		view = request.uint()
+		word = request.string()
+		pattern = self.__registry.run(view, lambda checker: checker.getHyphenationPattern(word))
+		if pattern is None:
+			return BYTE.pack(0)
+		return BYTE.pack(1) + packString(pattern)
+
+	def __toggleIds(self, request):  # type: (Unpacker) -> bytes
+		view = request.uint()
+		prefs = self.__registry.run(
+			view, lambda checker: self.__libdivvun.prefs_bytes(checker).asdict())
+		reply = [UINT.pack(len(prefs))]
+		for language, pref in prefs.items():
+			toggleIds = pref.toggleIds.asdict()
+			reply.append(packString(language) + UINT.pack(len(toggleIds)))
+			for err, (msg, dsc) in toggleIds.items():
+				reply.append(packString(err) + packString(msg) + packString(dsc))
+		return b"".join(reply)
+
+	def __batch(self, request):  # type: (Unpacker) -> bytes
+		"""Answers several requests in one frame: count, then (operation, payload)
+		of each. The reply has (status, payload) of each."""
+		count = request.uint()
+		reply = [UINT.pack(count)]
+		for _ in range(count):
+			op = request.byte()
+			payload = request.bytes()
+			if op == OP_BATCH:
+				status, data = STATUS_ERROR, packString("nested batch")
+			else:
+				status, data = self.handle(op, payload)
+			reply.append(BYTE.pack(status) + packBytes(data))
+		return b"".join(reply)
+
+	def handle(self, op, payload):  # type: (int, bytes) -> Tuple[int, bytes]
+		"""Returns the status and the payload of the reply"""
+		try:
+			operation = self.__operations.get(op)
+			if operation is None:
+				raise ValueError("unknown operation {}".format(op))
+			return STATUS_OK, operation(Unpacker(payload))
+		except UnknownView as e:
+			return STATUS_UNKNOWN_VIEW, packString(str(e))
+		except Exception as e:
+			logging.exception("CheckerServer: operation {} failed".format(op))
+			return STATUS_ERROR, packString(str(e) or type(e).__name__)
+
+def serve(server, requests, replies):  # type: (CheckerServer, BinaryIO, BinaryIO) -> None
+	"""Answers the requests on a stream until it ends"""
+	while True:
+		header = readExactly(requests, HEADER.size)
+		if header is None:
+			return
+		length, requestId, op = HEADER.unpack(header)
+		payload = readExactly(requests, length)
+		if payload is None:
+			return
+		status, reply = server.handle(op, payload)
+		replies.write(HEADER.pack(len(reply), requestId, status) + reply)
+		replies.flush()
+
+def workerMain():  # type: () -> int
+	# Native code may print to standard output, which is ours
+	output = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+	os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+	logging.basicConfig(format="%(asctime)s %(levelname)-8s [worker %(process)d] %(message)s",
+			    level=logging.DEBUG if "DIVVUN_DEBUG" in os.environ else logging.WARNING)
+	loadBundledLibraries()
+	# Imported only now, after its C libraries are loaded
+	import libdivvun
+	serve(CheckerServer(libdivvun, CheckerRegistry(libdivvun)), sys.stdin.buffer, output)
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(workerMain())
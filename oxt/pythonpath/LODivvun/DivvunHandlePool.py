@@ -9,19 +9,63 @@
 # the GNU General Public License Version 3 or later (the "GPL"), in which
 # case the provisions of the GPL are applicable instead of those above.
 
+import hashlib
+import json
 import logging
 import os
 import platform
-from collections import defaultdict
-from threading import RLock
-from com.sun.star.lang import Locale  # type:ignore
+import time
+from collections import defaultdict, namedtuple
+from threading import Condition, Event, RLock, Thread, get_ident
+try:
+	from com.sun.star.lang import Locale  # type:ignore
+except ImportError:
+	# Running without LibreOffice, e.g. in BatchProofreader
+	Locale = namedtuple("Locale", ["Language", "Country", "Variant"])
 
 try:
-	from typing import Set, List, Tuple, Dict, Any     # flake8: noqa
+	from typing import Set, List, Sequence, Tuple, Dict, Any, Optional     # flake8: noqa
 except ImportError:
 	pass
 
 import libdivvun
+from LODivvun import UserCache
+from LODivvun.CapabilityIndex import (SERVICE_PIPE_SUFFIXES, CapabilityIndex, archiveStamp,
+				      findServicePipe, hasService)
+from LODivvun.CheckerEngine import (GRAMMAR_SERVICE, HYPHENATION_OPTIONS, HYPHENATION_SERVICE,
+				    SPELLING_SERVICE, LocaleIndex, serviceTag)
+from LODivvun.CheckerDaemon import DaemonChecker, DaemonClient
+from LODivvun.CheckerWarmUp import RecentLanguages
+from LODivvun.CheckerWorkers import RemoteChecker, WorkerError, WorkerSettings, defaultPython
+from LODivvun.HyphenationStore import HyphenationStore, storeName
+from LODivvun.LanguageCatalogue import LanguageCatalogue
+from LODivvun.LruCache import LruCache
+from LODivvun.ParagraphStore import (DEFAULT_MAX_PARAGRAPHS, PARAGRAPH_STORE_NAME, ParagraphStore,
+				     sqliteAvailable)
+from LODivvun.ParagraphTracker import ParagraphTracker
+
+# Number of paragraphs whose grammar checking results are kept in memory
+PARAGRAPH_CACHE_SIZE = 256
+
+# Number of spelling verdicts kept in memory per language
+SPELL_CACHE_SIZE = 20000
+
+# Number of words whose spelling suggestions are kept in memory per language
+SUGGESTION_CACHE_SIZE = 2000
+
+# Number of hyphenation patterns kept in memory per language
+HYPHENATION_CACHE_SIZE = 10000
+
+# Checker instances loaded per language unless configured otherwise. Each
+# one holds the whole language model in memory.
+DEFAULT_MAX_HANDLES_PER_LANGUAGE = 1
+
+# Estimated memory use of a loaded checker instance relative to the size
+# of its archive, used for the memory budget
+MEMORY_PER_ARCHIVE_BYTE = 3
+
+# Longest time in seconds between two checks for idle checker instances
+MAX_EVICTION_INTERVAL = 60
 
 class Bcp47ToLoMapping:
 
@@ -329,24 +373,102 @@ BCP_ADVERTISE_WITHOUT_COUNTRY = [
 	"tau"
 ]
 
+# Checker options, either the ones every instance should have or the ones
+# set on an instance. Snapshots are replaced, never changed, so they can
+# be read without the pool lock.
+OptionSnapshot = namedtuple("OptionSnapshot", ["booleanOptions", "integerOptions"])
+
+def withOptions(snapshot, booleanOptions, integerOptions):
+	# type: (OptionSnapshot, Sequence[Tuple[int, bool]], Sequence[Tuple[int, int]]) -> OptionSnapshot
+	"""Returns snapshot with the given (option, value) pairs changed"""
+	if len(booleanOptions) == 0 and len(integerOptions) == 0:
+		return snapshot
+	newBooleanOptions = dict(snapshot.booleanOptions)
+	newBooleanOptions.update(booleanOptions)
+	newIntegerOptions = dict(snapshot.integerOptions)
+	newIntegerOptions.update(integerOptions)
+	return OptionSnapshot(newBooleanOptions, newIntegerOptions)
+
+class HandleEntry:
+	"""Bookkeeping for one loaded checker instance"""
+
+	def __init__(self, handle, key, language, variant, service, options):
+		self.handle = handle
+		# Instances are shared by all requests for the same language,
+		# variant and service. Services without a pipe of their own
+		# share the grammar checking instances.
+		self.key = key
+		self.language = language
+		self.variant = variant
+		self.service = service
+		# Key of the grammar checking instances of the language and variant
+		self.identity = key.split("/")[0]
+		# Thread that has checked out the handle, None while it is idle
+		self.owner = None
+		# Options the instance has, only changed by the thread that has
+		# checked it out
+		self.options = options  # type: OptionSnapshot
+		# time.monotonic() when the instance was last checked out or released
+		self.lastUsed = time.monotonic()
+		# Estimated memory use in bytes
+		self.size = 0
+		self.retired = False
+
 class DivvunHandlePool:
 	instance = None
+	# Protects the pool bookkeeping only. Checker instances are checked out
+	# to one thread at a time, so different languages and several
+	# instances of the same language can be used in parallel.
 	mutex = RLock()
+	handleAvailable = Condition(mutex)
 
 	def __init__(self):
-		self.__supportedSpellingLocales = []         # type: List[Locale]
-		self.__supportedHyphenationLocales = []      # type: List[Locale]
-		self.__supportedGrammarCheckingLocales = []  # type: List[Locale]
+		self.__spellingLocaleIndex = None         # type: Optional[LocaleIndex]
+		self.__hyphenationLocaleIndex = None      # type: Optional[LocaleIndex]
+		self.__grammarCheckingLocaleIndex = None  # type: Optional[LocaleIndex]
 		self.__installationPath = None
-		self.__handles = {}  # type: List[libdivvun.CheckerUniquePtr]
+		self.__handles = defaultdict(list)  # type: Dict[str, List[libdivvun.CheckerUniquePtr]]
+		self.__idleHandles = defaultdict(list)  # type: Dict[str, List[libdivvun.CheckerUniquePtr]]
+		self.__openingHandles = defaultdict(int)  # type: Dict[str, int]
+		self.__handleEntries = {}  # type: Dict[int, HandleEntry]
+		self.__maxHandlesPerLanguage = DEFAULT_MAX_HANDLES_PER_LANGUAGE
+		self.__generation = 0
 		self.__initializationErrors = {}  # type: Dict[str, str]
-		self.__globalBooleanOptions = {}  # type: Dict[str, bool]
-		self.__globalIntegerOptions = {}  # type: Dict[str, int]
+		self.__globalOptions = OptionSnapshot({}, {})
 		self.__preferredGlobalVariant = None
 		self.__bcpToOOoMap = defaultdict(list)  # type: Dict[str, List[Bcp47ToLoMapping]]
 		for m in BCP_TO_LO_MAPPING:
 			self.__bcpToOOoMap[m.bcpTag].append(m)
 		self.__bcpAdvertiseWithoutCountry = set(BCP_ADVERTISE_WITHOUT_COUNTRY)
+		self.__paragraphCache = LruCache(PARAGRAPH_CACHE_SIZE)
+		self.__paragraphTracker = ParagraphTracker()
+		self.__spellCaches = {}  # type: Dict[str, LruCache]
+		self.__suggestionCaches = {}  # type: Dict[str, LruCache]
+		self.__hyphenationCaches = {}  # type: Dict[str, LruCache]
+		self.__hyphenationStores = {}  # type: Dict[str, Optional[HyphenationStore]]
+		self.__hyphenationStoreEnabled = False
+		self.__paragraphStore = None  # type: Optional[ParagraphStore]
+		self.__paragraphStoreEnabled = False
+		self.__maxStoredParagraphs = DEFAULT_MAX_PARAGRAPHS
+		self.__fingerprints = {}  # type: Dict[str, Optional[str]]
+		# Checkers run in worker processes if set, see CheckerWorkers
+		self.__workerSettings = None  # type: Optional[WorkerSettings]
+		# Checkers are loaded by a shared daemon if set, see CheckerDaemon
+		self.__daemonClient = None  # type: Optional[DaemonClient]
+		self.__languageCatalogue = LanguageCatalogue()
+		self.__specPaths = {}  # type: Dict[str, str]
+		self.__servicePipes = {}  # type: Dict[str, Dict[str, str]]
+		self.__capabilityIndex = CapabilityIndex()
+		# Eviction limits, 0 means no limit
+		self.__idleTimeout = 0
+		self.__maxLoadedLanguages = 0
+		self.__memoryBudget = 0
+		# Runs while there is an idle timeout and something to unload
+		self.__evictionThread = None  # type: Optional[Thread]
+		# Set when the eviction policy changed
+		self.__evictionWakeUp = Event()
+		self.__recentLanguages = RecentLanguages()
+		self.__usedLanguages = set()  # type: Set[str]
 
 	@classmethod
 	def getInstance(cls):
@@ -360,84 +482,671 @@ class DivvunHandlePool:
 	def getDictionaryPath(self):
 		return os.path.join(self.getInstallationPath(), "divvun")
 
-	def __openHandleWithVariant(self, language, fullVariant):
+	def __findSpec(self, language, fullVariant):
+		"""Returns the spec path, its pipes and the grammar checking pipe of fullVariant"""
+		extraPath = self.getDictionaryPath()
+		allLangs = self.__languageCatalogue.getLanguages(extraPath)
+		tag = fullVariant if fullVariant in allLangs else language
+		if tag in allLangs and not os.path.exists(allLangs[tag][0]):
+			# The archive was removed since the catalogue was written
+			allLangs = self.__languageCatalogue.getLanguages(extraPath, refresh=True)
+			tag = fullVariant if fullVariant in allLangs else language
+		if not tag in allLangs:
+			msg = "Couldn't find data for language {}".format(language)
+			logging.info(msg)
+			raise Exception(msg)
+		# We assume the first matching spec for a language is the preferred (e.g. from user dir)
+		specpath = allLangs[tag][0]
+		capabilities = self.__capabilityIndex.getCapabilities(specpath)
+		# TODO: Use preferences
+		pipename = capabilities.defaultPipe
+		if tag != fullVariant:
+			# No archive of its own, the variant may be a pipe in the archive of the language
+			pipename = fullVariant[len(language) + len("-x-"):]
+			if not pipename in capabilities.pipes:
+				raise Exception("Couldn't find variant {} of language {}".format(pipename, language))
+		return specpath, capabilities, pipename
+
+	def __getServicePipes(self, language, variant):  # type: (str, str) -> Dict[str, str]
+		"""Returns the pipes of the services that don't use the grammar checking pipe"""
+		identity = self.__getKey(language, variant)
+		with DivvunHandlePool.mutex:
+			pipes = self.__servicePipes.get(identity)
+		if pipes is not None:
+			return pipes
+		pipes = {}
+		for fullVariant in ([identity] if variant else []) + [language]:
+			try:
+				specpath, capabilities, grammarPipe = self.__findSpec(language, fullVariant)
+			except Exception:
+				continue
+			for service in SERVICE_PIPE_SUFFIXES:
+				pipename = findServicePipe(capabilities.pipes, grammarPipe, language, service)
+				if pipename is not None:
+					pipes[service] = pipename
+			break
+		with DivvunHandlePool.mutex:
+			self.__servicePipes[identity] = pipes
+		return pipes
+
+	def __openHandleWithVariant(self, key, language, fullVariant, service):
 		logging.debug("DivvunHandlePool.__openHandleWithVariant")
+		specpath, capabilities, pipename = self.__findSpec(language, fullVariant)
+		if service != GRAMMAR_SERVICE:
+			pipename = findServicePipe(capabilities.pipes, pipename, language, service) or pipename
+		logging.info("Loading language {} with pipe {} of spec from {}".format(
+			fullVariant, pipename, specpath))
+		with DivvunHandlePool.mutex:
+			self.__specPaths[key] = specpath
+		daemonClient = self.__daemonClient
+		if daemonClient is not None:
+			divvunHandle = DaemonChecker(daemonClient, specpath, pipename)
+			try:
+				divvunHandle.start()
+				return divvunHandle
+			except WorkerError as e:
+				logging.warning("DivvunHandlePool: the checker daemon at {} can't load {}, "
+						"loading it here: {}".format(daemonClient.getAddress(), pipename, e))
+		workerSettings = self.__workerSettings
+		if workerSettings is not None:
+			divvunHandle = RemoteChecker(specpath, pipename, workerSettings)
+			try:
+				divvunHandle.start()
+			except Exception:
+				# Don't leave the worker process behind
+				divvunHandle.terminate()
+				raise
+			return divvunHandle
+		# TODO: Any reason to support non-archive specs here?
+		spec = libdivvun.ArCheckerSpec(specpath)
+		verbose = True
+		divvunHandle = spec.getChecker(pipename, verbose)
+		# Options are set when the instance is checked out, see __applyOptions
+		return divvunHandle;
+
+	def __openHandle(self, key, language, variant, service):
 		try:
-			extraPath = self.getDictionaryPath()
-			logging.info("Listing langs including getDictionaryPath={}".format(extraPath))
-			allLangs = libdivvun.listLangs(extraPath)
-			logging.info("Found {} languages: {}".format(len(allLangs), allLangs.keys()))
-			if not language in allLangs:
-				msg = "Couldn't find data for language {}".format(language)
-				logging.info(msg)
-				raise Exception(msg)
-			# We assume the first matching spec for a language is the preferred (e.g. from user dir)
-			logging.info("len: {}".format(len(allLangs[language])))
-			specpath = allLangs[language][0]
-			logging.info("specpath="+specpath)
-			logging.info("Loading language {} with spec from {}".format(language, specpath))
-			# TODO: Any reason to support non-archive specs here?
-			spec = libdivvun.ArCheckerSpec(specpath)
-			# TODO: Use preferences
-			pipename = spec.defaultPipe()
-			verbose = True
-			divvunHandle = spec.getChecker(pipename, verbose)
-			self.__handles[language] = divvunHandle
-			for booleanOpt, booleanValue in self.__globalBooleanOptions.items():
-				pass
-				# divvunHandle.setBooleanOption(booleanOpt, booleanValue)
-			for integerOpt, integerValue in self.__globalIntegerOptions.items():
-				# divvunHandle.setIntegerOption(integerOpt, integerValue)
-				pass
-			return divvunHandle;
+			if variant:
+				fullVariant = self.__getKey(language, variant)
+				try:
+					return self.__openHandleWithVariant(key, language, fullVariant, service)
+				except Exception:
+					logging.info("Could not open {}, falling back to {}".format(fullVariant, language))
+			return self.__openHandleWithVariant(key, language, language, service)
 		except Exception as e:
-			errstr = "\t".join(e.args)
-			self.__initializationErrors[language] = errstr
-			logging.error("__openHandleWithVariant got an exception: {}".format(errstr))
+			errstr = "\t".join(str(a) for a in e.args)
+			# Waiting threads give up when they see the error
+			with DivvunHandlePool.mutex:
+				self.__initializationErrors[key] = errstr
+			logging.error("__openHandle got an exception: {}".format(errstr))
 			return None
 
-	def __openHandle(self, language):
-		if self.__preferredGlobalVariant is not None:
-			languageWithVariant = language + "-x-" + self.__preferredGlobalVariant
-			handle = self.__openHandleWithVariant(language, languageWithVariant)
-			if handle is not None:
-				return handle
-		return self.__openHandleWithVariant(language, language)
-
 	def getOpenHandles(self):
-		return self.__handles
+		"""Returns one loaded grammar checker instance of each language, for the preferred variant"""
+		with DivvunHandlePool.mutex:
+			handles = {}
+			for entry in self.__handleEntries.values():
+				if not entry.retired and entry.variant == self.__getVariant() and \
+				   entry.service == GRAMMAR_SERVICE:
+					handles.setdefault(entry.language, entry.handle)
+			return handles
+
+	def getRecentLanguages(self):  # type: () -> List[str]
+		"""Returns the service tags of the languages used most recently, also in
+		earlier sessions, the latest first"""
+		return self.__recentLanguages.getLanguages()
+
+	def getCheckerIdentity(self, locale):
+		"""Returns a key shared by all the checker instances that serve locale with the
+		preferred variant"""
+		return self.__getKey(self.__getLanguage(locale), self.__getVariant())
+
+	def __getVariant(self):
+		return self.__preferredGlobalVariant or ""
 
-	def getHandle(self, locale):
-		language = None
+	def __getKey(self, language, variant):
+		if variant == "":
+			return language
+		return language + "-x-" + variant
+
+	def __getServiceKey(self, language, variant, service):
+		identity = self.__getKey(language, variant)
+		if service == GRAMMAR_SERVICE or service not in self.__getServicePipes(language, variant):
+			return identity
+		return identity + "/" + service
+
+	def __getLanguage(self, locale):
 		if locale.Language == "qlt":
-			language = locale.Variant
+			return locale.Variant
 		else:
-			language = locale.Language
-		if language in self.__handles:
-			return self.__handles[language]
-		if language in self.__initializationErrors:
+			return locale.Language
+
+	def getMaxHandlesPerLanguage(self):  # type: () -> int
+		return self.__maxHandlesPerLanguage
+
+	def setMaxHandlesPerLanguage(self, maxHandles):
+		with DivvunHandlePool.mutex:
+			self.__maxHandlesPerLanguage = max(1, maxHandles)
+			DivvunHandlePool.handleAvailable.notify_all()
+
+	def acquireHandle(self, locale, booleanOverrides=(), integerOverrides=(), service=GRAMMAR_SERVICE):
+		"""Checks out a checker instance for locale to the calling thread, or returns None.
+
+		Spelling and hyphenation use lighter pipes than grammar checking
+		when the language archive has them, so the grammar checker is
+		only loaded when grammar checking is requested.
+
+		An idle instance is reused if there is one. Otherwise a new one is
+		opened unless the language already has the maximum number of
+		instances, in which case we wait for one to be released. Every
+		handle returned from here must be given back with releaseHandle.
+
+		The overrides are (option, value) pairs that differ from the
+		global options. They apply to this checkout only: the next one
+		sets the options it needs, see __applyOptions.
+		"""
+		language = self.__getLanguage(locale)
+		handle = self.__acquireLanguageHandle(language, service, booleanOverrides, integerOverrides)
+		tag = serviceTag(language, service)
+		if handle is not None and tag not in self.__usedLanguages:
+			# Only the first use in a session is recorded, preloading isn't
+			self.__usedLanguages.add(tag)
+			self.__recentLanguages.add(tag)
+		return handle
+
+	def preloadLanguage(self, language, service=GRAMMAR_SERVICE):  # type: (str, str) -> bool
+		"""Loads a checker instance for language and service unless one is loaded already.
+
+		Returns False if the language couldn't be loaded.
+		"""
+		key = self.__getServiceKey(language, self.__getVariant(), service)
+		with DivvunHandlePool.mutex:
+			if len(self.__handles[key]) + self.__openingHandles[key] > 0:
+				return True
+		handle = self.__acquireLanguageHandle(language, service, (), ())
+		if handle is None:
+			return False
+		self.releaseHandle(handle)
+		return True
+
+	def __acquireLanguageHandle(self, language, service, booleanOverrides, integerOverrides):
+		variant = self.__getVariant()
+		key = self.__getServiceKey(language, variant, service)
+		if key == self.__getKey(language, variant):
+			service = GRAMMAR_SERVICE
+		while True:
+			with DivvunHandlePool.handleAvailable:
+				generation = self.__generation
+				entry = self.__checkOutIdle(key)
+				while entry is None:
+					if key in self.__initializationErrors:
+						return None
+					# While the first instance is loading, e.g. by the
+					# warm-up, wait for it rather than load another one
+					loading = len(self.__handles[key]) == 0 and self.__openingHandles[key] > 0
+					count = len(self.__handles[key]) + self.__openingHandles[key]
+					if not loading and count < self.__maxHandlesPerLanguage:
+						self.__openingHandles[key] += 1
+						break
+					DivvunHandlePool.handleAvailable.wait()
+					generation = self.__generation
+					entry = self.__checkOutIdle(key)
+			if entry is not None:
+				self.__applyOptions(entry, booleanOverrides, integerOverrides)
+				return entry.handle
+
+			# Load outside the pool lock, this may take several seconds.
+			# The new instance has the options of the time it was loaded,
+			# later changes are applied below.
+			options = self.__globalOptions
+			handle = self.__openHandle(key, language, variant, service)
+			with DivvunHandlePool.handleAvailable:
+				self.__openingHandles[key] -= 1
+				DivvunHandlePool.handleAvailable.notify_all()
+				if handle is not None and generation == self.__generation:
+					entry = HandleEntry(handle, key, language, variant, service, options)
+					entry.owner = get_ident()
+					# The daemon's checkers don't use our memory
+					entry.size = self.__estimateSize(key) if not isinstance(handle, DaemonChecker) else 0
+					self.__handleEntries[id(handle)] = entry
+					self.__handles[key].append(handle)
+					self.__startEvictionThread()
+					# Make room for the new instance
+					evicted = self.__chooseEvictions(time.monotonic(), key)
+				elif handle is None:
+					return None
+			if entry is not None:
+				self.__terminate(evicted)
+				self.__applyOptions(entry, booleanOverrides, integerOverrides)
+				return handle
+			# The pool was closed while we were loading, the instance may
+			# have been created with a different variant
+			handle.terminate()
+
+	def tryAcquireHandle(self, locale, service=GRAMMAR_SERVICE):
+		"""Checks out an idle checker instance for locale, or returns None.
+
+		Unlike acquireHandle this never loads an instance or waits for one,
+		so it can be used for speculative work that must not slow down
+		the user. An instance is only checked out if another one stays
+		idle for the requests of the user. The handle must be given back
+		with releaseHandle.
+		"""
+		language = self.__getLanguage(locale)
+		variant = self.__getVariant()
+		identity = self.__getKey(language, variant)
+		with DivvunHandlePool.mutex:
+			pipes = self.__servicePipes.get(identity)
+			if service != GRAMMAR_SERVICE and pipes is None:
+				# Finding the pipes would open the archive
+				return None
+			if service != GRAMMAR_SERVICE and service in pipes:
+				identity = identity + "/" + service
+			if len(self.__idleHandles[identity]) < 2:
+				return None
+			entry = self.__checkOutIdle(identity)
+		self.__applyOptions(entry, (), ())
+		return entry.handle
+
+	def __checkOutIdle(self, key):
+		"""Call with mutex held"""
+		idle = self.__idleHandles[key]
+		if len(idle) == 0:
 			return None
-		return self.__openHandle(language)
+		entry = self.__handleEntries[id(idle.pop())]
+		entry.owner = get_ident()
+		entry.lastUsed = time.monotonic()
+		return entry
+
+	def releaseHandle(self, handle):
+		# Options stay as they are, the next checkout only changes the
+		# ones it needs to
+		with DivvunHandlePool.handleAvailable:
+			entry = self.__handleEntries[id(handle)]
+			entry.owner = None
+			entry.lastUsed = time.monotonic()
+			terminate = entry.retired or len(self.__handles[entry.key]) > self.__maxHandlesPerLanguage
+			if terminate:
+				self.__removeEntry(entry)
+				evicted = [handle]
+			else:
+				self.__idleHandles[entry.key].append(handle)
+				# Languages that were in use when another one was loaded
+				# may be over the limits now
+				evicted = self.__chooseEvictions(entry.lastUsed, None)
+			DivvunHandlePool.handleAvailable.notify_all()
+		self.__terminate(evicted)
+
+	def __removeEntry(self, entry):
+		"""Call with mutex held"""
+		del self.__handleEntries[id(entry.handle)]
+		if not entry.retired:
+			self.__handles[entry.key].remove(entry.handle)
+			if entry.handle in self.__idleHandles[entry.key]:
+				self.__idleHandles[entry.key].remove(entry.handle)
+
+	def setOutOfProcess(self, enabled, timeout, python):  # type: (bool, int, Optional[str]) -> None
+		"""Runs the checkers in worker processes if enabled, see CheckerWorkers.
+
+		timeout is the number of seconds a request may take, 0 for no
+		limit. python is the interpreter for the workers, the default
+		is used if it is empty. Loaded instances are closed when the mode
+		changes, and opened again in the new mode when they are needed.
+		"""
+		settings = WorkerSettings(python or defaultPython(), max(0, timeout)) if enabled else None
+		with DivvunHandlePool.mutex:
+			if settings == self.__workerSettings:
+				return
+			self.__workerSettings = settings
+		logging.info("DivvunHandlePool: worker processes {}".format(settings))
+		self.closeAllHandles()
+
+	def setDaemon(self, address, connections, timeout):  # type: (str, int, int) -> None
+		"""Lets a checker daemon load the checkers if address is set, see CheckerDaemon.
+
+		address is the path of its Unix socket. Up to
+		connections requests are sent at once, the others wait and are
+		sent together. timeout is the number of seconds a request may
+		take, 0 for no limit. Checkers the daemon can't load are loaded
+		here, as without a daemon. Loaded instances are closed when the
+		settings change.
+		"""
+		with DivvunHandlePool.mutex:
+			client = self.__daemonClient
+			if client is None and not address:
+				return
+			if (client is not None and client.getAddress() == address and
+			    (client.getMaxConnections(), client.getTimeout()) == (max(1, connections), max(0, timeout))):
+				return
+			self.__daemonClient = DaemonClient(address, connections, max(0, timeout)) if address else None
+		logging.info("DivvunHandlePool: checker daemon {}".format(address or "disabled"))
+		self.closeAllHandles()
+		if client is not None:
+			client.close()
+
+	def setEvictionPolicy(self, idleTimeout, maxLoadedLanguages, memoryBudget):
+		"""Sets when idle checker instances are unloaded, 0 disables a limit.
+
+		idleTimeout is in seconds, memoryBudget is the estimated total
+		memory use of all loaded instances in megabytes. When there are
+		more than maxLoadedLanguages languages loaded, the least recently
+		used ones are unloaded first. Unloaded languages are loaded again
+		when they are needed.
+		"""
+		with DivvunHandlePool.mutex:
+			self.__idleTimeout = max(0, idleTimeout)
+			self.__maxLoadedLanguages = max(0, maxLoadedLanguages)
+			self.__memoryBudget = max(0, memoryBudget) * 1024 * 1024
+			# A running thread picks up the new timeout, or exits
+			self.__evictionWakeUp.set()
+			self.__startEvictionThread()
+		self.evictHandles()
+
+	def __startEvictionThread(self):
+		"""Call with mutex held"""
+		if self.__idleTimeout > 0 and self.__evictionThread is None and len(self.__handleEntries) > 0:
+			self.__evictionThread = Thread(target=self.__evictPeriodically, name="DivvunHandleEviction")
+			self.__evictionThread.daemon = True
+			self.__evictionThread.start()
+
+	def evictHandles(self):
+		"""Unloads the idle checker instances that are over the limits of the eviction policy"""
+		with DivvunHandlePool.mutex:
+			evicted = self.__chooseEvictions(time.monotonic(), None)
+		self.__terminate(evicted)
+
+	def __evictPeriodically(self):
+		while True:
+			with DivvunHandlePool.mutex:
+				if self.__idleTimeout == 0 or len(self.__handleEntries) == 0:
+					# Started again when it is needed
+					self.__evictionThread = None
+					return
+				self.__evictionWakeUp.clear()
+				interval = min(max(self.__idleTimeout / 2, 1), MAX_EVICTION_INTERVAL)
+			self.__evictionWakeUp.wait(interval)
+			try:
+				self.evictHandles()
+			except Exception:
+				logging.exception("DivvunHandlePool: eviction failed")
+
+	def __estimateSize(self, key):  # type: (str) -> int
+		"""Call with mutex held"""
+		try:
+			return os.path.getsize(self.__specPaths[key]) * MEMORY_PER_ARCHIVE_BYTE
+		except (KeyError, OSError):
+			return 0
+
+	def __chooseEvictions(self, now, keepKey):  # type: (float, Optional[str]) -> List[Any]
+		"""Call with mutex held. Removes the entries to evict from the pool and returns their handles.
+
+		Only idle instances are evicted, and never those of keepKey,
+		the instances that are being loaded. Each variant of a language
+		counts as a language of its own, the instances for the different
+		services of a language count as one language.
+		"""
+		entries = [entry for entry in self.__handleEntries.values() if not entry.retired]
+		idle = [entry for entry in entries if entry.owner is None and entry.key != keepKey]
+		evicted = []  # type: List[HandleEntry]
+		if self.__idleTimeout > 0:
+			evicted.extend(entry for entry in idle if now - entry.lastUsed >= self.__idleTimeout)
+		if self.__maxLoadedLanguages > 0:
+			lastUsed = {}  # type: Dict[str, float]
+			busy = set()
+			for entry in entries:
+				if entry in evicted:
+					continue
+				lastUsed[entry.identity] = max(lastUsed.get(entry.identity, 0.0), entry.lastUsed)
+				if entry.owner is not None or entry.key == keepKey:
+					busy.add(entry.identity)
+			candidates = sorted((used, identity) for identity, used in lastUsed.items()
+					    if identity not in busy)
+			for used, identity in candidates[:max(0, len(lastUsed) - self.__maxLoadedLanguages)]:
+				evicted.extend(entry for entry in idle if entry.identity == identity and entry not in evicted)
+		if self.__memoryBudget > 0:
+			total = sum(entry.size for entry in entries if entry not in evicted)
+			for entry in sorted(idle, key=lambda entry: entry.lastUsed):
+				if total <= self.__memoryBudget:
+					break
+				if entry not in evicted:
+					evicted.append(entry)
+					total = total - entry.size
+		for entry in evicted:
+			logging.info("DivvunHandlePool: unloading an idle instance of {}".format(entry.key))
+			self.__removeEntry(entry)
+		if len(evicted) > 0:
+			DivvunHandlePool.handleAvailable.notify_all()
+		return [entry.handle for entry in evicted]
+
+	def __terminate(self, handles):
+		for handle in handles:
+			handle.terminate()
 
 	def closeAllHandles(self):
-		for key, value in self.__handles.items():
-			value.terminate()
-		self.__handles.clear()
-		self.__initializationErrors.clear()
+		idle = []
+		with DivvunHandlePool.handleAvailable:
+			for entry in list(self.__handleEntries.values()):
+				if entry.retired:
+					continue
+				entry.retired = True
+				if entry.owner is None:
+					# Checked out instances are terminated when released
+					self.__removeEntry(entry)
+					idle.append(entry.handle)
+			self.__handles.clear()
+			self.__idleHandles.clear()
+			self.__initializationErrors.clear()
+			self.__generation += 1
+			self.__clearCaches()
+			# Lets the eviction thread exit if nothing is left to unload
+			self.__evictionWakeUp.set()
+			DivvunHandlePool.handleAvailable.notify_all()
+		for handle in idle:
+			handle.terminate()
+
+	def getParagraphCache(self):
+		"""Returns the cache of parsed grammar errors, keyed by (checker identity, variant, paragraph)"""
+		return self.__paragraphCache
+
+	def getParagraphTracker(self):
+		"""Returns the last checked paragraphs of each document, used for incremental checking"""
+		return self.__paragraphTracker
+
+	def getSpellCache(self, locale):
+		"""Returns the cache of spelling verdicts of the checker that serves locale"""
+		identity = self.getCheckerIdentity(locale)
+		cache = self.__spellCaches.get(identity)
+		if cache is not None:
+			return cache
+		with DivvunHandlePool.mutex:
+			return self.__spellCaches.setdefault(identity, LruCache(SPELL_CACHE_SIZE))
+
+	def getSuggestionCache(self, locale):
+		"""Returns the cache of spelling suggestions of the checker that serves locale"""
+		identity = self.getCheckerIdentity(locale)
+		cache = self.__suggestionCaches.get(identity)
+		if cache is not None:
+			return cache
+		with DivvunHandlePool.mutex:
+			return self.__suggestionCaches.setdefault(identity, LruCache(SUGGESTION_CACHE_SIZE))
+
+	def getHyphenationCache(self, locale):
+		"""Returns the cache of hyphenation patterns of the checker that serves locale"""
+		identity = self.getCheckerIdentity(locale)
+		cache = self.__hyphenationCaches.get(identity)
+		if cache is not None:
+			return cache
+		with DivvunHandlePool.mutex:
+			return self.__hyphenationCaches.setdefault(identity, LruCache(HYPHENATION_CACHE_SIZE))
+
+	def getParagraphStore(self):  # type: () -> Optional[ParagraphStore]
+		"""Returns the store of paragraph errors from earlier sessions, or None if it is disabled"""
+		with DivvunHandlePool.mutex:
+			if self.__paragraphStore is None and self.__paragraphStoreEnabled:
+				if not sqliteAvailable():
+					logging.info("DivvunHandlePool: sqlite3 is not available, paragraphs are not stored")
+					self.__paragraphStoreEnabled = False
+					return None
+				try:
+					self.__paragraphStore = ParagraphStore(UserCache.getCachePath(PARAGRAPH_STORE_NAME),
+									       self.__maxStoredParagraphs)
+				except Exception as e:
+					logging.warning("DivvunHandlePool: could not open the paragraph store: {}".format(e))
+					self.__paragraphStoreEnabled = False
+			return self.__paragraphStore
+
+	def setParagraphStoreSettings(self, enabled, maxParagraphs):  # type: (bool, int) -> None
+		with DivvunHandlePool.mutex:
+			self.__maxStoredParagraphs = maxParagraphs
+			if self.__paragraphStore is not None:
+				self.__paragraphStore.setMaxParagraphs(maxParagraphs)
+			if enabled == self.__paragraphStoreEnabled:
+				return
+			self.__paragraphStoreEnabled = enabled
+			store = self.__paragraphStore
+			self.__paragraphStore = None
+		if store is not None:
+			store.close()
+
+	def getCheckerFingerprint(self, locale):  # type: (Any) -> Optional[str]
+		"""Returns a string that changes whenever the grammar checker that serves locale
+		could give other results: another archive or pipe, or other options.
+		Returns None if there is no checker for locale."""
+		identity = self.getCheckerIdentity(locale)
+		with DivvunHandlePool.mutex:
+			if identity in self.__fingerprints:
+				return self.__fingerprints[identity]
+			options = self.__globalOptions
+		fingerprint = None
+		found = self.__findPipe(self.__getLanguage(locale), self.__getVariant(), GRAMMAR_SERVICE)
+		if found is not None:
+			specpath, pipename = found
+			checker = json.dumps([specpath, list(archiveStamp(specpath)), pipename,
+					      sorted(options.booleanOptions.items()), sorted(options.integerOptions.items())])
+			fingerprint = hashlib.sha1(checker.encode("utf-8")).hexdigest()
+		with DivvunHandlePool.mutex:
+			if options is not self.__globalOptions:
+				return None
+			return self.__fingerprints.setdefault(identity, fingerprint)
+
+	def getHyphenationStore(self, locale):
+		"""Returns the on-disk store of hyphenation patterns of the checker that serves locale,
+		or None if there is no such checker or the store is disabled"""
+		if not self.__hyphenationStoreEnabled:
+			return None
+		identity = self.getCheckerIdentity(locale)
+		with DivvunHandlePool.mutex:
+			if identity in self.__hyphenationStores:
+				return self.__hyphenationStores[identity]
+			options = self.__getHyphenationOptions()
+		store = self.__openHyphenationStore(self.__getLanguage(locale), self.__getVariant(), options)
+		with DivvunHandlePool.mutex:
+			if options != self.__getHyphenationOptions():
+				# The options changed while the store was being opened
+				return None
+			return self.__hyphenationStores.setdefault(identity, store)
+
+	def __getHyphenationOptions(self):  # type: () -> List[Tuple[int, Any]]
+		"""Call with mutex held"""
+		options = self.__globalOptions
+		return [(option, options.booleanOptions.get(option, options.integerOptions.get(option)))
+			for option in HYPHENATION_OPTIONS]
+
+	def __findPipe(self, language, variant, service):
+		# type: (str, str, str) -> Optional[Tuple[str, str]]
+		"""Returns the spec path and the pipe that __openHandle would load, or None"""
+		for fullVariant in ([self.__getKey(language, variant)] if variant else []) + [language]:
+			try:
+				specpath, capabilities, pipename = self.__findSpec(language, fullVariant)
+			except Exception:
+				continue
+			if service != GRAMMAR_SERVICE:
+				pipename = findServicePipe(capabilities.pipes, pipename, language, service) or pipename
+			return specpath, pipename
+		return None
+
+	def __openHyphenationStore(self, language, variant, options):
+		# type: (str, str, List[Tuple[int, Any]]) -> Optional[HyphenationStore]
+		found = self.__findPipe(language, variant, HYPHENATION_SERVICE)
+		if found is None:
+			return None
+		specpath, pipename = found
+		name = storeName(specpath, archiveStamp(specpath), pipename, options)
+		return HyphenationStore(UserCache.getCachePath(name))
+
+	def setHyphenationStoreEnabled(self, enabled):  # type: (bool) -> None
+		with DivvunHandlePool.mutex:
+			if enabled == self.__hyphenationStoreEnabled:
+				return
+			self.__hyphenationStoreEnabled = enabled
+			self.__dropHyphenationStores()
+
+	def __dropHyphenationStores(self):
+		"""Call with mutex held"""
+		stores = [store for store in self.__hyphenationStores.values() if store is not None]
+		self.__hyphenationStores.clear()
+		if len(stores) > 0:
+			# Their new patterns are still valid for the options they were computed with
+			thread = Thread(target=self.__closeHyphenationStores, args=(stores,),
+					name="DivvunHyphenationStore")
+			thread.daemon = True
+			thread.start()
+
+	def __closeHyphenationStores(self, stores):  # type: (List[HyphenationStore]) -> None
+		for store in stores:
+			try:
+				store.close()
+			except Exception:
+				logging.exception("DivvunHandlePool: closing a hyphenation store failed")
+
+	def __clearCaches(self):
+		# Results computed by closed handles or with other options are stale
+		self.__paragraphCache.clear()
+		self.__paragraphTracker.clear()
+		for cache in self.__spellCaches.values():
+			cache.clear()
+		for cache in self.__suggestionCaches.values():
+			cache.clear()
+		for cache in self.__hyphenationCaches.values():
+			cache.clear()
+		self.__dropHyphenationStores()
+		self.__fingerprints.clear()
 
 	def setGlobalBooleanOption(self, option, value):
-		if option in self.__globalBooleanOptions and self.__globalBooleanOptions[option] == value:
-			return
-		self.__globalBooleanOptions[option] = value
-		for lang, handle in self.__handles.items():
-			handle.setBooleanOption(option, value)
+		with DivvunHandlePool.mutex:
+			options = self.__globalOptions
+			if option in options.booleanOptions and options.booleanOptions[option] == value:
+				return
+			self.__globalOptions = withOptions(options, ((option, value),), ())
+			self.__clearCaches()
 
 	def setGlobalIntegerOption(self, option, value):
-		if option in self.__globalIntegerOptions and self.__globalIntegerOptions[option] == value:
+		with DivvunHandlePool.mutex:
+			options = self.__globalOptions
+			if option in options.integerOptions and options.integerOptions[option] == value:
+				return
+			self.__globalOptions = withOptions(options, (), ((option, value),))
+			self.__clearCaches()
+
+	def __applyOptions(self, entry, booleanOverrides, integerOverrides):
+		"""Gives the instance the global options with the overrides, call with the
+		handle checked out by the calling thread.
+
+		Only the options that differ from the ones the instance has are
+		set, so requests with the usual options don't change anything,
+		and no lock is needed.
+		"""
+		options = withOptions(self.__globalOptions, booleanOverrides, integerOverrides)
+		current = entry.options
+		if options is current or options == current:
 			return
-		self.__globalIntegerOptions[option] = value
-		for lang, handle in self.__handles.items():
-			handle.setIntegerOption(option, value)
+		for option, value in options.booleanOptions.items():
+			if current.booleanOptions.get(option) != value:
+				entry.handle.setBooleanOption(option, value)
+		for option, value in options.integerOptions.items():
+			if current.integerOptions.get(option) != value:
+				entry.handle.setIntegerOption(option, value)
+		entry.options = options
 
 	def __addLocale(self, locales, language):
 		matchingMappings = self.__bcpToOOoMap[language]
@@ -453,49 +1162,77 @@ class DivvunHandlePool:
 			else:
 				locales.append(Locale("qlt", "", language))
 
-	def __getSupportedLocalesForOperation(self, localeList, localeOperation):
+	def __getLocaleIndexForOperation(self, localeIndex, localeOperation):
 		# optimization: if we already have found some locales, don't search for more
-		if len(localeList) == 0:
+		if localeIndex is None or len(localeIndex) == 0:
 			logging.info("dictionary path %s", self.getDictionaryPath())
+			localeList = []  # type: List[Locale]
 			languages = localeOperation(self.getDictionaryPath())
 			for lang in languages:
 				self.__addLocale(localeList, lang)
-		return tuple(localeList)
+			localeIndex = LocaleIndex(localeList)
+		return localeIndex
+
+	def __listLanguagesWithService(self, service):
+		"""Returns a function that lists the languages whose preferred archive has a pipe for service"""
+		def listLangs(path):
+			languages = []
+			for language, specpaths in self.__languageCatalogue.getLanguages(path).items():
+				try:
+					if hasService(self.__capabilityIndex.getCapabilities(specpaths[0]), language, service):
+						languages.append(language)
+				except Exception as e:
+					logging.warning("Couldn't list the pipes of {}: {}".format(specpaths[0], e))
+			return languages
+		return listLangs
+
+	def __getSpellingLocaleIndex(self):
+		self.__spellingLocaleIndex = self.__getLocaleIndexForOperation(self.__spellingLocaleIndex,
+									       self.__listLanguagesWithService(SPELLING_SERVICE))
+		return self.__spellingLocaleIndex
+
+	def __getHyphenationLocaleIndex(self):
+		self.__hyphenationLocaleIndex = self.__getLocaleIndexForOperation(self.__hyphenationLocaleIndex,
+										  self.__listLanguagesWithService(HYPHENATION_SERVICE))
+		return self.__hyphenationLocaleIndex
+
+	def __getGrammarCheckingLocaleIndex(self):
+		self.__grammarCheckingLocaleIndex = self.__getLocaleIndexForOperation(
+			self.__grammarCheckingLocaleIndex, self.__listLanguagesWithService(GRAMMAR_SERVICE))
+		return self.__grammarCheckingLocaleIndex
 
 	def getSupportedSpellingLocales(self):
-		def listLangs(path):  # TODO: get from libdivvun? Need function to check for pure speller pipelines though.
-			return []
-		res = self.__getSupportedLocalesForOperation(self.__supportedSpellingLocales, listLangs)
+		res = self.__getSpellingLocaleIndex().getLocales()
 		logging.info("supported spelling locales: %s", res)
 		return res
 
 	def getSupportedHyphenationLocales(self):
-		def listLangs(path):  # TODO: get from libdivvun? We don't do plain hyphenation though, might not make sense.
-			return []
-		res = self.__getSupportedLocalesForOperation(self.__supportedHyphenationLocales, listLangs)
+		res = self.__getHyphenationLocaleIndex().getLocales()
 		logging.info("supported hyphenation locales: %s", res)
 		return res
 
 	def getSupportedGrammarLocales(self):
-		res = self.__getSupportedLocalesForOperation(self.__supportedGrammarCheckingLocales, libdivvun.listLangs)
+		res = self.__getGrammarCheckingLocaleIndex().getLocales()
 		logging.info("supported gc locales: %s", res)
 		return res
 
 	def getInitializationStatus(self):
 		"""Returns initialization status diagnostics"""
-		status = "Init OK:["
-		for key, value in self.__handles.items():
-			status = status + key + " "
-		status = status + "] FAILED:["
-		for key, value in self.__initializationErrors.items():
-			status = status + key + ":\"" + value + "\" "
-		status = status + "]"
-		return status
+		with DivvunHandlePool.mutex:
+			status = "Init OK:["
+			for key, value in self.__handles.items():
+				if len(value) > 0:
+					status = status + key + "(" + str(len(value)) + ") "
+			status = status + "] FAILED:["
+			for key, value in self.__initializationErrors.items():
+				status = status + key + ":\"" + value + "\" "
+			status = status + "]"
+			return status
 
 	def setPreferredGlobalVariant(self, variant):
-		if variant != self.__preferredGlobalVariant:
-			self.__preferredGlobalVariant = variant
-			self.closeAllHandles()
+		# Instances of the previous variant stay loaded until they are
+		# evicted, so switching back is instant
+		self.__preferredGlobalVariant = variant
 
 	def setInstallationPath(self, path):
 		self.__installationPath = path
@@ -510,29 +1247,11 @@ class DivvunHandlePool:
 	def getPreferredGlobalVariant(self):
 		return self.__preferredGlobalVariant
 
-	def __containsLocale(self, localeToFind, locales):
-		for locale in locales:
-			if locale.Language == localeToFind.Language and locale.Country == localeToFind.Country:
-				return True
-			if locale.Language == "qlt" and \
-			   (locale.Variant == localeToFind.Language or (localeToFind.Language == "qlt" and locale.Variant == localeToFind.Variant)):
-				return True
-		if localeToFind.Language == "qlt":
-			# See if we can try again with a trimmed tag: some tags may contain extra
-			# components that can be skipped while matching such as country in crk-Cans-CN
-			tagToFind = localeToFind.Variant
-			tagLen = len(tagToFind)
-			if tagLen > 9 and tagToFind[tagLen - 3] == "-":
-				loc = Locale("qlt", "", tagToFind[0:-3])
-				return self.__containsLocale(loc, locales)
-		return False
-
 	def supportsSpellingLocale(self, locale):
-		return self.__containsLocale(locale, self.getSupportedSpellingLocales())
+		return self.__getSpellingLocaleIndex().contains(locale)
 
 	def supportsHyphenationLocale(self, locale):
-		return self.__containsLocale(locale, self.getSupportedHyphenationLocales())
+		return self.__getHyphenationLocaleIndex().contains(locale)
 
 	def supportsGrammarLocale(self, locale):
-		return self.__containsLocale(locale, self.getSupportedGrammarLocales())
-
+		return self.__getGrammarCheckingLocaleIndex().contains(locale)
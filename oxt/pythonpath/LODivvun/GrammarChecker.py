@@ -11,17 +11,18 @@
 
 import logging
 import unohelper # type:ignore
-from com.sun.star.linguistic2 import XProofreader, ProofreadingResult, SingleProofreadingError # type:ignore
+from com.sun.star.linguistic2 import XProofreader, XLinguServiceEventBroadcaster, ProofreadingResult, SingleProofreadingError # type:ignore
 from com.sun.star.lang import XServiceInfo, XInitialization, XServiceDisplayName # type:ignore
 from com.sun.star.beans import PropertyValue # type:ignore
 from com.sun.star.text.TextMarkupType import PROOFREADING # type:ignore
 
+from LODivvun.BackgroundProofreader import BackgroundProofreader
+from LODivvun.CheckerEngine import checkParagraph, getCachedParagraphErrors, getParagraphContext, sentenceErrors
 from LODivvun.DivvunHandlePool import DivvunHandlePool
 from LODivvun.PropertyManager import PropertyManager
 from LODivvun.SettingsEventHandler import readIgnoredRules, saveIgnoredRules
-import libdivvun
 
-class GrammarChecker(unohelper.Base, XServiceInfo, XProofreader, XInitialization, XServiceDisplayName):
+class GrammarChecker(unohelper.Base, XServiceInfo, XProofreader, XLinguServiceEventBroadcaster, XInitialization, XServiceDisplayName):
 
 	def __init__(self, ctx, *args):
 		logging.debug("GrammarChecker.__init__")
@@ -41,7 +42,6 @@ class GrammarChecker(unohelper.Base, XServiceInfo, XProofreader, XInitialization
 		return DivvunHandlePool.getInstance().getSupportedGrammarLocales()
 
 	def hasLocale(self, aLocale):
-		logging.info("haslocale %s for %s", DivvunHandlePool.getInstance().supportsGrammarLocale(aLocale), aLocale)
 		return DivvunHandlePool.getInstance().supportsGrammarLocale(aLocale)
 
 	# From XProofreader
@@ -58,80 +58,68 @@ class GrammarChecker(unohelper.Base, XServiceInfo, XProofreader, XInitialization
 		result.nStartOfSentencePosition = nStartOfSentencePos
 		result.nBehindEndOfSentencePosition = nSuggestedBehindEndOfSentencePosition
 		result.xProofreader = self
-		# We read from registry on each check – it probably
-		# doesn't change most of the time, but it *can* change
-		# if user edited the plugin options, so this is at
-		# least safe:
-		ignoredRules = readIgnoredRules() # TODO: get from PropertyManager instead, see reloadDivvunSettings
+		# Kept up to date by PropertyManager's registry listener
+		ignoredRules = readIgnoredRules()
 
-		DivvunHandlePool.mutex.acquire()
-		try:
-			instance = DivvunHandlePool.getInstance()
-			if instance is None:
-				logging.error("GrammarChecker.doProofreading could not initialize libdivvun!")
-				return result
-			divvun = instance.getHandle(aLocale)
-			if divvun is None:
-				logging.error("GrammarChecker.doProofreading couldn't get an instance for locale %s"%(aLocale,))
-				logging.error("DivvunHandlePool.initializationErrors = %s"%(instance.getInitializationStatus(),))
+		instance = DivvunHandlePool.getInstance()
+		if instance is None:
+			logging.error("GrammarChecker.doProofreading could not initialize libdivvun!")
+			return result
+		logging.info("Checking '%s', nStartOfSentencePos=%d, nSuggestedBehindEndOfSentencePosition=%d",
+				aText, nStartOfSentencePos, nSuggestedBehindEndOfSentencePosition)
+		if PropertyManager.getInstance().getBackgroundProofreading():
+			paragraphErrors = getCachedParagraphErrors(instance, aLocale, aText)
+			if paragraphErrors is None:
+				# Show the paragraph without errors for now, we ask
+				# LibreOffice to check again once the results are there
+				paragraphErrors = ()
+				GrammarChecker.getBackgroundProofreader().submit(
+					getParagraphContext(instance, aLocale) + (aText,),
+					lambda: len(checkParagraph(instance, aDocumentIdentifier, aText, aLocale) or ()) > 0)
+		else:
+			paragraphErrors = checkParagraph(instance, aDocumentIdentifier, aText, aLocale)
+			if paragraphErrors is None:
 				return result
 
-			gcErrors = []
-			logging.info("Checking '%s', nStartOfSentencePos=%d, nSuggestedBehindEndOfSentencePosition=%d",
-					aText, nStartOfSentencePos, nSuggestedBehindEndOfSentencePosition)
-			for dError in libdivvun.proc_errs_bytes(divvun, aText):
-				startPos = dError.beg
-				errorLength = dError.end - dError.beg
-				logging.info("dError on form=%s at (%d,%d) replacements: %s",
-						dError.form, dError.beg, dError.end, dError.rep)
-				if dError.beg < result.nStartOfSentencePosition:
-					logging.info("beg %d < result.nStartOfSentencePosition %d, continue",
-							dError.beg, result.nStartOfSentencePosition)
-					continue
-				if dError.beg >= result.nBehindEndOfSentencePosition:
-					logging.info("beg %d >= result.nBehindEndOfSentencePosition %d, break",
-							dError.beg, result.nBehindEndOfSentencePosition)
-					break
-				if dError.beg + errorLength > result.nBehindEndOfSentencePosition:
-					logging.info("dError.beg %d + errorLength %d > result.nBehindEndOfSentencePosition %d, incf",
-							dError.beg, errorLength, result.nBehindEndOfSentencePosition)
-					result.nBehindEndOfSentencePosition = dError.beg + errorLength
-				logging.info("dError on form=%s at (%d,%d) replacements: %s",
-						dError.form,
-						dError.beg, dError.end,
-						dError.rep)
-				ruleIdentifier = dError.err
-				if ruleIdentifier in ignoredRules:
-					logging.debug("Ignored error with rule " + ruleIdentifier)
-					continue
-
-				suggestions = dError.rep
-				gcError = SingleProofreadingError()
-				gcErrors.append(gcError)
-				gcError.nErrorStart = startPos
-				gcError.nErrorLength = errorLength
-				gcError.nErrorType = PROOFREADING
-				comment = dError.dsc
-				gcError.aShortComment = comment
-				gcError.aFullComment = comment
-				gcError.aRuleIdentifier = ruleIdentifier
-
-				if False:  # We are not web yet, TODO
-				    detailUrl = PropertyValue()
-				    detailUrl.Name = "FullCommentURL"
-				    detailUrl.Value = "http://divvun.no/gchelp/" + aLocale.Language + "/" + ruleIdentifier + ".html"
-				    gcError.aProperties = (detailUrl,)
-
-				# add suggestions
-				if len(suggestions) > 0:
-					gcError.aSuggestions = tuple(suggestions)
-
-			result.aErrors = tuple(gcErrors)
-			result.nStartOfNextSentencePosition = result.nBehindEndOfSentencePosition
-			logging.info("return result, errors: %d", len(result.aErrors))
-			return result
-		finally:
-			DivvunHandlePool.mutex.release()
+		gcErrors = []
+		sentence, result.nBehindEndOfSentencePosition = sentenceErrors(
+			paragraphErrors, nStartOfSentencePos, nSuggestedBehindEndOfSentencePosition, ignoredRules)
+		for dError in sentence:
+			ruleIdentifier = dError.err
+			suggestions = dError.rep
+			gcError = SingleProofreadingError()
+			gcErrors.append(gcError)
+			gcError.nErrorStart = dError.beg
+			gcError.nErrorLength = dError.end - dError.beg
+			gcError.nErrorType = PROOFREADING
+			comment = dError.dsc
+			gcError.aShortComment = comment
+			gcError.aFullComment = comment
+			gcError.aRuleIdentifier = ruleIdentifier
+
+			if False:  # We are not web yet, TODO
+			    detailUrl = PropertyValue()
+			    detailUrl.Name = "FullCommentURL"
+			    detailUrl.Value = "http://divvun.no/gchelp/" + aLocale.Language + "/" + ruleIdentifier + ".html"
+			    gcError.aProperties = (detailUrl,)
+
+			# add suggestions
+			if len(suggestions) > 0:
+				gcError.aSuggestions = tuple(suggestions)
+
+		result.aErrors = tuple(gcErrors)
+		result.nStartOfNextSentencePosition = result.nBehindEndOfSentencePosition
+		logging.info("return result, errors: %d", len(result.aErrors))
+		return result
+
+	@staticmethod
+	def getBackgroundProofreader():
+		with DivvunHandlePool.mutex:
+			if GrammarChecker.backgroundProofreader is None:
+				GrammarChecker.backgroundProofreader = BackgroundProofreader(
+					PropertyManager.getInstance().getBackgroundProofreadingThreads(),
+					PropertyManager.getInstance().requestProofreadAgain)
+			return GrammarChecker.backgroundProofreader
 
 	def ignoreRule(self, ruleIdentifier, locale):
 		logging.debug("Ignoring rule " + ruleIdentifier)
@@ -142,6 +130,23 @@ class GrammarChecker(unohelper.Base, XServiceInfo, XProofreader, XInitialization
 		logging.debug("Reset ignored rules")
 		saveIgnoredRules(set())
 
+	# From XLinguServiceEventBroadcaster
+	def addLinguServiceEventListener(self, xLstnr):
+		logging.debug("GrammarChecker.addLinguServiceEventListener")
+		DivvunHandlePool.mutex.acquire()
+		try:
+			return PropertyManager.getInstance().addLinguServiceEventListener(xLstnr)
+		finally:
+			DivvunHandlePool.mutex.release()
+
+	def removeLinguServiceEventListener(self, xLstnr):
+		logging.debug("GrammarChecker.removeLinguServiceEventListener")
+		DivvunHandlePool.mutex.acquire()
+		try:
+			return PropertyManager.getInstance().removeLinguServiceEventListener(xLstnr)
+		finally:
+			DivvunHandlePool.mutex.release()
+
 	# From XInitialization
 	def initialize(self):
 		pass
@@ -153,5 +158,6 @@ class GrammarChecker(unohelper.Base, XServiceInfo, XProofreader, XInitialization
 		else:
 			return "Grammar checker (Divvun)"
 
+GrammarChecker.backgroundProofreader = None
 GrammarChecker.IMPLEMENTATION_NAME = "divvun.GrammarChecker"
 GrammarChecker.SUPPORTED_SERVICE_NAMES = ("com.sun.star.linguistic2.Proofreader",)
@@ -0,0 +1,127 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+"""Fill the hyphenation pattern store from documents.
+
+Hyphenates every word of the given documents once and adds the patterns
+to the store that the extension reads, so that opening the documents in
+LibreOffice doesn't need the hyphenator for known words. Example:
+
+  PYTHONPATH=oxt/pythonpath python3 -m LODivvun.HyphenationPrebuild --lang se sme.odt
+
+The hyphenator settings must match the ones in LibreOffice, otherwise
+the extension uses another store. LibreOffice only reads the store with
+hyphenator/patternStore set to true.
+"""
+
+import argparse
+import logging
+import re
+import sys
+
+from LODivvun.BatchProofreader import defaultInstallationPath, readParagraphs
+from LODivvun.CheckerEngine import HYPHENATION_SERVICE, MAX_WORD_LENGTH, hyphenationOptions
+from LODivvun.CheckerWorkers import WorkerError
+from LODivvun.DivvunHandlePool import DivvunHandlePool, Locale
+
+try:
+	from typing import Dict, Iterator, List, Optional     # flake8: noqa
+except ImportError:
+	pass
+
+WORD_PATTERN = re.compile(r"\w+(?:['’]\w+)*")
+
+# LibreOffice doesn't hyphenate shorter words with the default settings
+DEFAULT_MIN_WORD_LENGTH = 5
+
+
+def words(paths, inputFormat, minLength):  # type: (List[str], str, int) -> Iterator[str]
+	for path in paths:
+		for paragraphId, language, text in readParagraphs(path, inputFormat):
+			for match in WORD_PATTERN.finditer(text):
+				word = match.group()
+				if minLength <= len(word) <= MAX_WORD_LENGTH:
+					yield word
+
+
+def main(argv=None):  # type: (Optional[List[str]]) -> int
+	parser = argparse.ArgumentParser(
+		description="Store the hyphenation patterns of the words in documents.")
+	parser.add_argument("files", nargs="+", help="plain text, ODT or JSONL files")
+	parser.add_argument("--lang", required=True, help="language of the documents, e.g. se")
+	parser.add_argument("--variant", default="", help="preferred dictionary variant")
+	parser.add_argument("--format", choices=["auto", "text", "odt", "jsonl"], default="auto",
+			    help="input format, guessed from the file extension by default")
+	parser.add_argument("--min-length", type=int, default=DEFAULT_MIN_WORD_LENGTH,
+			    help="shortest word to hyphenate (default: %(default)s)")
+	parser.add_argument("--word-parts", type=int, default=0, metavar="MINLEN",
+			    help="hyphenate compound word parts of at least MINLEN letters, like hyphWordParts")
+	parser.add_argument("--no-unknown-words", action="store_true",
+			    help="don't hyphenate unknown words")
+	parser.add_argument("--installation-path", default=defaultInstallationPath(),
+			    help="extension directory, its divvun/ subdirectory is searched for language archives")
+	parser.add_argument("--verbose", action="store_true")
+	args = parser.parse_args(argv)
+
+	logging.basicConfig(format="%(asctime)s %(levelname)-8s %(message)s",
+			    level=logging.DEBUG if args.verbose else logging.WARNING)
+	pool = DivvunHandlePool.getInstance()
+	pool.setInstallationPath(args.installation_path)
+	pool.setPreferredGlobalVariant(args.variant)
+	pool.setHyphenationStoreEnabled(True)
+	booleanOptions, integerOptions = hyphenationOptions(args.word_parts > 0, args.word_parts,
+							    not args.no_unknown_words)
+	for option, value in booleanOptions:
+		pool.setGlobalBooleanOption(option, value)
+	for option, value in integerOptions:
+		pool.setGlobalIntegerOption(option, value)
+
+	locale = Locale(args.lang, "", "")
+	store = pool.getHyphenationStore(locale)
+	if store is None:
+		logging.error("No hyphenator for %s: %s", args.lang, pool.getInitializationStatus())
+		return 1
+	patterns = {}  # type: Dict[str, str]
+	seen = set()
+	divvun = None
+	status = 0
+	try:
+		for word in words(args.files, args.format, args.min_length):
+			if word in seen:
+				continue
+			seen.add(word)
+			if store.get(word) is not None:
+				continue
+			if divvun is None:
+				divvun = pool.acquireHandle(locale, service=HYPHENATION_SERVICE)
+				if divvun is None:
+					logging.error("Could not load %s: %s", args.lang, pool.getInitializationStatus())
+					return 1
+			pattern = divvun.getHyphenationPattern(word)
+			# Words without a pattern are asked for again in LibreOffice
+			if pattern is not None:
+				patterns[word] = pattern
+	except WorkerError as e:
+		# The patterns found until then are still stored
+		logging.error("Hyphenating failed: %s", e)
+		status = 1
+	finally:
+		if divvun is not None:
+			pool.releaseHandle(divvun)
+	store.update(patterns)
+	store.flush()
+	logging.info("Stored %d new patterns, %d words were already known or have none",
+		     len(patterns), len(seen) - len(patterns))
+	return status
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,304 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+"""Hyphenation patterns kept on disk between sessions.
+
+A store file holds the patterns computed by one checker: the same
+archive, pipe and hyphenation options. Its name is derived from all of
+these, so a new version of a language archive gets a new store. The
+words are sorted, so that a word is found with a binary search in the
+memory mapped file without reading the whole store.
+
+File layout, all integers little endian:
+
+  magic "DVHY", version (uint32), number of words n (uint32)
+  n record offsets (uint32), relative to the start of the records
+  n records: UTF-8 word, NUL, pattern, NUL
+
+Several office processes may add patterns to the same store. They merge
+them into the file one at a time, holding a lock on a file next to it.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import weakref
+from contextlib import contextmanager
+from threading import Lock, Thread
+
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+
+try:
+	import msvcrt
+except ImportError:
+	msvcrt = None
+
+try:
+	from typing import Any, Dict, Iterator, Optional, Sequence, Tuple     # flake8: noqa
+except ImportError:
+	pass
+
+STORE_MAGIC = b"DVHY"
+STORE_VERSION = 1
+HEADER = struct.Struct("<4sII")
+OFFSET = struct.Struct("<I")
+
+# New patterns are merged into the file in the background once there are
+# this many of them, and when the process exits
+STORE_FLUSH_THRESHOLD = 500
+
+
+def storeName(specpath, stamp, pipename, options):
+	# type: (str, Tuple[Optional[int], Optional[int]], str, Sequence[Tuple[Any, ...]]) -> str
+	"""Returns the file name of the store for a checker"""
+	checker = json.dumps([STORE_VERSION, specpath, list(stamp), pipename,
+			      [list(option) for option in options]])
+	return "hyphenation-{}.dvhy".format(hashlib.sha1(checker.encode("utf-8")).hexdigest()[:16])
+
+
+def writeTemporaryStoreFile(path, patterns):  # type: (str, Dict[str, str]) -> str
+	"""Writes patterns to a new file next to path and returns its name.
+	os.replace moves it to path atomically."""
+	records = sorted((word.encode("utf-8"), pattern.encode("utf-8"))
+			 for word, pattern in patterns.items())
+	offsets = []
+	data = []
+	position = 0
+	for word, pattern in records:
+		offsets.append(OFFSET.pack(position))
+		record = word + b"\0" + pattern + b"\0"
+		data.append(record)
+		position = position + len(record)
+	directory = os.path.dirname(path)
+	os.makedirs(directory, exist_ok=True)
+	fd, tmpPath = tempfile.mkstemp(prefix="." + os.path.basename(path), dir=directory)
+	try:
+		with os.fdopen(fd, "wb") as f:
+			f.write(HEADER.pack(STORE_MAGIC, STORE_VERSION, len(records)))
+			f.write(b"".join(offsets))
+			f.write(b"".join(data))
+	except BaseException:
+		os.unlink(tmpPath)
+		raise
+	return tmpPath
+
+
+@contextmanager
+def lockedStoreFile(path):  # type: (str) -> Iterator[None]
+	"""Keeps other processes from replacing the store file at path meanwhile"""
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	with open(path + ".lock", "a+b") as lockFile:
+		if fcntl is not None:
+			# Released when the file is closed
+			fcntl.flock(lockFile.fileno(), fcntl.LOCK_EX)
+			yield
+		elif msvcrt is not None:
+			lockFile.seek(0)
+			msvcrt.locking(lockFile.fileno(), msvcrt.LK_LOCK, 1)
+			try:
+				yield
+			finally:
+				lockFile.seek(0)
+				msvcrt.locking(lockFile.fileno(), msvcrt.LK_UNLCK, 1)
+		else:
+			yield
+
+
+class StoreFile:
+	"""Read only view of a memory mapped store file"""
+
+	def __init__(self, path):  # type: (str) -> None
+		with open(path, "rb") as f:
+			self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		try:
+			magic, version, self.__count = HEADER.unpack_from(self.__map, 0)
+			if magic != STORE_MAGIC or version != STORE_VERSION:
+				raise ValueError("not a hyphenation store")
+			self.__records = HEADER.size + self.__count * OFFSET.size
+			if self.__records > len(self.__map):
+				raise ValueError("truncated hyphenation store")
+		except (struct.error, ValueError):
+			self.__map.close()
+			raise
+
+	def __len__(self):
+		return self.__count
+
+	def __word(self, index):  # type: (int) -> Tuple[bytes, int]
+		"""Returns the word of a record and the position of its pattern"""
+		start = self.__records + OFFSET.unpack_from(self.__map, HEADER.size + index * OFFSET.size)[0]
+		end = self.__map.find(b"\0", start)
+		return self.__map[start:end], end + 1
+
+	def __pattern(self, position):  # type: (int) -> str
+		return self.__map[position:self.__map.find(b"\0", position)].decode("utf-8")
+
+	def get(self, word):  # type: (str) -> Optional[str]
+		key = word.encode("utf-8")
+		low = 0
+		high = self.__count
+		while low < high:
+			middle = (low + high) // 2
+			found, position = self.__word(middle)
+			if found == key:
+				return self.__pattern(position)
+			if found < key:
+				low = middle + 1
+			else:
+				high = middle
+		return None
+
+	def items(self):  # type: () -> Iterator[Tuple[str, str]]
+		for index in range(self.__count):
+			word, position = self.__word(index)
+			yield word.decode("utf-8"), self.__pattern(position)
+
+	def close(self):
+		self.__map.close()
+
+
+class HyphenationStore:
+	"""Maps the words to the hyphenation patterns of one checker, see storeName.
+
+	Patterns computed in this session are kept in memory until they are
+	merged into the file. The file is only replaced, never changed in
+	place, so other processes always see a complete store.
+	"""
+
+	def __init__(self, path, flushThreshold=STORE_FLUSH_THRESHOLD):  # type: (str, int) -> None
+		self.__path = path
+		self.__flushThreshold = flushThreshold
+		# Protects the file and the dicts, flushLock serialises the merges
+		self.__lock = Lock()
+		self.__flushLock = Lock()
+		self.__pending = {}  # type: Dict[str, str]
+		self.__flushing = {}  # type: Dict[str, str]
+		self.__flushThread = None  # type: Optional[Thread]
+		self.__file = self.__open()
+		openStores.add(self)
+
+	def __open(self):  # type: () -> Optional[StoreFile]
+		try:
+			return StoreFile(self.__path)
+		except FileNotFoundError:
+			return None
+		except (OSError, ValueError, struct.error) as e:
+			logging.warning("HyphenationStore: ignoring unreadable {}: {}".format(self.__path, e))
+			return None
+
+	def get(self, word):  # type: (str) -> Optional[str]
+		with self.__lock:
+			pattern = self.__pending.get(word)
+			if pattern is None:
+				pattern = self.__flushing.get(word)
+			if pattern is None and self.__file is not None:
+				pattern = self.__file.get(word)
+			return pattern
+
+	def put(self, word, pattern):  # type: (str, str) -> None
+		if pattern is None:
+			raise ValueError("no hyphenation pattern for {}".format(word))
+		with self.__lock:
+			self.__pending[word] = pattern
+			if len(self.__pending) < self.__flushThreshold or self.__flushThread is not None:
+				return
+			thread = Thread(target=self.flush, name="DivvunHyphenationStore")
+			thread.daemon = True
+			self.__flushThread = thread
+		thread.start()
+
+	def update(self, patterns):  # type: (Dict[str, str]) -> None
+		"""Adds patterns without merging them into the file, call flush when done"""
+		for word, pattern in patterns.items():
+			if pattern is None:
+				raise ValueError("no hyphenation pattern for {}".format(word))
+		with self.__lock:
+			self.__pending.update(patterns)
+
+	def flush(self):
+		"""Merges the new patterns into the file.
+
+		The file is read again under the lock, so that the patterns that
+		other processes merged since it was mapped are kept.
+		"""
+		with self.__flushLock:
+			with self.__lock:
+				self.__flushing = self.__pending
+				self.__pending = {}
+			if len(self.__flushing) > 0:
+				try:
+					with lockedStoreFile(self.__path):
+						self.__merge(self.__flushing)
+					merged = True
+				except OSError as e:
+					logging.warning("HyphenationStore: could not write {}: {}".format(
+						self.__path, e))
+					merged = False
+				with self.__lock:
+					if self.__file is None:
+						self.__file = self.__open()
+					if not merged or self.__file is None:
+						# Keep the patterns in memory if the file can't be used
+						self.__flushing.update(self.__pending)
+						self.__pending = self.__flushing
+					self.__flushing = {}
+			with self.__lock:
+				self.__flushThread = None
+
+	def __merge(self, patterns):  # type: (Dict[str, str]) -> None
+		"""Replaces the file with one that also has patterns. Call with the file
+		locked, raises OSError."""
+		current = self.__open()
+		merged = {}  # type: Dict[str, str]
+		if current is not None:
+			merged.update(current.items())
+			current.close()
+		merged.update(patterns)
+		tmpPath = writeTemporaryStoreFile(self.__path, merged)
+		with self.__lock:
+			# Windows can't replace a file that is mapped
+			if self.__file is not None:
+				self.__file.close()
+				self.__file = None
+			try:
+				os.replace(tmpPath, self.__path)
+			except OSError:
+				os.unlink(tmpPath)
+				raise
+			self.__file = self.__open()
+
+	def close(self):
+		self.flush()
+		with self.__lock:
+			if self.__file is not None:
+				self.__file.close()
+				self.__file = None
+
+
+# Stores with patterns that are not on disk yet
+openStores = weakref.WeakSet()  # type: weakref.WeakSet
+
+
+@atexit.register
+def flushOpenStores():
+	for store in list(openStores):
+		try:
+			store.flush()
+		except Exception:
+			logging.exception("HyphenationStore: flush at exit failed")
@@ -13,6 +13,7 @@ import logging
 import unohelper 		# type:ignore
 from com.sun.star.linguistic2 import XHyphenator, XLinguServiceEventBroadcaster	 # type:ignore
 from com.sun.star.lang import XServiceInfo, XInitialization, XServiceDisplayName  # type:ignore
+from LODivvun.CheckerEngine import findHyphenPos, getHyphenationPattern, possibleHyphens
 from LODivvun.DivvunHandlePool import DivvunHandlePool
 from LODivvun.HyphenatedWord import HyphenatedWord
 from LODivvun.PossibleHyphens import PossibleHyphens
@@ -43,51 +44,15 @@ class Hyphenator(unohelper.Base, XServiceInfo, XHyphenator, XLinguServiceEventBr
 	# From XHyphenator
 	def hyphenate(self, word, locale, nMaxLeading, properties):
 		logging.debug("Hyphenator.hyphenate")
-		if len(word) > 10000:
+		options = PropertyManager.getInstance().getOptions(properties)
+		hyphenation = getHyphenationPattern(DivvunHandlePool.getInstance(), locale, word, options)
+		if hyphenation is None:
+			return None
+		hyphenPos = findHyphenPos(word, hyphenation, nMaxLeading, options.hyphMinLeading, options.hyphMinTrailing)
+		if hyphenPos != -1:
+			return HyphenatedWord(word, hyphenPos - 1, locale)
+		else:
 			return None
-		DivvunHandlePool.mutex.acquire()
-		try:
-			divvun = DivvunHandlePool.getInstance().getHandle(locale)
-			if divvun is None:
-				return None
-			PropertyManager.getInstance().setValues(properties)
-
-			minLeading = PropertyManager.getInstance().getHyphMinLeading()
-			minTrailing = PropertyManager.getInstance().getHyphMinTrailing()
-			wlen = len(word)
-
-			# If the word is too short to be hyphenated, return no hyphenation points
-			if wlen < PropertyManager.getInstance().getHyphMinWordLength() or wlen < minLeading + minTrailing:
-				PropertyManager.getInstance().resetValues(properties)
-				return None
-
-			hyphenationPoints = divvun.getHyphenationPattern(word)
-			if hyphenationPoints is None:
-				PropertyManager.getInstance().resetValues(properties)
-				return None
-
-			# find the hyphenation point
-			hyphenPos = -1
-			i = wlen - minTrailing # The last generally allowed hyphenation point
-			if i > nMaxLeading:
-				i = nMaxLeading # The last allowed point on this line
-			while i >= minLeading and hyphenPos == -1:
-				if word[i] == '\'':
-					i = i - 1
-					continue
-				if hyphenationPoints[i] == '-' or hyphenationPoints[i] == '=':
-					hyphenPos = i
-					break
-				i = i - 1
-
-			# return the result
-			PropertyManager.getInstance().resetValues(properties)
-			if hyphenPos != -1:
-				return HyphenatedWord(word, hyphenPos - 1, locale)
-			else:
-				return None
-		finally:
-			DivvunHandlePool.mutex.release()
 
 	def queryAlternativeSpelling(self, word, locale, index, properties):
 		logging.debug("Hyphenator.queryAlternativeSpelling")
@@ -96,41 +61,12 @@ class Hyphenator(unohelper.Base, XServiceInfo, XHyphenator, XLinguServiceEventBr
 
 	def createPossibleHyphens(self, word, locale, properties):
 		logging.debug("Hyphenator.createPossibleHyphens")
-		wlen = len(word)
-		if wlen > 10000:
+		options = PropertyManager.getInstance().getOptions(properties)
+		hyphenation = getHyphenationPattern(DivvunHandlePool.getInstance(), locale, word, options)
+		if hyphenation is None:
 			return None
-		DivvunHandlePool.mutex.acquire()
-		try:
-			divvun = DivvunHandlePool.getInstance().getHandle(locale)
-			if divvun is None:
-				return None
-			PropertyManager.getInstance().setValues(properties)
-
-			# If the word is too short to be hyphenated, return no hyphenation points
-			minLeading = PropertyManager.getInstance().getHyphMinLeading()
-			minTrailing = PropertyManager.getInstance().getHyphMinTrailing()
-			if wlen < PropertyManager.getInstance().getHyphMinWordLength() or wlen < minLeading + minTrailing:
-				PropertyManager.getInstance().resetValues(properties)
-				return None
-
-			hyphenationPoints = divvun.getHyphenationPattern(word)
-			if hyphenationPoints is None:
-				PropertyManager.getInstance().resetValues(properties)
-				return None
-
-			hyphenSeq = []
-			hyphenatedWord = ""
-			for i in range(0, wlen):
-				hyphenatedWord = hyphenatedWord + word[i]
-				if i >= minLeading - 1 and i < wlen - minTrailing and hyphenationPoints[i + 1] == '-':
-					hyphenSeq.append(i)
-					hyphenatedWord = hyphenatedWord + "="
-
-			res = PossibleHyphens(word, hyphenatedWord, hyphenSeq, locale)
-			PropertyManager.getInstance().resetValues(properties)
-			return res
-		finally:
-			DivvunHandlePool.mutex.release()
+		hyphenatedWord, hyphenSeq = possibleHyphens(word, hyphenation, options.hyphMinLeading, options.hyphMinTrailing)
+		return PossibleHyphens(word, hyphenatedWord, list(hyphenSeq), locale)
 
 	# From XLinguServiceEventBroadcaster
 	def addLinguServiceEventListener(self, xLstnr):
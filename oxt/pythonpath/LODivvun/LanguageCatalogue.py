@@ -0,0 +1,105 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+import logging
+import os
+from threading import Lock
+
+import libdivvun
+from LODivvun import UserCache
+
+try:
+	from typing import Callable, Dict, List, Optional, Tuple     # flake8: noqa
+	Fingerprint = Tuple[Tuple[str, Optional[int]], ...]
+except ImportError:
+	pass
+
+MANIFEST_NAME = "languages.json"
+MANIFEST_VERSION = 1
+
+
+def directoryFingerprint(paths):  # type: (List[str]) -> Fingerprint
+	"""Returns the modification times of paths. Adding or removing an archive
+	changes the time of its directory."""
+	fingerprint = []
+	for path in paths:
+		try:
+			mtime = os.stat(path).st_mtime_ns  # type: Optional[int]
+		except OSError:
+			mtime = None
+		fingerprint.append((path, mtime))
+	return tuple(fingerprint)
+
+
+class LanguageCatalogue:
+	"""Maps languages to the checker archives found for them.
+
+	Wraps libdivvun.listLangs, which scans every search path. The result
+	is only scanned again when the modification time of one of the
+	directories changes. It is also stored in a manifest in the user
+	cache directory, so that a new LibreOffice session can skip the scan.
+	"""
+
+	def __init__(self, listLangs=None, manifestName=MANIFEST_NAME):
+		# type: (Optional[Callable[[str], Dict[str, List[str]]]], Optional[str]) -> None
+		self.__listLangs = listLangs or libdivvun.listLangs
+		self.__manifestName = manifestName
+		self.__lock = Lock()
+		self.__fingerprint = None  # type: Optional[Fingerprint]
+		self.__languages = {}  # type: Dict[str, List[str]]
+		self.__manifestRead = False
+
+	def getLanguages(self, extraPath, refresh=False):  # type: (str, bool) -> Dict[str, List[str]]
+		"""Returns the archive paths of each language, the preferred one first.
+
+		Pass refresh=True to scan again regardless of modification times,
+		e.g. when an archive from the catalogue could not be opened.
+		"""
+		fingerprint = directoryFingerprint([extraPath] + list(libdivvun.searchPaths()))
+		with self.__lock:
+			if not self.__manifestRead:
+				self.__manifestRead = True
+				self.__readManifest()
+			if not refresh and fingerprint == self.__fingerprint:
+				return self.__languages
+		logging.info("LanguageCatalogue: scanning for languages including {}".format(extraPath))
+		languages = {language: list(paths) for language, paths in self.__listLangs(extraPath).items()}
+		logging.info("LanguageCatalogue: found {} languages: {}".format(len(languages), languages.keys()))
+		with self.__lock:
+			self.__fingerprint = fingerprint
+			self.__languages = languages
+		self.__writeManifest(fingerprint, languages)
+		return languages
+
+	def __readManifest(self):
+		"""Call with lock held"""
+		if self.__manifestName is None:
+			return
+		manifest = UserCache.readJson(self.__manifestName)
+		if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+			return
+		try:
+			self.__fingerprint = tuple((path, mtime) for path, mtime in manifest["paths"])
+			self.__languages = {language: list(paths) for language, paths in manifest["languages"].items()}
+		except (KeyError, TypeError, ValueError, AttributeError):
+			logging.warning("LanguageCatalogue: ignoring malformed manifest")
+			self.__fingerprint = None
+			self.__languages = {}
+
+	def __writeManifest(self, fingerprint, languages):
+		# type: (Fingerprint, Dict[str, List[str]]) -> None
+		if self.__manifestName is None:
+			return
+		UserCache.writeJson(self.__manifestName, {
+			"version": MANIFEST_VERSION,
+			"paths": [list(entry) for entry in fingerprint],
+			"languages": languages,
+		})
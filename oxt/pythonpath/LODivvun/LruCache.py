@@ -0,0 +1,50 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+from collections import OrderedDict
+from threading import Lock
+
+try:
+	from typing import Any, Hashable     # flake8: noqa
+except ImportError:
+	pass
+
+
+class LruCache:
+	"""Thread safe bounded mapping that drops the least recently used entry first"""
+
+	def __init__(self, maxSize):
+		self.__maxSize = maxSize
+		self.__entries = OrderedDict()  # type: OrderedDict
+		self.__lock = Lock()
+
+	def get(self, key, default=None):  # type: (Hashable, Any) -> Any
+		with self.__lock:
+			if key not in self.__entries:
+				return default
+			self.__entries.move_to_end(key)
+			return self.__entries[key]
+
+	def put(self, key, value):  # type: (Hashable, Any) -> None
+		if self.__maxSize <= 0:
+			return
+		with self.__lock:
+			self.__entries[key] = value
+			self.__entries.move_to_end(key)
+			while len(self.__entries) > self.__maxSize:
+				self.__entries.popitem(last=False)
+
+	def clear(self):
+		with self.__lock:
+			self.__entries.clear()
+
+	def __len__(self):
+		return len(self.__entries)
@@ -0,0 +1,205 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+"""Grammar errors of paragraphs kept between sessions.
+
+Templates, headers and documents that are opened again contain the same
+paragraphs, which need not be analysed again as long as the checker is
+the same. Entries are keyed by a checker fingerprint (see
+DivvunHandlePool.getCheckerFingerprint) and a hash of the paragraph, and
+the least recently used ones are removed when there are too many.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import time
+import weakref
+from threading import Lock, Timer
+
+from LODivvun.CheckerEngine import DivvunError
+
+try:
+	import sqlite3
+except ImportError:
+	# Not every Python bundled with LibreOffice has it
+	sqlite3 = None
+
+try:
+	from typing import Any, Dict, Optional, Sequence, Set, Tuple     # flake8: noqa
+except ImportError:
+	pass
+
+PARAGRAPH_STORE_NAME = "paragraphs.sqlite"
+SCHEMA_VERSION = 1
+
+DEFAULT_MAX_PARAGRAPHS = 100000
+
+# Seconds new entries and uses are kept in memory before they are written
+FLUSH_DELAY = 2.0
+
+# Share of the entries removed at once when there are too many, so that
+# pruning is not needed again on the next write
+PRUNE_SLACK = 0.1
+
+
+def paragraphHash(text):  # type: (str) -> bytes
+	return hashlib.sha1(text.encode("utf-8")).digest()
+
+
+def encodeErrors(errors):  # type: (Sequence[DivvunError]) -> str
+	return json.dumps([[e.form, e.beg, e.end, e.err, e.dsc, list(e.rep)] for e in errors],
+			  ensure_ascii=False)
+
+
+def sqliteAvailable():  # type: () -> bool
+	return sqlite3 is not None
+
+
+class ParagraphStore:
+	"""Maps (checker fingerprint, paragraph) to the errors found in the paragraph.
+
+	Lookups go to the database right away. New entries and the times
+	entries were used are collected and written together a moment later,
+	so that checking a document doesn't wait for the disk.
+	"""
+
+	def __init__(self, path, maxParagraphs=DEFAULT_MAX_PARAGRAPHS):  # type: (str, int) -> None
+		"""Raises sqlite3.Error or OSError if the database can't be opened"""
+		self.__maxParagraphs = maxParagraphs
+		self.__lock = Lock()
+		self.__pending = {}  # type: Dict[Tuple[str, bytes], str]
+		self.__used = set()  # type: Set[Tuple[str, bytes]]
+		self.__timer = None  # type: Optional[Timer]
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		# Used from the proofreading threads, always with lock held
+		self.__db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+		try:
+			self.__createSchema()
+		except sqlite3.Error:
+			self.__db.close()
+			raise
+		openStores.add(self)
+
+	def __createSchema(self):
+		self.__db.execute("PRAGMA journal_mode=WAL")
+		self.__db.execute("PRAGMA synchronous=NORMAL")
+		if self.__db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+			self.__db.execute("DROP TABLE IF EXISTS paragraphs")
+			self.__db.execute("PRAGMA user_version = {}".format(SCHEMA_VERSION))
+		self.__db.execute("CREATE TABLE IF NOT EXISTS paragraphs "
+				  "(checker TEXT NOT NULL, hash BLOB NOT NULL, errors TEXT NOT NULL, used INTEGER NOT NULL, "
+				  "PRIMARY KEY (checker, hash))")
+		self.__db.execute("CREATE INDEX IF NOT EXISTS paragraphs_used ON paragraphs (used)")
+
+	def get(self, checker, text):  # type: (str, str) -> Optional[Tuple[DivvunError, ...]]
+		"""Returns the errors of the paragraph, or None if it is not in the store"""
+		key = (checker, paragraphHash(text))
+		with self.__lock:
+			encoded = self.__pending.get(key)
+			if encoded is None and self.__db is not None:
+				try:
+					row = self.__db.execute(
+						"SELECT errors FROM paragraphs WHERE checker = ? AND hash = ?",
+						key).fetchone()
+				except sqlite3.Error as e:
+					logging.warning("ParagraphStore.get: {}".format(e))
+					return None
+				if row is None:
+					return None
+				encoded = row[0]
+				self.__used.add(key)
+				self.__scheduleFlush()
+		if encoded is None:
+			return None
+		try:
+			return tuple(DivvunError(*fields[:5], tuple(fields[5])) for fields in json.loads(encoded))
+		except (ValueError, TypeError, IndexError) as e:
+			logging.warning("ParagraphStore.get: ignoring malformed entry: {}".format(e))
+			return None
+
+	def put(self, checker, text, errors):  # type: (str, str, Sequence[DivvunError]) -> None
+		key = (checker, paragraphHash(text))
+		encoded = encodeErrors(errors)
+		with self.__lock:
+			self.__pending[key] = encoded
+			self.__scheduleFlush()
+
+	def __scheduleFlush(self):
+		"""Call with lock held"""
+		if self.__timer is None:
+			self.__timer = Timer(FLUSH_DELAY, self.flush)
+			self.__timer.daemon = True
+			self.__timer.start()
+
+	def flush(self):
+		"""Writes the new entries and the use times, and removes the oldest entries"""
+		with self.__lock:
+			self.__timer = None
+			pending = self.__pending
+			used = self.__used
+			self.__pending = {}
+			self.__used = set()
+			if self.__db is None or (len(pending) == 0 and len(used) == 0):
+				return
+			now = int(time.time())
+			try:
+				with self.__db:
+					self.__db.execute("BEGIN")
+					self.__db.executemany(
+						"INSERT OR REPLACE INTO paragraphs (checker, hash, errors, used) "
+						"VALUES (?, ?, ?, ?)",
+						[(checker, digest, encoded, now)
+						 for (checker, digest), encoded in pending.items()])
+					self.__db.executemany("UPDATE paragraphs SET used = ? WHERE checker = ? AND hash = ?",
+							      [(now, checker, digest) for checker, digest in used])
+					self.__prune()
+			except sqlite3.Error as e:
+				logging.warning("ParagraphStore.flush: {}".format(e))
+
+	def __prune(self):
+		"""Call with lock held, in a transaction"""
+		count = self.__db.execute("SELECT COUNT(*) FROM paragraphs").fetchone()[0]
+		if count <= self.__maxParagraphs:
+			return
+		excess = count - self.__maxParagraphs + int(self.__maxParagraphs * PRUNE_SLACK)
+		logging.info("ParagraphStore: removing {} least recently used paragraphs".format(excess))
+		self.__db.execute("DELETE FROM paragraphs WHERE rowid IN "
+				  "(SELECT rowid FROM paragraphs ORDER BY used LIMIT ?)", (excess,))
+
+	def setMaxParagraphs(self, maxParagraphs):  # type: (int) -> None
+		with self.__lock:
+			self.__maxParagraphs = maxParagraphs
+
+	def close(self):
+		self.flush()
+		with self.__lock:
+			if self.__timer is not None:
+				self.__timer.cancel()
+				self.__timer = None
+			if self.__db is not None:
+				self.__db.close()
+				self.__db = None
+
+
+# Stores with entries that are not on disk yet
+openStores = weakref.WeakSet()  # type: weakref.WeakSet
+
+
+@atexit.register
+def flushOpenStores():
+	for store in list(openStores):
+		try:
+			store.flush()
+		except Exception:
+			logging.exception("ParagraphStore: flush at exit failed")
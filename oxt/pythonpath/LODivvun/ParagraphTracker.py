@@ -0,0 +1,156 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+import logging
+import re
+from bisect import bisect_right
+from collections import OrderedDict
+from threading import Lock
+
+try:
+	from typing import Any, Callable, Hashable, List, Optional, Tuple     # flake8: noqa
+except ImportError:
+	pass
+
+# Paragraphs shorter than this are always analysed as a whole
+MIN_INCREMENTAL_LENGTH = 500
+
+# Number of unchanged sentences re-analysed on each side of an edit
+CONTEXT_SENTENCES = 1
+
+SENTENCE_BOUNDARY = re.compile("[.!?…]+[\"'»”’)\\]]*\\s+")
+
+
+def utf16Length(text):  # type: (str) -> int
+	"""Length of text in the UTF-16 code units that error offsets are given in"""
+	return len(text.encode("utf-16-le")) // 2
+
+
+def sentenceStarts(text):  # type: (str) -> List[int]
+	return [0] + [m.end() for m in SENTENCE_BOUNDARY.finditer(text) if m.end() < len(text)]
+
+
+def commonAffixes(old, new):  # type: (str, str) -> Tuple[int, int]
+	"""Returns the lengths of the common prefix and the (non-overlapping) common suffix"""
+	limit = min(len(old), len(new))
+	prefix = 0
+	while prefix < limit and old[prefix] == new[prefix]:
+		prefix = prefix + 1
+	suffix = 0
+	while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+		suffix = suffix + 1
+	return prefix, suffix
+
+
+class ParagraphTracker:
+	"""Remembers the last checked paragraphs of each document.
+
+	When a paragraph is edited, LibreOffice sends the whole paragraph
+	again. If the new text is an edit of a remembered paragraph, only
+	the sentences around the edit are analysed again and the errors of
+	the unchanged parts are reused with their offsets shifted.
+	"""
+
+	def __init__(self, maxDocuments=16, maxParagraphs=32):
+		self.__maxDocuments = maxDocuments
+		self.__maxParagraphs = maxParagraphs
+		self.__documents = OrderedDict()  # type: OrderedDict
+		self.__lock = Lock()
+
+	def clear(self):
+		with self.__lock:
+			self.__documents.clear()
+
+	def remember(self, documentId, context, text, errors):  # type: (str, Hashable, str, Tuple) -> None
+		"""Stores the errors of text. Entries are only reused for the same context
+		(checker and variant)."""
+		if len(text) < MIN_INCREMENTAL_LENGTH:
+			return
+		with self.__lock:
+			paragraphs = self.__documents.get(documentId)
+			if paragraphs is None:
+				paragraphs = OrderedDict()
+				self.__documents[documentId] = paragraphs
+				while len(self.__documents) > self.__maxDocuments:
+					self.__documents.popitem(last=False)
+			self.__documents.move_to_end(documentId)
+			paragraphs[(context, text)] = errors
+			paragraphs.move_to_end((context, text))
+			while len(paragraphs) > self.__maxParagraphs:
+				paragraphs.popitem(last=False)
+
+	def check(self, documentId, context, text, analyse):
+		# type: (str, Hashable, str, Callable[[str], Tuple]) -> Tuple[Tuple, bool]
+		"""Returns all errors of text, using analyse(fragment) only for the edited part if possible.
+
+		The second value is True if the whole text was analysed, and False
+		if the errors outside of the edit were taken from an earlier text.
+		"""
+		errors = None
+		if len(text) >= MIN_INCREMENTAL_LENGTH:
+			base = self.__findBase(documentId, context, text)
+			if base is not None:
+				errors = self.__recheck(base[0], base[1], text, analyse)
+		complete = errors is None
+		if complete:
+			errors = analyse(text)
+		self.remember(documentId, context, text, errors)
+		return errors, complete
+
+	def __findBase(self, documentId, context, text):
+		# type: (str, Hashable, str) -> Optional[Tuple[str, Tuple]]
+		with self.__lock:
+			paragraphs = self.__documents.get(documentId)
+			if paragraphs is None:
+				return None
+			candidates = [(oldText, oldErrors)
+				      for (oldContext, oldText), oldErrors in paragraphs.items()
+				      if oldContext == context]
+		best = None
+		bestUnchanged = len(text) // 2
+		for oldText, oldErrors in candidates:
+			prefix, suffix = commonAffixes(oldText, text)
+			if prefix + suffix > bestUnchanged:
+				best = (oldText, oldErrors)
+				bestUnchanged = prefix + suffix
+		return best
+
+	def __recheck(self, oldText, oldErrors, text, analyse):
+		# type: (str, Tuple, str, Callable[[str], Tuple]) -> Optional[Tuple]
+		prefix, suffix = commonAffixes(oldText, text)
+		changedEnd = len(text) - suffix
+		starts = sentenceStarts(text)
+		first = max(bisect_right(starts, prefix) - 1 - CONTEXT_SENTENCES, 0)
+		last = bisect_right(starts, max(changedEnd - 1, prefix)) + CONTEXT_SENTENCES
+		windowStart = starts[first]
+		windowEnd = starts[last] if last < len(starts) else len(text)
+		if (windowEnd - windowStart) * 4 > len(text) * 3:
+			# Most of the paragraph changed, not worth the bookkeeping
+			return None
+
+		start16 = utf16Length(text[:windowStart])
+		end16 = utf16Length(text[:windowEnd])
+		shift16 = utf16Length(oldText) - utf16Length(text)
+		before = []
+		after = []
+		for e in oldErrors:
+			if e.end <= start16:
+				before.append(e)
+			elif e.beg >= end16 + shift16:
+				after.append(e._replace(beg=e.beg - shift16, end=e.end - shift16))
+			elif e.beg < start16 or e.end > end16 + shift16:
+				# Error crosses the window boundary, we can't tell if it is still valid
+				return None
+		logging.debug("ParagraphTracker: re-analysing %d of %d characters",
+			      windowEnd - windowStart, len(text))
+		changed = [e._replace(beg=e.beg + start16, end=e.end + start16)
+			   for e in analyse(text[windowStart:windowEnd])]
+		return tuple(before + changed + after)
@@ -15,25 +15,40 @@ import os
 import sys
 import locale
 import uno			# type:ignore
-from LODivvun.DivvunHandlePool import DivvunHandlePool
+from LODivvun.CheckerDaemon import DEFAULT_DAEMON_CONNECTIONS
+from LODivvun.CheckerEngine import CheckerOptions, DIVVUN_MIN_HYPHENATED_WORD_LENGTH, DIVVUN_OPT_HYPHENATE_UNKNOWN_WORDS, \
+	DIVVUN_OPT_NO_UGLY_HYPHENATION, hyphenationOptions
+from LODivvun.CheckerWarmUp import CheckerWarmUp, parseLanguageList
+from LODivvun.DivvunHandlePool import DEFAULT_MAX_HANDLES_PER_LANGUAGE, DivvunHandlePool
+from LODivvun.ParagraphStore import DEFAULT_MAX_PARAGRAPHS
 from com.sun.star.beans import XPropertyChangeListener, UnknownPropertyException, PropertyValue	 # type:ignore
 from com.sun.star.linguistic2 import LinguServiceEvent	# type:ignore
+from com.sun.star.util import XChangesListener	# type:ignore
 from com.sun.star.linguistic2.LinguServiceEventFlags import SPELL_CORRECT_WORDS_AGAIN, SPELL_WRONG_WORDS_AGAIN, HYPHENATE_AGAIN, PROOFREAD_AGAIN  # type:ignore
-from typing import Set, List, Tuple, Dict, Any     # flake8: noqa
+from typing import Set, List, Tuple, Dict, Any, Optional     # flake8: noqa
 
-class PropertyManager(unohelper.Base, XPropertyChangeListener):
+class PropertyManager(unohelper.Base, XPropertyChangeListener, XChangesListener):
 
 	def __init__(self):
 		self.__messageLanguage = "en_US"
 		DivvunHandlePool.getInstance().setInstallationPath(self.__getInstallationPath())
 		logging.debug("PropertyManager.__init__")
 		self.__linguPropSet = None
+		self.__spellWithDigits = False
+		self.__spellUpperCase = False
 		self.__hyphMinLeading = 2
 		self.__hyphMinTrailing = 2
 		self.__hyphMinWordLength = 5
 		self.__hyphWordParts = False
 		self.__hyphUnknownWords = True
 		self.__linguEventListeners = {}	 # type: Dict[int, Any]
+		self.__dictionaryConfig = None
+		self.__ignoredRules = frozenset()  # type: frozenset
+		self.__backgroundProofreading = False
+		self.__backgroundProofreadingThreads = 1
+		self.__options = None  # type: Optional[CheckerOptions]
+		self.__callOptions = {}  # type: Dict[Tuple, CheckerOptions]
+		self.__warmUp = CheckerWarmUp(DivvunHandlePool.getInstance())
 		try:
 			dictVariant = self.readFromRegistry("/no.divvun.gramcheck.Config/dictionary", "variant")
 			DivvunHandlePool.getInstance().setPreferredGlobalVariant(dictVariant)
@@ -50,6 +65,13 @@ class PropertyManager(unohelper.Base, XPropertyChangeListener):
 		event.nEvent = SPELL_CORRECT_WORDS_AGAIN | SPELL_WRONG_WORDS_AGAIN | HYPHENATE_AGAIN | PROOFREAD_AGAIN
 		self.__sendLinguEvent(event);
 
+	def changesOccurred(self, event):
+		logging.debug("PropertyManager.changesOccurred")
+		self.__readIgnoredRules()
+
+	def disposing(self, source):
+		pass
+
 	def __setUiLanguage(self):
 		try:
 			lang = self.readFromRegistry("org.openoffice.Office.Linguistic/General", "UILocale")
@@ -70,7 +92,6 @@ class PropertyManager(unohelper.Base, XPropertyChangeListener):
 		self.__setUiLanguage()
 
 		DivvunHandlePool.getInstance().setGlobalBooleanOption(PropertyManager.DIVVUN_OPT_IGNORE_DOT, True)
-		DivvunHandlePool.getInstance().setGlobalBooleanOption(PropertyManager.DIVVUN_OPT_NO_UGLY_HYPHENATION, True)
 
 		# Set these options globally until OOo bug #97945 is resolved.
 		DivvunHandlePool.getInstance().setGlobalBooleanOption(PropertyManager.DIVVUN_OPT_ACCEPT_TITLES_IN_GC, True)
@@ -88,6 +109,8 @@ class PropertyManager(unohelper.Base, XPropertyChangeListener):
 		# synchronize the local settings from global preferences
 		self.__setProperties(self.__linguPropSet)
 		self.readDivvunSettings()
+		self.__watchIgnoredRules()
+		self.__startWarmUp()
 		# request that all users of linguistic services run the spellchecker and hyphenator
 		# again with updated settings
 		event = LinguServiceEvent()
@@ -124,6 +147,90 @@ class PropertyManager(unohelper.Base, XPropertyChangeListener):
 		except UnknownPropertyException as e:
 			logging.exception("PropertyManager.readDivvunSettings")
 		self.__syncHyphenatorSettings()
+		self.__readPatternStoreSetting()
+		self.__readPoolSettings()
+		self.__readProofreadingSettings()
+
+	def __readPatternStoreSetting(self):
+		try:
+			patternStore = self.readFromRegistry("/no.divvun.gramcheck.Config/hyphenator", "patternStore")
+			DivvunHandlePool.getInstance().setHyphenationStoreEnabled(patternStore is True)
+		except UnknownPropertyException as e:
+			logging.exception("PropertyManager.__readPatternStoreSetting")
+
+	def __readProofreadingSettings(self):
+		try:
+			self.__backgroundProofreading = self.readFromRegistry("/no.divvun.gramcheck.Config/proofreading", "background")
+			self.__backgroundProofreadingThreads = self.readFromRegistry("/no.divvun.gramcheck.Config/proofreading", "backgroundThreads")
+			persistentCache = self.readFromRegistry("/no.divvun.gramcheck.Config/proofreading", "persistentCache")
+			persistentCacheSize = self.readFromRegistry("/no.divvun.gramcheck.Config/proofreading", "persistentCacheSize")
+			DivvunHandlePool.getInstance().setParagraphStoreSettings(persistentCache is True,
+										  persistentCacheSize or DEFAULT_MAX_PARAGRAPHS)
+		except UnknownPropertyException as e:
+			logging.exception("PropertyManager.__readProofreadingSettings")
+
+	def getBackgroundProofreading(self):
+		return self.__backgroundProofreading
+
+	def getBackgroundProofreadingThreads(self):
+		return self.__backgroundProofreadingThreads
+
+	def __readPoolSetting(self, key, default):
+		"""Returns a setting of the pool group, or default if it is missing or empty"""
+		try:
+			value = self.readFromRegistry("/no.divvun.gramcheck.Config/pool", key)
+		except UnknownPropertyException as e:
+			logging.exception("PropertyManager.__readPoolSetting " + key)
+			return default
+		return value or default
+
+	def __readPoolSettings(self):
+		# Each setting is read on its own, so that one that is missing
+		# doesn't keep the others from being applied
+		pool = DivvunHandlePool.getInstance()
+		pool.setMaxHandlesPerLanguage(self.__readPoolSetting("maxHandlesPerLanguage",
+								     DEFAULT_MAX_HANDLES_PER_LANGUAGE))
+		pool.setEvictionPolicy(self.__readPoolSetting("idleTimeout", 0),
+				       self.__readPoolSetting("maxLoadedLanguages", 0),
+				       self.__readPoolSetting("memoryBudget", 0))
+		workerTimeout = self.__readPoolSetting("workerTimeout", 0)
+		pool.setOutOfProcess(self.__readPoolSetting("outOfProcess", False) is True, workerTimeout,
+				     self.__readPoolSetting("workerPython", None))
+		pool.setDaemon(self.__readPoolSetting("daemonAddress", ""),
+			       self.__readPoolSetting("daemonConnections", DEFAULT_DAEMON_CONNECTIONS),
+			       workerTimeout)
+
+	def __startWarmUp(self):
+		"""Loads the configured and the recently used languages in the background"""
+		languages = parseLanguageList(self.__readPoolSetting("preloadLanguages", ""))
+		if self.__readPoolSetting("preloadRecentLanguages", False):
+			languages = languages + DivvunHandlePool.getInstance().getRecentLanguages()
+		self.__warmUp.start(languages, self.__readPoolSetting("maxLoadedLanguages", 0))
+
+	def __watchIgnoredRules(self):
+		# Keep the view alive so that we are notified when the rules are
+		# changed from the settings dialog or another view.
+		self.__dictionaryConfig = PropertyManager.getRegistryProperties("/no.divvun.gramcheck.Config/dictionary")
+		if self.__dictionaryConfig is None:
+			logging.error("PropertyManager.__watchIgnoredRules: failed to obtain dictionary configuration")
+			return
+		self.__dictionaryConfig.addChangesListener(self)
+		self.__readIgnoredRules()
+
+	def __readIgnoredRules(self):
+		try:
+			registryRaw = self.__dictionaryConfig.getHierarchicalPropertyValue("gcignored")
+			logging.debug("PropertyManager: read gcignored {}".format(registryRaw))
+			self.__ignoredRules = frozenset((registryRaw or "").split())
+		except UnknownPropertyException as e:
+			logging.exception("PropertyManager.__readIgnoredRules")
+			self.__ignoredRules = frozenset()
+
+	def getIgnoredRules(self):
+		return self.__ignoredRules
+
+	def setIgnoredRules(self, ignoredRules):
+		self.__ignoredRules = frozenset(ignoredRules)
 
 	def __getInstallationPath(self):
 		dname = os.path.dirname(sys.modules[__name__].__file__)
@@ -170,6 +277,9 @@ class PropertyManager(unohelper.Base, XPropertyChangeListener):
 		except UnknownPropertyException as e:
 			logging.exception("PropertyManager.reloadDivvunSettings")
 		self.__syncHyphenatorSettings()
+		self.__readPatternStoreSetting()
+		self.__readPoolSettings()
+		self.__readProofreadingSettings()
 		self.__sendLinguEvent(event)
 
 	def __setProperties(self, properties):
@@ -182,21 +292,67 @@ class PropertyManager(unohelper.Base, XPropertyChangeListener):
 			except Exception as e:
 				logging.exception("Exception setting property value '%s'", p)
 
-	def setValues(self, values):
-		for v in values:
-			self.setValue(v)
-
-	def resetValues(self, values):
-		for v in values:
-			globalV = PropertyValue()
-			globalV.Name = v.Name
-			globalV.Value = self.__linguPropSet.getPropertyValue(v.Name)
-			self.setValue(globalV)
+	def getOptions(self, properties):
+		"""Returns the CheckerOptions for a request made with properties.
+
+		The properties only apply to that request, so the global settings
+		are left alone. Requests usually pass the global values, and then
+		get the same CheckerOptions as requests without properties.
+		"""
+		options = self.__options
+		if options is None:
+			options = self.__makeOptions({})
+			self.__options = options
+		if len(properties) == 0:
+			return options
+		fingerprint = tuple((p.Name, p.Value) for p in properties if p.Name in PropertyManager.OPTION_PROPERTIES)
+		callOptions = self.__callOptions
+		result = callOptions.get(fingerprint)
+		if result is None:
+			result = self.__makeOptions(dict(fingerprint))
+			if result == options:
+				result = options
+			if len(callOptions) >= PropertyManager.CALL_OPTIONS_CACHE_SIZE:
+				callOptions.clear()
+			callOptions[fingerprint] = result
+		return result
+
+	def __makeOptions(self, values):  # type: (Dict[str, Any]) -> CheckerOptions
+		spellWithDigits = values.get("IsSpellWithDigits", self.__spellWithDigits)
+		spellUpperCase = values.get("IsSpellUpperCase", self.__spellUpperCase)
+		# Like setValue, ignore hyphenation settings that are None
+		hyphMinLeading = values.get("HyphMinLeading")
+		if hyphMinLeading is None:
+			hyphMinLeading = self.__hyphMinLeading
+		hyphMinTrailing = values.get("HyphMinTrailing")
+		if hyphMinTrailing is None:
+			hyphMinTrailing = self.__hyphMinTrailing
+		hyphMinWordLength = values.get("HyphMinWordLength")
+		if hyphMinWordLength is None:
+			hyphMinWordLength = self.__hyphMinWordLength
+		booleanOverrides = []
+		if spellWithDigits != self.__spellWithDigits:
+			booleanOverrides.append((PropertyManager.DIVVUN_OPT_IGNORE_NUMBERS, not spellWithDigits))
+		if spellUpperCase != self.__spellUpperCase:
+			booleanOverrides.append((PropertyManager.DIVVUN_OPT_IGNORE_UPPERCASE, not spellUpperCase))
+		integerOverrides = []
+		if self.__hyphWordParts and hyphMinWordLength != self.__hyphMinWordLength:
+			integerOverrides.append((PropertyManager.DIVVUN_MIN_HYPHENATED_WORD_LENGTH, hyphMinWordLength))
+		return CheckerOptions(spellWithDigits, spellUpperCase, hyphMinLeading, hyphMinTrailing, hyphMinWordLength,
+				      tuple(booleanOverrides), tuple(integerOverrides))
+
+	def __invalidateOptions(self):
+		self.__options = None
+		self.__callOptions = {}
 
 	def setValue(self, value):
 		if value.Name == "IsSpellWithDigits":
+			self.__spellWithDigits = value.Value
+			self.__invalidateOptions()
 			DivvunHandlePool.getInstance().setGlobalBooleanOption(PropertyManager.DIVVUN_OPT_IGNORE_NUMBERS, not value.Value)
 		elif value.Name == "IsSpellUpperCase":
+			self.__spellUpperCase = value.Value
+			self.__invalidateOptions()
 			DivvunHandlePool.getInstance().setGlobalBooleanOption(PropertyManager.DIVVUN_OPT_IGNORE_UPPERCASE, not value.Value)
 		elif value.Name == "HyphMinLeading":
 			if value.Value is not None:
@@ -212,15 +368,22 @@ class PropertyManager(unohelper.Base, XPropertyChangeListener):
 				self.__syncHyphenatorSettings()
 
 	def __syncHyphenatorSettings(self):
-		if self.__hyphWordParts:
-			DivvunHandlePool.getInstance().setGlobalIntegerOption(PropertyManager.DIVVUN_MIN_HYPHENATED_WORD_LENGTH, self.__hyphMinWordLength)
-		else:
-			DivvunHandlePool.getInstance().setGlobalIntegerOption(PropertyManager.DIVVUN_MIN_HYPHENATED_WORD_LENGTH, 2)
-		DivvunHandlePool.getInstance().setGlobalBooleanOption(PropertyManager.DIVVUN_OPT_HYPHENATE_UNKNOWN_WORDS, self.__hyphUnknownWords)
+		self.__invalidateOptions()
+		booleanOptions, integerOptions = hyphenationOptions(self.__hyphWordParts, self.__hyphMinWordLength, self.__hyphUnknownWords)
+		for option, value in booleanOptions:
+			DivvunHandlePool.getInstance().setGlobalBooleanOption(option, value)
+		for option, value in integerOptions:
+			DivvunHandlePool.getInstance().setGlobalIntegerOption(option, value)
+
+	def requestProofreadAgain(self):
+		"""Asks LibreOffice to run the grammar checker again, e.g. when background results are ready"""
+		event = LinguServiceEvent()
+		event.nEvent = PROOFREAD_AGAIN
+		self.__sendLinguEvent(event)
 
 	def __sendLinguEvent(self, event):
 		logging.debug("PropertyManager.sendLinguEvent")
-		for key, lstnr in self.__linguEventListeners.items():
+		for key, lstnr in list(self.__linguEventListeners.items()):
 			logging.debug("PropertyManager.sendLinguEvent sending event")
 			lstnr.processLinguServiceEvent(event)
 
@@ -244,13 +407,16 @@ class PropertyManager(unohelper.Base, XPropertyChangeListener):
 		return PropertyManager.instance
 
 PropertyManager.instance = None
+# Linguistic properties that can be passed with a single request
+PropertyManager.OPTION_PROPERTIES = frozenset(["IsSpellWithDigits", "IsSpellUpperCase", "HyphMinLeading", "HyphMinTrailing", "HyphMinWordLength"])
+PropertyManager.CALL_OPTIONS_CACHE_SIZE = 32
 PropertyManager.loadingFailed = False
 PropertyManager.DIVVUN_OPT_IGNORE_NUMBERS = 1
 PropertyManager.DIVVUN_OPT_IGNORE_UPPERCASE = 3
-PropertyManager.DIVVUN_MIN_HYPHENATED_WORD_LENGTH = 9
-PropertyManager.DIVVUN_OPT_HYPHENATE_UNKNOWN_WORDS = 15
+PropertyManager.DIVVUN_MIN_HYPHENATED_WORD_LENGTH = DIVVUN_MIN_HYPHENATED_WORD_LENGTH
+PropertyManager.DIVVUN_OPT_HYPHENATE_UNKNOWN_WORDS = DIVVUN_OPT_HYPHENATE_UNKNOWN_WORDS
 PropertyManager.DIVVUN_OPT_IGNORE_DOT = 0
-PropertyManager.DIVVUN_OPT_NO_UGLY_HYPHENATION = 4
+PropertyManager.DIVVUN_OPT_NO_UGLY_HYPHENATION = DIVVUN_OPT_NO_UGLY_HYPHENATION
 PropertyManager.DIVVUN_OPT_ACCEPT_TITLES_IN_GC = 13
 PropertyManager.DIVVUN_OPT_ACCEPT_BULLETED_LISTS_IN_GC = 16
 PropertyManager.DIVVUN_OPT_ACCEPT_UNFINISHED_PARAGRAPHS_IN_GC = 14
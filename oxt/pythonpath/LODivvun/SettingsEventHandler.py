@@ -14,17 +14,16 @@ import logging
 import uno				   # type:ignore
 from com.sun.star.lang import XServiceInfo  # type:ignore
 from com.sun.star.awt import XContainerWindowEventHandler  # type:ignore
-from com.sun.star.beans import UnknownPropertyException	 # type:ignore
 from com.sun.star.beans import PropertyValue as __property__
 from com.sun.star.lang import Locale
 from com.sun.star.awt import XActionListener
 
 from LODivvun.PropertyManager import PropertyManager
 from LODivvun.DivvunHandlePool import DivvunHandlePool
-import libdivvun
+from LODivvun.CheckerEngine import checkerToggleIds
 
 try:
-	from typing import TypeVar, Set, List, Tuple, Dict, Callable, Any     # flake8: noqa
+	from typing import TypeVar, Set, FrozenSet, List, Tuple, Dict, Callable, Any     # flake8: noqa
 	T = TypeVar('T')
 except ImportError:
 	pass
@@ -66,7 +65,7 @@ are loaded (and if UI locale changes, though that's not too bad)
 	pool = DivvunHandlePool.getInstance()
 	handles = pool.getOpenHandles()
 	for checklang, checker in handles.items():
-		prefs = libdivvun.prefs_bytes(checker).asdict()
+		prefs = checkerToggleIds(checker)
 		logging.info("KBU: prefs of checker for lang {} has pref l18n langs {}".format(checklang, prefs.keys()))
 		# First add explanations from the other languages,
 		# then those of the checker, then the UI language, so
@@ -78,11 +77,11 @@ are loaded (and if UI locale changes, though that's not too bad)
 		logging.info("KBU: prefs of checker for lang {} has p_checklang {}".format(checklang, p_checklang))
 		logging.info("KBU: prefs of checker for lang {} has p_notcheckui {}".format(checklang, p_notcheckui))
 		for _l, p in p_notcheckui:
-			toggleIds.update(p.toggleIds.asdict())
+			toggleIds.update(p)
 		for _l, p in p_checklang:
-			toggleIds.update(p.toggleIds.asdict())
+			toggleIds.update(p)
 		for _l, p in p_uilang:
-			toggleIds.update(p.toggleIds.asdict())
+			toggleIds.update(p)
 		logging.info("KBU: prefs of checker for lang {} has toggleIds {}".format(checklang, toggleIds))
 	# Remove empty ones, just confusing:
 	return { err:msg
@@ -90,15 +89,14 @@ are loaded (and if UI locale changes, though that's not too bad)
 		 if err.strip() != "" and msg.strip() != "" }
 
 
-def readIgnoredRules():		# type: () -> Set[str]
-	"""Read ignored rule identifiers from registry"""
-	try:
-		registryRaw = PropertyManager.getInstance().readFromRegistry("/no.divvun.gramcheck.Config/dictionary", "gcignored")
-		logging.debug("KBU: Read gcignored registryRaw {}".format(registryRaw))
-		return set(registryRaw.split())
-	except UnknownPropertyException as e:
-		logging.exception(e)
-		return set()
+def readIgnoredRules():		# type: () -> FrozenSet[str]
+	"""Return ignored rule identifiers.
+
+	PropertyManager keeps these in memory and listens for changes
+	to the registry, so this is cheap enough to call on every check.
+
+	"""
+	return PropertyManager.getInstance().getIgnoredRules()
 
 
 def saveIgnoredRules(ignoredRules):  # type: (Set[str]) -> None
@@ -108,6 +106,7 @@ def saveIgnoredRules(ignoredRules):  # type: (Set[str]) -> None
 	rootView.setHierarchicalPropertyValue("gcignored", gcsettingTids)
 	logging.debug("KBU: gcignored registry set to {}".format(gcsettingTids))
 	rootView.commitChanges()
+	PropertyManager.getInstance().setIgnoredRules(ignoredRules)
 
 def getListSelections(listM):	# type: (Any) -> Dict[int, str]
 	stringListValue = listM.getPropertyValue("StringItemList")
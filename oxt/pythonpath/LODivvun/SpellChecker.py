@@ -13,8 +13,10 @@ import logging
 import unohelper 		# type:ignore
 from com.sun.star.linguistic2 import XSpellChecker, XLinguServiceEventBroadcaster  # type:ignore
 from com.sun.star.lang import XServiceInfo, XInitialization, XServiceDisplayName  # type:ignore
+from LODivvun.CheckerEngine import isWordValid, suggestWords
 from LODivvun.DivvunHandlePool import DivvunHandlePool
 from LODivvun.SpellAlternatives import SpellAlternatives
+from LODivvun.SuggestionPrefetcher import SuggestionPrefetcher
 from LODivvun.PropertyManager import PropertyManager
 
 class SpellChecker(unohelper.Base, XServiceInfo, XSpellChecker, XLinguServiceEventBroadcaster, XInitialization, XServiceDisplayName):
@@ -41,39 +43,35 @@ class SpellChecker(unohelper.Base, XServiceInfo, XSpellChecker, XLinguServiceEve
 
 	# From XSpellChecker
 	def isValid(self, word, locale, properties):
-		DivvunHandlePool.mutex.acquire()
-		try:
-			divvun = DivvunHandlePool.getInstance().getHandle(locale)
-			if divvun is None:
-				return False
-			PropertyManager.getInstance().setValues(properties)
-			result = divvun.spell(word)
-			PropertyManager.getInstance().resetValues(properties)
-			return result
-		finally:
-			DivvunHandlePool.mutex.release()
+		pool = DivvunHandlePool.getInstance()
+		valid = isWordValid(pool, locale, word, PropertyManager.getInstance().getOptions(properties))
+		if valid is False and pool.getMaxHandlesPerLanguage() > 1:
+			# The user will likely ask for suggestions next. With a single
+			# instance per language there is never one to spare for this.
+			SpellChecker.getSuggestionPrefetcher().submit(locale, word)
+		return valid is True
 
 	def spell(self, word, locale, properties):
 		# Check if diagnostic message should be returned
 		if word == "DivvunGetStatusInformation":
 			suggestions = [DivvunHandlePool.getInstance().getInitializationStatus()]
 			return SpellAlternatives(word, suggestions, locale)
-		
-		DivvunHandlePool.mutex.acquire()
-		try:
-			divvun = DivvunHandlePool.getInstance().getHandle(locale)
-			if divvun is None:
-				return None
-
-			PropertyManager.getInstance().setValues(properties)
-			if divvun.spell(word):
-				PropertyManager.getInstance().resetValues(properties)
-				return None
-			suggestions = divvun.suggest(word)
-			PropertyManager.getInstance().resetValues(properties)
-			return SpellAlternatives(word, suggestions, locale)
-		finally:
-			DivvunHandlePool.mutex.release()
+
+		pool = DivvunHandlePool.getInstance()
+		options = PropertyManager.getInstance().getOptions(properties)
+		if isWordValid(pool, locale, word, options) is not False:
+			return None
+		suggestions = suggestWords(pool, locale, word, options)
+		if suggestions is None:
+			return None
+		return SpellAlternatives(word, list(suggestions), locale)
+
+	@staticmethod
+	def getSuggestionPrefetcher():
+		with DivvunHandlePool.mutex:
+			if SpellChecker.suggestionPrefetcher is None:
+				SpellChecker.suggestionPrefetcher = SuggestionPrefetcher(DivvunHandlePool.getInstance())
+			return SpellChecker.suggestionPrefetcher
 
 	# From XLinguServiceEventBroadcaster
 	def addLinguServiceEventListener(self, xLstnr):
@@ -104,5 +102,6 @@ class SpellChecker(unohelper.Base, XServiceInfo, XSpellChecker, XLinguServiceEve
 		else:
 			return "Spellchecker (Divvun)"
 
+SpellChecker.suggestionPrefetcher = None
 SpellChecker.IMPLEMENTATION_NAME = "divvun.SpellChecker"
 SpellChecker.SUPPORTED_SERVICE_NAMES = ("com.sun.star.linguistic2.SpellChecker",)
@@ -0,0 +1,78 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+import logging
+import time
+from collections import deque
+from threading import Condition, Thread
+
+from LODivvun.CheckerEngine import prefetchSuggestions
+
+try:
+	from typing import Any, Hashable, Set     # flake8: noqa
+except ImportError:
+	pass
+
+# Misspelled words waiting for suggestions, the oldest ones are dropped first
+PREFETCH_QUEUE_SIZE = 64
+
+# Seconds to wait before trying again when all checker instances are busy
+PREFETCH_RETRY_DELAY = 0.05
+PREFETCH_RETRIES = 3
+
+
+class SuggestionPrefetcher:
+	"""Computes spelling suggestions for misspelled words on a background thread.
+
+	The user is likely to ask for suggestions for a word that was just
+	marked as misspelled, so they are computed into the suggestion cache
+	ahead of time. The thread only uses an idle checker instance when
+	another one of the language stays idle, and gives up on a word rather
+	than wait. So there must be more than one instance per language, see
+	DivvunHandlePool.setMaxHandlesPerLanguage.
+	"""
+
+	def __init__(self, instance):  # type: (Any) -> None
+		self.__instance = instance
+		# Last in, first out: the word the user typed last is the most
+		# likely one to be corrected next
+		self.__queue = deque(maxlen=PREFETCH_QUEUE_SIZE)  # type: deque
+		self.__queued = set()  # type: Set[Hashable]
+		self.__wordsQueued = Condition()
+		worker = Thread(target=self.__work, name="DivvunSuggestionPrefetcher")
+		worker.daemon = True
+		worker.start()
+
+	def submit(self, locale, word):  # type: (Any, str) -> None
+		key = (self.__instance.getCheckerIdentity(locale), word)
+		with self.__wordsQueued:
+			if key in self.__queued:
+				return
+			if len(self.__queue) == self.__queue.maxlen:
+				self.__queued.discard(self.__queue.popleft()[0])
+			self.__queued.add(key)
+			self.__queue.append((key, locale, word))
+			self.__wordsQueued.notify()
+
+	def __work(self):
+		while True:
+			with self.__wordsQueued:
+				while len(self.__queue) == 0:
+					self.__wordsQueued.wait()
+				key, locale, word = self.__queue.pop()
+				self.__queued.discard(key)
+			try:
+				for attempt in range(PREFETCH_RETRIES):
+					if prefetchSuggestions(self.__instance, locale, word):
+						break
+					time.sleep(PREFETCH_RETRY_DELAY)
+			except Exception:
+				logging.exception("SuggestionPrefetcher: prefetch failed")
@@ -0,0 +1,73 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+"""Small files that are kept between LibreOffice sessions.
+
+Everything stored here can be recomputed, so failing to read or write a
+file is logged and otherwise ignored.
+"""
+
+import json
+import logging
+import os
+import sys
+import tempfile
+
+try:
+	from typing import Any, Optional     # flake8: noqa
+except ImportError:
+	pass
+
+CACHE_DIRECTORY_NAME = "libreoffice-divvun"
+
+
+def getCacheDirectory():  # type: () -> str
+	"""Returns the per-user cache directory of the extension, following the platform conventions"""
+	if sys.platform.startswith("win"):
+		base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(os.path.join("~", "AppData", "Local"))
+		return os.path.join(base, CACHE_DIRECTORY_NAME, "cache")
+	if sys.platform == "darwin":
+		return os.path.expanduser(os.path.join("~", "Library", "Caches", CACHE_DIRECTORY_NAME))
+	base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+	return os.path.join(base, CACHE_DIRECTORY_NAME)
+
+
+def getCachePath(name):  # type: (str) -> str
+	return os.path.join(getCacheDirectory(), name)
+
+
+def readJson(name):  # type: (str) -> Optional[Any]
+	"""Returns the contents of the cache file, or None if it doesn't exist or can't be read"""
+	try:
+		with open(getCachePath(name), encoding="utf-8") as f:
+			return json.load(f)
+	except FileNotFoundError:
+		return None
+	except (OSError, ValueError) as e:
+		logging.warning("UserCache: ignoring unreadable {}: {}".format(name, e))
+		return None
+
+
+def writeJson(name, data):  # type: (str, Any) -> None
+	"""Replaces the cache file atomically, so other processes never see a partial file"""
+	directory = getCacheDirectory()
+	try:
+		os.makedirs(directory, exist_ok=True)
+		fd, tmpPath = tempfile.mkstemp(prefix="." + name, dir=directory)
+		try:
+			with os.fdopen(fd, "w", encoding="utf-8") as f:
+				json.dump(data, f, ensure_ascii=False)
+			os.replace(tmpPath, os.path.join(directory, name))
+		except BaseException:
+			os.unlink(tmpPath)
+			raise
+	except OSError as e:
+		logging.warning("UserCache: could not write {}: {}".format(name, e))
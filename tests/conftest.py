@@ -0,0 +1,35 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+"""Runs the tests against the extension's modules and the stand-ins of
+libdivvun and UNO from bench/stubs."""
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUBS = os.path.join(ROOT, "bench", "stubs")
+PYTHONPATH = os.path.join(ROOT, "oxt", "pythonpath")
+
+for path in (PYTHONPATH, STUBS):
+	if path not in sys.path:
+		sys.path.insert(0, path)
+
+# Worker processes import the stand-in libdivvun too
+os.environ["PYTHONPATH"] = os.pathsep.join(
+	[STUBS] + [path for path in [os.environ.get("PYTHONPATH")] if path])
+
+# Keep the language catalogue of the stand-ins out of the real user cache
+os.environ["XDG_CACHE_HOME"] = tempfile.mkdtemp(prefix="divvun-tests-")
+atexit.register(shutil.rmtree, os.environ["XDG_CACHE_HOME"], True)
@@ -0,0 +1,37 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+import unittest
+
+from LODivvun.BatchProofreader import checkTask, defaultInstallationPath, initWorker
+
+class CheckTaskTest(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		initWorker(defaultInstallationPath(), "", ["msyn-agr-subj-verb"], False, False)
+
+	def check(self, text):
+		return [(record["beg"], record["form"]) for record in checkTask(("doc", 0, None, "se", text))]
+
+	def test_errors_behind_astral_characters(self):
+		# Each 𝄞 is two UTF-16 code units, so the last error starts behind len(text)
+		text = "buorre 𝄞𝄞𝄞 muhto 𝄞𝄞𝄞𝄞 muhto"
+		self.assertEqual(self.check(text), [(14, "muhto"), (29, "muhto")])
+
+	def test_paragraphs_are_not_edits_of_each_other(self):
+		self.assertEqual(self.check("muhto dá sátni"), [(0, "muhto")])
+		# Shares its start with the paragraph before
+		self.assertEqual(self.check("muhto dá sátni muhto"), [(0, "muhto"), (15, "muhto")])
+		self.assertEqual(self.check("sátni"), [])
+
+if __name__ == "__main__":
+	unittest.main()
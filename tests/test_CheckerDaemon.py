@@ -0,0 +1,142 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+import os
+import shutil
+import socket
+import tempfile
+import time
+import unittest
+from threading import Thread
+
+from LODivvun.CheckerDaemon import SOCKET_MODE, DaemonClient, createServer
+from LODivvun.CheckerWorkers import HEADER, OP_SPELL, STATUS_OK, WorkerTimeout, readExactly
+
+class SlowDaemon:
+	"""Answers the first request of a connection after a delay, and no other"""
+
+	def __init__(self, path, delay):
+		self.delay = delay
+		self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		self.listener.bind(path)
+		self.listener.listen()
+		self.connections = []
+		thread = Thread(target=self.__accept)
+		thread.daemon = True
+		thread.start()
+
+	def __accept(self):
+		while True:
+			try:
+				connection, _ = self.listener.accept()
+			except OSError:
+				return
+			self.connections.append(connection)
+			thread = Thread(target=self.__answer, args=(connection,))
+			thread.daemon = True
+			thread.start()
+
+	def __answer(self, connection):
+		with connection.makefile("rb") as reader:
+			answered = False
+			while True:
+				header = readExactly(reader, HEADER.size)
+				if header is None:
+					return
+				length, requestId, op = HEADER.unpack(header)
+				readExactly(reader, length)
+				if not answered:
+					time.sleep(self.delay)
+					connection.sendall(HEADER.pack(0, requestId, STATUS_OK))
+					answered = True
+
+	def close(self):
+		self.listener.close()
+		for connection in self.connections:
+			connection.close()
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs Unix sockets")
+class DaemonClientTest(unittest.TestCase):
+
+	TIMEOUT = 0.5
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, "daemon.sock")
+		self.daemon = SlowDaemon(self.path, 0.3)
+		self.client = DaemonClient(self.path, 1, self.TIMEOUT)
+
+	def tearDown(self):
+		self.client.close()
+		self.daemon.close()
+		shutil.rmtree(self.directory)
+
+	def exchange(self, results):
+		start = time.monotonic()
+		try:
+			status, _ = self.client.exchange(OP_SPELL, b"")
+			results.append((status, time.monotonic() - start))
+		except WorkerTimeout as e:
+			results.append((e, time.monotonic() - start))
+
+	def test_batch_fails_at_the_deadline_of_a_request(self):
+		first = []
+		threads = [Thread(target=self.exchange, args=(first,))]
+		threads[0].start()
+		time.sleep(0.1)
+		# These queue up behind the first request and are sent together
+		queued = []
+		for _ in range(5):
+			threads.append(Thread(target=self.exchange, args=(queued,)))
+			threads[-1].start()
+		for thread in threads:
+			thread.join()
+		self.assertEqual(first[0][0], STATUS_OK)
+		self.assertEqual(len(queued), 5)
+		for result, elapsed in queued:
+			self.assertIsInstance(result, WorkerTimeout)
+			# Waiting in the queue and for the reply, not for every request
+			# of the batch
+			self.assertLess(elapsed, 2 * self.TIMEOUT + 0.5)
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs Unix sockets")
+class CreateServerTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, "daemon.sock")
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def test_private_socket(self):
+		server = createServer(self.path)
+		try:
+			self.assertEqual(os.stat(self.path).st_mode & 0o777, SOCKET_MODE)
+		finally:
+			server.server_close()
+
+	def test_stale_socket_is_replaced(self):
+		stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		stale.bind(self.path)
+		stale.close()
+		createServer(self.path).server_close()
+
+	def test_other_files_are_kept(self):
+		with open(self.path, "w") as f:
+			f.write("not a socket")
+		with self.assertRaises(OSError):
+			createServer(self.path)
+		with open(self.path) as f:
+			self.assertEqual(f.read(), "not a socket")
+
+if __name__ == "__main__":
+	unittest.main()
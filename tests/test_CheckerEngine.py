@@ -0,0 +1,198 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+import itertools
+import unittest
+from collections import namedtuple
+
+from LODivvun.CheckerEngine import (CheckerOptions, DivvunError, LocaleIndex, findHyphenPos,
+				    getHyphenationPattern, makeHyphenationPattern, possibleHyphens,
+				    sentenceErrors, serviceTag, splitServiceTag)
+from LODivvun.LruCache import LruCache
+
+Locale = namedtuple("Locale", ["Language", "Country", "Variant"])
+
+def containsLocale(localeToFind, locales):
+	"""The linear search that LocaleIndex replaces"""
+	for locale in locales:
+		if locale.Language == localeToFind.Language and locale.Country == localeToFind.Country:
+			return True
+		if locale.Language == "qlt" and \
+		   (locale.Variant == localeToFind.Language or
+		    (localeToFind.Language == "qlt" and locale.Variant == localeToFind.Variant)):
+			return True
+	if localeToFind.Language == "qlt":
+		tagToFind = localeToFind.Variant
+		if len(tagToFind) > 9 and tagToFind[-3] == "-":
+			return containsLocale(Locale("qlt", "", tagToFind[:-3]), locales)
+	return False
+
+class LocaleIndexTest(unittest.TestCase):
+
+	def test_matches_the_linear_search(self):
+		supported = [Locale("se", "NO", ""), Locale("se", "", ""), Locale("sma", "SE", ""),
+			     Locale("qlt", "", "crk-Cans"), Locale("qlt", "", "sjd")]
+		candidates = [Locale(language, country, variant) for language, country, variant in
+			      itertools.product(["se", "sma", "sjd", "crk", "qlt", "nb"],
+						["", "NO", "SE", "FI"],
+						["", "crk-Cans", "crk-Cans-CN", "crk-Latn-CA", "sjd", "se-NO"])]
+		for locales in (supported, supported[:3], supported[3:], []):
+			index = LocaleIndex(locales)
+			self.assertEqual(len(index), len(locales))
+			self.assertEqual(index.getLocales(), tuple(locales))
+			for locale in candidates:
+				self.assertEqual(index.contains(locale), containsLocale(locale, locales), locale)
+
+	def test_trimmed_tags(self):
+		index = LocaleIndex([Locale("qlt", "", "crk-Cans")])
+		self.assertTrue(index.contains(Locale("qlt", "", "crk-Cans-CN")))
+		self.assertTrue(index.contains(Locale("crk-Cans", "", "")))
+		index = LocaleIndex([Locale("se", "NO", "")])
+		self.assertFalse(index.contains(Locale("qlt", "", "crk-Cans-CN")))
+		self.assertFalse(index.contains(Locale("se", "SE", "")))
+
+class HyphenationTest(unittest.TestCase):
+
+	WORD = "guovttegielat"
+
+	def setUp(self):
+		# Breaks after "guo" and "guovtte", and a break without a hyphen
+		# after "guovttegie"
+		self.hyphenation = makeHyphenationPattern(self.WORD, "   -   -  =  ")
+
+	def test_makeHyphenationPattern(self):
+		self.assertEqual(self.hyphenation.breaks, (3, 7, 10))
+		self.assertEqual(self.hyphenation.hyphens, (3, 7))
+		# Never at an apostrophe, and a short pattern only covers its length
+		pattern = makeHyphenationPattern("ab'cd", "  -")
+		self.assertEqual(pattern.breaks, ())
+		self.assertEqual(pattern.hyphens, (2,))
+		self.assertEqual(makeHyphenationPattern("abc", "").breaks, ())
+
+	def test_findHyphenPos(self):
+		self.assertEqual(findHyphenPos(self.WORD, self.hyphenation, 8, 2, 2), 7)
+		self.assertEqual(findHyphenPos(self.WORD, self.hyphenation, 7, 2, 2), 7)
+		self.assertEqual(findHyphenPos(self.WORD, self.hyphenation, 6, 2, 2), 3)
+		self.assertEqual(findHyphenPos(self.WORD, self.hyphenation, 20, 2, 2), 10)
+		self.assertEqual(findHyphenPos(self.WORD, self.hyphenation, 2, 2, 2), -1)
+		# Before minLeading or within minTrailing of the end
+		self.assertEqual(findHyphenPos(self.WORD, self.hyphenation, 5, 4, 2), -1)
+		self.assertEqual(findHyphenPos(self.WORD, self.hyphenation, 20, 2, 4), 7)
+		self.assertEqual(findHyphenPos("sátni", makeHyphenationPattern("sátni", ""), 5, 1, 1), -1)
+
+	def test_possibleHyphens(self):
+		self.assertEqual(possibleHyphens(self.WORD, self.hyphenation, 2, 2),
+				 ("guo=vtte=gielat", (2, 6)))
+		self.assertEqual(possibleHyphens(self.WORD, self.hyphenation, 4, 2),
+				 ("guovtte=gielat", (6,)))
+		self.assertEqual(possibleHyphens(self.WORD, self.hyphenation, 2, 7),
+				 ("guo=vttegielat", (2,)))
+		self.assertEqual(possibleHyphens(self.WORD, self.hyphenation, 8, 2),
+				 (self.WORD, ()))
+
+class PatternChecker:
+	"""A hyphenator with a pattern for some words only"""
+
+	def __init__(self, patterns):
+		self.patterns = patterns
+		self.calls = 0
+
+	def getHyphenationPattern(self, word):
+		self.calls += 1
+		return self.patterns.get(word)
+
+class PatternStore:
+
+	def __init__(self):
+		self.patterns = {}
+
+	def get(self, word):
+		return self.patterns.get(word)
+
+	def put(self, word, pattern):
+		self.patterns[word] = pattern
+
+class HyphenationPool:
+	"""The parts of DivvunHandlePool that getHyphenationPattern uses"""
+
+	def __init__(self, checker):
+		self.checker = checker
+		self.cache = LruCache(10)
+		self.store = PatternStore()
+
+	def getHyphenationCache(self, locale):
+		return self.cache
+
+	def getHyphenationStore(self, locale):
+		return self.store
+
+	def getPreferredGlobalVariant(self):
+		return None
+
+	def acquireHandle(self, locale, booleanOverrides, integerOverrides, service):
+		return self.checker
+
+	def releaseHandle(self, divvun):
+		pass
+
+class GetHyphenationPatternTest(unittest.TestCase):
+
+	OPTIONS = CheckerOptions(False, False, 2, 2, 5, (), ())
+
+	def setUp(self):
+		self.checker = PatternChecker({"guovttegielat": "   -   -     "})
+		self.pool = HyphenationPool(self.checker)
+
+	def test_pattern_is_cached_and_stored(self):
+		hyphenation = getHyphenationPattern(self.pool, None, "guovttegielat", self.OPTIONS)
+		self.assertEqual(hyphenation.breaks, (3, 7))
+		self.assertEqual(getHyphenationPattern(self.pool, None, "guovttegielat", self.OPTIONS),
+				 hyphenation)
+		self.assertEqual(self.checker.calls, 1)
+		self.assertEqual(self.pool.store.patterns, {"guovttegielat": "   -   -     "})
+
+	def test_word_without_a_pattern(self):
+		self.assertIsNone(getHyphenationPattern(self.pool, None, "boasttu", self.OPTIONS))
+		self.assertIsNone(getHyphenationPattern(self.pool, None, "boasttu", self.OPTIONS))
+		# Neither cached nor stored
+		self.assertEqual(self.checker.calls, 2)
+		self.assertEqual(len(self.pool.cache), 0)
+		self.assertEqual(self.pool.store.patterns, {})
+
+	def test_short_word(self):
+		self.assertIsNone(getHyphenationPattern(self.pool, None, "dat", self.OPTIONS))
+		self.assertEqual(self.checker.calls, 0)
+
+class SentenceErrorsTest(unittest.TestCase):
+
+	def test_sentence_bounds(self):
+		errors = [DivvunError("a", 0, 3, "typo", "", ()),
+			  DivvunError("b", 5, 12, "msyn", "", ()),
+			  DivvunError("c", 12, 14, "typo", "", ()),
+			  DivvunError("d", 20, 22, "typo", "", ())]
+		found, end = sentenceErrors(errors, 4, 10, frozenset())
+		self.assertEqual([e.form for e in found], ["b"])
+		# The error continues after the sentence and extends it
+		self.assertEqual(end, 12)
+		found, end = sentenceErrors(errors, 0, 30, frozenset(["typo"]))
+		self.assertEqual([e.form for e in found], ["b"])
+		self.assertEqual(end, 30)
+
+class ServiceTagTest(unittest.TestCase):
+
+	def test_round_trip(self):
+		for service in ("grammar", "spelling", "hyphenation"):
+			self.assertEqual(splitServiceTag(serviceTag("se", service)), ("se", service))
+		self.assertEqual(serviceTag("se", "grammar"), "se")
+		self.assertEqual(serviceTag("se", "spelling"), "se/spelling")
+
+if __name__ == "__main__":
+	unittest.main()
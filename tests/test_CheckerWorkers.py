@@ -0,0 +1,287 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+import io
+import os
+import queue
+import signal
+import sys
+import unittest
+from threading import Thread
+from unittest import mock
+
+import libdivvun
+from LODivvun.CheckerWorkers import (BYTE, HEADER, OP_BATCH, OP_CHECK, OP_CLOSE, OP_OPEN, OP_SPELL,
+				     STATUS_ERROR, STATUS_OK, STATUS_UNKNOWN_VIEW, UINT, Channel,
+				     CheckerProxy, CheckerRegistry, CheckerServer, RemoteChecker,
+				     UnknownView, Unpacker, WorkerError, WorkerSettings, WorkerTimeout,
+				     packBytes, packOptions, packString, packStrings, readFrames, serve)
+
+SPEC = "/bench/se.zcheck"
+PIPE = "segram"
+TEXT = "Dat lea buorre sátni, muhto dá lea boasttu ja nuppi vel eará"
+
+def openPayload(booleanOptions=None, integerOptions=None):
+	return (packString(SPEC) + packString(PIPE) +
+		packOptions(booleanOptions or {}, integerOptions or {}))
+
+def expectedErrors(text):
+	checker = libdivvun.ArCheckerSpec(SPEC).getChecker(PIPE, True)
+	return [(e.form, e.beg, e.end, e.err, e.dsc, tuple(e.rep))
+		for e in libdivvun.proc_errs_bytes(checker, text)]
+
+class PipeChecker(CheckerProxy):
+	"""A proxy for a CheckerServer on a thread, over a pair of pipes"""
+
+	def __init__(self, server):
+		CheckerProxy.__init__(self, SPEC, PIPE)
+		requestRead, requestWrite = os.pipe()
+		replyRead, replyWrite = os.pipe()
+		self.requests = os.fdopen(requestWrite, "wb")
+		self.replies = os.fdopen(replyRead, "rb")
+		self.ops = []
+		self.serverThread = Thread(target=self.__serve, args=(server, requestRead, replyWrite))
+		self.serverThread.start()
+
+		def write(data):
+			self.requests.write(data)
+			self.requests.flush()
+
+		self.channel = Channel(self.replies, write, "TestReader")
+
+	@staticmethod
+	def __serve(server, requestRead, replyWrite):
+		with os.fdopen(requestRead, "rb") as requests, os.fdopen(replyWrite, "wb") as replies:
+			serve(server, requests, replies)
+
+	def _exchange(self, op, payload):
+		self.ops.append(op)
+		return self.channel.request(op, payload, 10)
+
+	def close(self):
+		self.requests.close()
+		self.serverThread.join()
+		self.replies.close()
+
+class PackingTest(unittest.TestCase):
+
+	def test_fields_round_trip(self):
+		data = (UINT.pack(7) + packString("sátni 𝄞") + packStrings(["a", "", "bé"]) +
+			packBytes(b"\x00\x01") + BYTE.pack(3) +
+			packOptions({5: True, 2: False}, {9: -4, 1: 12}))
+		unpacker = Unpacker(data)
+		self.assertEqual(unpacker.uint(), 7)
+		self.assertEqual(unpacker.string(), "sátni 𝄞")
+		self.assertEqual(unpacker.strings(), ["a", "", "bé"])
+		self.assertEqual(unpacker.bytes(), b"\x00\x01")
+		self.assertEqual(unpacker.byte(), 3)
+		self.assertEqual(unpacker.options(), (((2, False), (5, True)), ((1, 12), (9, -4))))
+
+	def test_truncated_field(self):
+		with self.assertRaises(ValueError):
+			Unpacker(UINT.pack(10) + b"short").bytes()
+
+	def test_frames(self):
+		stream = io.BytesIO(HEADER.pack(3, 17, STATUS_OK) + b"abc" +
+				    HEADER.pack(0, 18, STATUS_ERROR) + HEADER.pack(5, 19, STATUS_OK) + b"ab")
+		frames = queue.Queue()
+		readFrames(stream, frames)
+		self.assertEqual(frames.get_nowait(), (17, STATUS_OK, b"abc"))
+		self.assertEqual(frames.get_nowait(), (18, STATUS_ERROR, b""))
+		# The truncated frame ends the stream
+		self.assertIsNone(frames.get_nowait())
+		self.assertTrue(frames.empty())
+
+class CheckerRegistryTest(unittest.TestCase):
+
+	def test_views_share_a_checker(self):
+		registry = CheckerRegistry(libdivvun)
+		first = registry.open(SPEC, PIPE, ((1, True),), ())
+		second = registry.open(SPEC, PIPE, ((1, False),), ())
+		self.assertNotEqual(first, second)
+		self.assertEqual(registry.open(SPEC, PIPE, ((1, True),), ()), first)
+		self.assertEqual(registry.getLoadedCheckers(), [(SPEC, PIPE)])
+		self.assertEqual(registry.run(first, lambda checker: dict(checker.booleanOptions)), {1: True})
+		self.assertEqual(registry.run(second, lambda checker: dict(checker.booleanOptions)), {1: False})
+
+	def test_close_frees_views_and_checkers(self):
+		registry = CheckerRegistry(libdivvun)
+		first = registry.open(SPEC, PIPE, (), ())
+		self.assertEqual(registry.open(SPEC, PIPE, (), ()), first)
+		other = registry.open(SPEC, PIPE, (), ((3, 4),))
+		registry.close(first)
+		# Still open by the second client
+		self.assertTrue(registry.run(first, lambda checker: checker.spell("sátni")))
+		registry.close(first)
+		with self.assertRaises(UnknownView):
+			registry.run(first, lambda checker: None)
+		with self.assertRaises(UnknownView):
+			registry.close(first)
+		self.assertEqual(registry.getLoadedCheckers(), [(SPEC, PIPE)])
+		registry.close(other)
+		self.assertEqual(registry.getLoadedCheckers(), [])
+		# Opening it again loads it again, with a view id that wasn't used
+		again = registry.open(SPEC, PIPE, (), ())
+		self.assertNotIn(again, (first, other))
+		self.assertEqual(registry.getLoadedCheckers(), [(SPEC, PIPE)])
+
+	def test_failed_load_is_not_kept(self):
+		# Without a libdivvun, loading fails
+		registry = CheckerRegistry(None)
+		with self.assertRaises(AttributeError):
+			registry.open(SPEC, PIPE, (), ())
+		self.assertEqual(registry.getLoadedCheckers(), [])
+
+class CheckerServerTest(unittest.TestCase):
+
+	def setUp(self):
+		self.server = CheckerServer(libdivvun, CheckerRegistry(libdivvun))
+
+	def test_unknown_view_and_operation(self):
+		status, _ = self.server.handle(OP_SPELL, UINT.pack(12345) + packString("sátni"))
+		self.assertEqual(status, STATUS_UNKNOWN_VIEW)
+		status, reply = self.server.handle(77, b"")
+		self.assertEqual(status, STATUS_ERROR)
+		self.assertIn("77", Unpacker(reply).string())
+		status, _ = self.server.handle(OP_OPEN, b"\x01")
+		self.assertEqual(status, STATUS_ERROR)
+
+	def test_batch(self):
+		status, reply = self.server.handle(OP_OPEN, openPayload())
+		self.assertEqual(status, STATUS_OK)
+		view = Unpacker(reply).uint()
+		requests = [(OP_SPELL, UINT.pack(view) + packString("sátni")),
+			    (OP_BATCH, UINT.pack(0)),
+			    (OP_CHECK, UINT.pack(view) + packString(TEXT)),
+			    (OP_CLOSE, UINT.pack(view)),
+			    (OP_SPELL, UINT.pack(view) + packString("sátni"))]
+		status, reply = self.server.handle(OP_BATCH, UINT.pack(len(requests)) + b"".join(
+			BYTE.pack(op) + packBytes(payload) for op, payload in requests))
+		self.assertEqual(status, STATUS_OK)
+		reply = Unpacker(reply)
+		self.assertEqual(reply.uint(), len(requests))
+		statuses = []
+		for _ in requests:
+			statuses.append(reply.byte())
+			reply.bytes()
+		self.assertEqual(statuses, [STATUS_OK, STATUS_ERROR, STATUS_OK, STATUS_OK,
+					    STATUS_UNKNOWN_VIEW])
+
+class CheckerProxyTest(unittest.TestCase):
+
+	def setUp(self):
+		self.registry = CheckerRegistry(libdivvun)
+		self.checker = PipeChecker(CheckerServer(libdivvun, self.registry))
+
+	def tearDown(self):
+		self.checker.close()
+
+	def test_round_trip(self):
+		self.assertEqual(self.checker.checkErrors(TEXT), expectedErrors(TEXT))
+		self.assertEqual(self.checker.checkErrors(""), [])
+		local = libdivvun.ArCheckerSpec(SPEC).getChecker(PIPE, True)
+		for word in TEXT.split():
+			self.assertEqual(self.checker.spell(word), local.spell(word))
+			self.assertEqual(self.checker.suggest(word), local.suggest(word))
+			self.assertEqual(self.checker.getHyphenationPattern(word),
+					 local.getHyphenationPattern(word))
+		# The view is opened once
+		self.assertEqual(self.checker.ops.count(OP_OPEN), 1)
+
+	def test_word_without_a_pattern(self):
+		self.assertEqual(self.checker.getHyphenationPattern(""), "")
+		with mock.patch.object(libdivvun.Checker, "getHyphenationPattern",
+				       lambda checker, word: None):
+			self.assertIsNone(self.checker.getHyphenationPattern("sátni"))
+
+	def test_errors_are_raised(self):
+		status, reply = self.checker.channel.request(OP_OPEN, b"", 10)
+		self.assertEqual(status, STATUS_ERROR)
+		self.assertTrue(reply.string())
+
+	def test_option_change_closes_the_old_view(self):
+		self.checker.spell("sátni")
+		first = self.checker.open()
+		self.checker.setBooleanOption(1, True)
+		self.checker.setBooleanOption(2, False)
+		self.checker.setIntegerOption(3, 7)
+		self.checker.spell("sátni")
+		second = self.checker.open()
+		self.assertNotEqual(first, second)
+		self.assertEqual(self.checker.ops.count(OP_CLOSE), 1)
+		with self.assertRaises(UnknownView):
+			self.registry.run(first, lambda checker: None)
+		self.assertEqual(self.registry.run(second, lambda checker: dict(checker.integerOptions)),
+				 {3: 7})
+
+	def test_unknown_view_opens_it_again(self):
+		view = self.checker.open()
+		# As if the other side was restarted
+		self.registry.close(view)
+		self.assertEqual(self.checker.checkErrors(TEXT), expectedErrors(TEXT))
+		self.assertEqual(self.checker.ops.count(OP_OPEN), 2)
+		self.assertNotEqual(self.checker.open(), view)
+
+	def test_closed_channel(self):
+		self.checker.open()
+		self.checker.close()
+		with self.assertRaises(WorkerError):
+			self.checker.spell("sátni")
+
+@unittest.skipUnless(hasattr(signal, "SIGSTOP"), "needs SIGSTOP to hang a worker")
+class RemoteCheckerTest(unittest.TestCase):
+
+	def setUp(self):
+		self.checker = RemoteChecker(SPEC, PIPE, WorkerSettings(sys.executable, 2))
+
+	def tearDown(self):
+		self.checker.terminate()
+
+	def workerProcess(self):
+		return self.checker._RemoteChecker__process
+
+	def test_round_trip(self):
+		self.checker.start()
+		self.assertEqual(self.checker.checkErrors(TEXT), expectedErrors(TEXT))
+		self.assertTrue(self.checker.spell("sátni") in (True, False))
+
+	def test_restart_after_timeout(self):
+		self.checker.setBooleanOption(1, True)
+		self.checker.start()
+		hung = self.workerProcess()
+		os.kill(hung.pid, signal.SIGSTOP)
+		with self.assertRaises(WorkerTimeout):
+			self.checker.checkErrors(TEXT)
+		# The hung worker was killed
+		self.assertIsNotNone(hung.poll())
+		self.assertIsNone(self.workerProcess())
+		# The next request starts a new one and opens the view again
+		self.assertEqual(self.checker.checkErrors(TEXT), expectedErrors(TEXT))
+		self.assertIsNot(self.workerProcess(), hung)
+
+	def test_restart_after_crash(self):
+		self.checker.start()
+		crashed = self.workerProcess()
+		crashed.kill()
+		crashed.wait()
+		self.assertEqual(self.checker.checkErrors(TEXT), expectedErrors(TEXT))
+		self.assertIsNot(self.workerProcess(), crashed)
+
+	def test_terminate(self):
+		self.checker.start()
+		worker = self.workerProcess()
+		self.checker.terminate()
+		self.assertIsNotNone(worker.poll())
+		with self.assertRaises(WorkerError):
+			self.checker.spell("sátni")
+
+if __name__ == "__main__":
+	unittest.main()
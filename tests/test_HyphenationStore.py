@@ -0,0 +1,158 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from LODivvun.HyphenationStore import (HyphenationStore, StoreFile, storeName,
+				       writeTemporaryStoreFile)
+
+PATTERNS = {"guovttegielat": "   -   -     ", "sátni": "  -  ", "𝄞𝄞": "  ", "a": " ", "": "",
+	    "Áhkku": "  -  ", "zzz": "   "}
+
+class StoreFileTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, "store.dvhy")
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def write(self, patterns):
+		os.replace(writeTemporaryStoreFile(self.path, patterns), self.path)
+		return StoreFile(self.path)
+
+	def test_binary_search(self):
+		storeFile = self.write(PATTERNS)
+		try:
+			self.assertEqual(len(storeFile), len(PATTERNS))
+			for word, pattern in PATTERNS.items():
+				self.assertEqual(storeFile.get(word), pattern, word)
+			for word in ("b", "sátn", "sátnit", "zzzz", "Á", "0"):
+				self.assertIsNone(storeFile.get(word), word)
+			self.assertEqual(dict(storeFile.items()), PATTERNS)
+			# Sorted by UTF-8 bytes
+			words = [word for word, _ in storeFile.items()]
+			self.assertEqual(words, sorted(words, key=lambda word: word.encode("utf-8")))
+		finally:
+			storeFile.close()
+
+	def test_empty_and_unreadable(self):
+		storeFile = self.write({})
+		self.assertEqual(len(storeFile), 0)
+		self.assertIsNone(storeFile.get("a"))
+		storeFile.close()
+		with open(self.path, "wb") as f:
+			f.write(b"DVHY\x01\x00\x00\x00\xff\xff\x00\x00")
+		with self.assertRaises(ValueError):
+			StoreFile(self.path)
+		with open(self.path, "wb") as f:
+			f.write(b"something else")
+		with self.assertRaises(ValueError):
+			StoreFile(self.path)
+
+	def test_storeName(self):
+		name = storeName("/a/se.zcheck", (1, 2), "sehyph", [(4, True)])
+		self.assertTrue(name.startswith("hyphenation-") and name.endswith(".dvhy"))
+		self.assertEqual(name, storeName("/a/se.zcheck", (1, 2), "sehyph", [(4, True)]))
+		self.assertNotEqual(name, storeName("/a/se.zcheck", (1, 3), "sehyph", [(4, True)]))
+		self.assertNotEqual(name, storeName("/a/se.zcheck", (1, 2), "sehyph", [(4, False)]))
+
+class HyphenationStoreTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, "cache", "store.dvhy")
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def test_merge(self):
+		store = HyphenationStore(self.path)
+		self.assertIsNone(store.get("sátni"))
+		store.update({"sátni": "  -  ", "a": " "})
+		store.put("guovttegielat", "   -   -     ")
+		self.assertEqual(store.get("sátni"), "  -  ")
+		store.flush()
+		self.assertTrue(os.path.exists(self.path))
+		store.put("Áhkku", "  -  ")
+		# A word computed again replaces the stored pattern
+		store.put("a", "-")
+		store.close()
+
+		store = HyphenationStore(self.path)
+		self.assertEqual(store.get("sátni"), "  -  ")
+		self.assertEqual(store.get("guovttegielat"), "   -   -     ")
+		self.assertEqual(store.get("Áhkku"), "  -  ")
+		self.assertEqual(store.get("a"), "-")
+		self.assertIsNone(store.get("b"))
+		store.close()
+		# Nothing is left behind but the store and its lock file
+		self.assertEqual(sorted(os.listdir(os.path.dirname(self.path))),
+				 ["store.dvhy", "store.dvhy.lock"])
+
+	def test_flushes_of_other_processes_are_kept(self):
+		first = HyphenationStore(self.path)
+		second = HyphenationStore(self.path)
+		first.put("sátni", "  -  ")
+		second.put("guovttegielat", "   -   -     ")
+		first.flush()
+		second.put("a", " ")
+		second.flush()
+		self.assertEqual(second.get("sátni"), "  -  ")
+		first.close()
+		second.close()
+		storeFile = StoreFile(self.path)
+		try:
+			self.assertEqual(dict(storeFile.items()), {"sátni": "  -  ", "a": " ",
+								   "guovttegielat": "   -   -     "})
+		finally:
+			storeFile.close()
+
+	def test_missing_patterns_are_rejected(self):
+		store = HyphenationStore(self.path)
+		with self.assertRaises(ValueError):
+			store.put("sátni", None)
+		with self.assertRaises(ValueError):
+			store.update({"a": " ", "sátni": None})
+		self.assertIsNone(store.get("a"))
+		store.close()
+		self.assertFalse(os.path.exists(self.path))
+
+	def test_flush_threshold(self):
+		store = HyphenationStore(self.path, flushThreshold=10)
+		patterns = {"sátni{}".format(i): "  -  " for i in range(25)}
+		for word, pattern in patterns.items():
+			store.put(word, pattern)
+		store.close()
+		storeFile = StoreFile(self.path)
+		try:
+			self.assertEqual(dict(storeFile.items()), patterns)
+		finally:
+			storeFile.close()
+
+	def test_unreadable_file_is_replaced(self):
+		os.makedirs(os.path.dirname(self.path))
+		with open(self.path, "wb") as f:
+			f.write(b"garbage")
+		store = HyphenationStore(self.path)
+		self.assertIsNone(store.get("a"))
+		store.put("a", " ")
+		store.close()
+		store = HyphenationStore(self.path)
+		self.assertEqual(store.get("a"), " ")
+		store.close()
+
+if __name__ == "__main__":
+	unittest.main()
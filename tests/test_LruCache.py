@@ -0,0 +1,50 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+import unittest
+
+from LODivvun.LruCache import LruCache
+
+class LruCacheTest(unittest.TestCase):
+
+	def test_least_recently_used_is_dropped(self):
+		cache = LruCache(2)
+		cache.put("a", 1)
+		cache.put("b", 2)
+		self.assertEqual(cache.get("a"), 1)
+		cache.put("c", 3)
+		self.assertEqual(len(cache), 2)
+		self.assertIsNone(cache.get("b"))
+		self.assertEqual(cache.get("a"), 1)
+		self.assertEqual(cache.get("c"), 3)
+		# Replacing a value makes it the most recently used one
+		cache.put("a", 4)
+		cache.put("d", 5)
+		self.assertEqual(cache.get("a"), 4)
+		self.assertIsNone(cache.get("c"))
+
+	def test_default_and_falsy_values(self):
+		cache = LruCache(2)
+		self.assertEqual(cache.get("x", "default"), "default")
+		cache.put("x", ())
+		self.assertEqual(cache.get("x", "default"), ())
+
+	def test_disabled_and_clear(self):
+		cache = LruCache(0)
+		cache.put("a", 1)
+		self.assertEqual(len(cache), 0)
+		cache = LruCache(3)
+		cache.put("a", 1)
+		cache.clear()
+		self.assertIsNone(cache.get("a"))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,78 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from LODivvun.CheckerEngine import DivvunError
+from LODivvun.ParagraphStore import ParagraphStore, paragraphHash, sqliteAvailable
+
+ERRORS = (DivvunError("boasttu", 4, 11, "typo", "Čállinmeattáhus", ("buorre", "𝄞")),
+	  DivvunError("dá", 12, 14, "msyn", "", ()))
+
+@unittest.skipUnless(sqliteAvailable(), "needs sqlite3")
+class ParagraphStoreTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, "cache", "paragraphs.sqlite")
+		self.store = ParagraphStore(self.path)
+
+	def tearDown(self):
+		self.store.close()
+		shutil.rmtree(self.directory)
+
+	def reopen(self, maxParagraphs=100):
+		self.store.close()
+		self.store = ParagraphStore(self.path, maxParagraphs)
+
+	def test_entries_outlive_the_store(self):
+		self.assertIsNone(self.store.get("checker", "Dát boasttu dá"))
+		self.store.put("checker", "Dát boasttu dá", ERRORS)
+		self.store.put("checker", "Dát lea buorre", ())
+		# Found before they are written
+		self.assertEqual(self.store.get("checker", "Dát boasttu dá"), ERRORS)
+		self.reopen()
+		self.assertEqual(self.store.get("checker", "Dát boasttu dá"), ERRORS)
+		self.assertEqual(self.store.get("checker", "Dát lea buorre"), ())
+		# Only for the same checker
+		self.assertIsNone(self.store.get("other checker", "Dát boasttu dá"))
+
+	def test_least_recently_used_are_pruned(self):
+		self.reopen(maxParagraphs=10)
+		# Use times are in seconds
+		with mock.patch.object(time, "time", return_value=1000):
+			for i in range(10):
+				self.store.put("checker", "paragraph {}".format(i), ERRORS)
+			self.store.flush()
+		with mock.patch.object(time, "time", return_value=2000):
+			# Use the first ones, they are kept
+			for i in range(3):
+				self.assertEqual(self.store.get("checker", "paragraph {}".format(i)), ERRORS)
+			self.store.flush()
+			self.store.put("checker", "paragraph 10", ERRORS)
+			self.store.flush()
+		kept = [i for i in range(11) if self.store.get("checker", "paragraph {}".format(i))]
+		# One over the limit, and a tenth of the limit to make room
+		self.assertEqual(len(kept), 9)
+		self.assertTrue(set(range(3)) | {10} <= set(kept), kept)
+
+	def test_hash(self):
+		self.assertEqual(paragraphHash("sátni"), paragraphHash("sátni"))
+		self.assertNotEqual(paragraphHash("sátni"), paragraphHash("sátni "))
+		self.assertEqual(len(paragraphHash("")), 20)
+
+if __name__ == "__main__":
+	unittest.main()
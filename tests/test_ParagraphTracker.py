@@ -0,0 +1,138 @@
+# Libreoffice-divvun: Linguistic extension for LibreOffice
+# Copyright (C) 2026 Divvun contributors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License,
+# v. 2.0. If a copy of the MPL was not distributed with this file, You can
+# obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Alternatively, the contents of this file may be used under the terms of
+# the GNU General Public License Version 3 or later (the "GPL"), in which
+# case the provisions of the GPL are applicable instead of those above.
+
+import re
+import unittest
+
+from LODivvun.CheckerEngine import DivvunError
+from LODivvun.ParagraphTracker import (MIN_INCREMENTAL_LENGTH, ParagraphTracker, commonAffixes,
+				       sentenceStarts, utf16Length)
+
+CONTEXT = ("checker", "")
+
+def analyse(text):
+	"""Reports every "boasttu" in text, with UTF-16 offsets like libdivvun"""
+	return tuple(DivvunError("boasttu", utf16Length(text[:m.start()]), utf16Length(text[:m.end()]),
+				 "typo", "", ("buorre",))
+		     for m in re.finditer("boasttu", text))
+
+def paragraph(sentences):
+	return " ".join(sentences)
+
+SENTENCES = ["Dát lea {} cealkka 𝄞 mas lea boasttu sátni.".format(i) if i % 3 == 0
+	     else "Dát lea {} cealkka mas ii leat mihkkege.".format(i) for i in range(20)]
+
+class HelpersTest(unittest.TestCase):
+
+	def test_utf16Length(self):
+		self.assertEqual(utf16Length(""), 0)
+		self.assertEqual(utf16Length("sátni"), 5)
+		self.assertEqual(utf16Length("a𝄞b"), 4)
+
+	def test_sentenceStarts(self):
+		self.assertEqual(sentenceStarts("Okta. Guokte? Golbma!» Njeallje… Vihtta"), [0, 6, 14, 23, 33])
+		self.assertEqual(sentenceStarts("Okta. "), [0])
+		self.assertEqual(sentenceStarts("1.5 ja v.d."), [0])
+		self.assertEqual(sentenceStarts(""), [0])
+
+	def test_commonAffixes(self):
+		self.assertEqual(commonAffixes("abcdef", "abXdef"), (2, 3))
+		self.assertEqual(commonAffixes("abc", "abc"), (3, 0))
+		self.assertEqual(commonAffixes("", "abc"), (0, 0))
+		# The suffix doesn't overlap the prefix
+		self.assertEqual(commonAffixes("aaa", "aaaa"), (3, 0))
+		self.assertEqual(commonAffixes("abab", "ab"), (2, 0))
+
+class ParagraphTrackerTest(unittest.TestCase):
+
+	def setUp(self):
+		self.tracker = ParagraphTracker()
+		self.fragments = []
+
+	def check(self, text, documentId="doc", context=CONTEXT):
+		def record(fragment):
+			self.fragments.append(fragment)
+			return analyse(fragment)
+		del self.fragments[:]
+		return self.tracker.check(documentId, context, text, record)
+
+	def test_short_paragraphs_are_analysed_whole(self):
+		text = paragraph(SENTENCES[:3])
+		self.assertLess(len(text), MIN_INCREMENTAL_LENGTH)
+		self.check(text)
+		errors, complete = self.check(text.replace("ii leat", "leat"))
+		self.assertTrue(complete)
+		self.assertEqual(len(self.fragments), 1)
+
+	def test_edit_shifts_the_errors_behind_it(self):
+		text = paragraph(SENTENCES)
+		self.assertGreaterEqual(len(text), MIN_INCREMENTAL_LENGTH)
+		errors, complete = self.check(text)
+		self.assertTrue(complete)
+		self.assertEqual(errors, analyse(text))
+
+		# Insert an error and some astral characters in the middle
+		edited = paragraph(SENTENCES[:10] + ["Dát lea ođđa 𝄞𝄞 boasttu cealkka."] + SENTENCES[10:])
+		errors, complete = self.check(edited)
+		self.assertFalse(complete)
+		self.assertEqual(len(self.fragments), 1)
+		self.assertLess(len(self.fragments[0]), len(edited) // 4)
+		self.assertEqual(errors, analyse(edited))
+
+		# Remove text before all errors but the first
+		shortened = edited.replace(SENTENCES[4] + " ", "")
+		errors, complete = self.check(shortened)
+		self.assertFalse(complete)
+		self.assertEqual(errors, analyse(shortened))
+
+	def test_different_contexts_and_documents_are_not_mixed(self):
+		text = paragraph(SENTENCES)
+		edited = text.replace("mas ii leat", "mas boasttu", 1)
+		self.check(text)
+		_, complete = self.check(edited, context=("other checker", ""))
+		self.assertTrue(complete)
+		_, complete = self.check(edited, documentId="other document")
+		self.assertTrue(complete)
+		_, complete = self.check(edited)
+		self.assertFalse(complete)
+
+	def test_large_edits_are_analysed_whole(self):
+		text = paragraph(SENTENCES)
+		self.check(text)
+		_, complete = self.check(paragraph(SENTENCES[:5] + [s.upper() for s in SENTENCES[5:]]))
+		self.assertTrue(complete)
+
+	def test_errors_across_the_edit_window(self):
+		text = paragraph(SENTENCES)
+		self.check(text)
+		start = text.index(SENTENCES[10])
+		# An error of the previous analysis spans the whole window
+		spanning = DivvunError("x", 0, utf16Length(text), "typo", "", ())
+		self.tracker.remember("doc", CONTEXT, text, (spanning,))
+		edited = text[:start] + "Ođđa. " + text[start:]
+		errors, complete = self.check(edited)
+		self.assertTrue(complete)
+		self.assertEqual(errors, analyse(edited))
+
+	def test_remembered_errors_are_reused(self):
+		text = paragraph(SENTENCES)
+		remembered = analyse(text)
+		self.tracker.remember("doc", CONTEXT, text, remembered)
+		edited = text.replace(SENTENCES[15], SENTENCES[15].replace("ii leat", "boasttu"))
+		errors, complete = self.check(edited)
+		self.assertFalse(complete)
+		self.assertEqual(errors, analyse(edited))
+		self.tracker.clear()
+		_, complete = self.check(edited + " Loahppa.")
+		self.assertTrue(complete)
+
+if __name__ == "__main__":
+	unittest.main()